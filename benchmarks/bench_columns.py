@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark: per document vs. columnar batch loading, documents per second.
+
+Numeric telemetry documents of a few shapes are loaded one at a time (load_dict,
+shape cache) and in batches (load_batch), with NumPy reductions if installed and
+with builtin min / max. Also compares typing numeric arrays per item vs. in bulk.
+
+Usage:
+    python benchmarks/bench_columns.py [--num_docs N] [--batch_size N]
+"""
+
+import argparse
+import random
+import timeit
+
+from spectron import columns
+from spectron.data_types import column_dtype, set_dtype
+from spectron.MaxDict import MaxDict
+
+
+def corpus(num_docs: int):
+    rng = random.Random(0)
+    docs = []
+    for i in range(num_docs):
+        d = {
+            "id": i,
+            "ts": 1588291200 + i,
+            "host": f"host-{i % 16}",
+            "ok": bool(i % 3),
+            "cpu": {f"core{c}": rng.random() * 100 for c in range(8)},
+            "mem": {"used": rng.randrange(2 ** 32), "free": rng.randrange(2 ** 32)},
+            "net": {"rx": rng.randrange(2 ** 20), "tx": rng.randrange(2 ** 20)},
+        }
+        if i % 4 == 0:
+            d["error"] = None
+        docs.append(d)
+    return docs
+
+
+def bench(num_docs: int, batch_size: int):
+    docs = corpus(num_docs)
+
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+    md = MaxDict(batch_size=batch_size)
+    md.batch_load_dicts(docs)
+    assert md.asdict(astype=True) == expected.asdict(astype=True)
+
+    def load(**kwargs):
+        MaxDict(**kwargs).batch_load_dicts(docs)
+
+    numpy = columns.numpy()
+
+    def load_batch():
+        load(batch_size=batch_size)
+
+    cases = {
+        "load_dict": (load, None),
+        f"load_batch ({batch_size}), numpy": (load_batch, numpy),
+        f"load_batch ({batch_size}), builtins": (load_batch, None),
+    }
+
+    t_prev = None
+    for name, (func, np) in cases.items():
+        if "numpy" in name and numpy is None:
+            continue
+
+        columns._np = np
+        t = min(timeit.repeat(func, number=1, repeat=5))
+        t_prev = t_prev or t
+        print(f"{name:<32} {len(docs) / t:12,.0f} docs/s  speedup: {t_prev / t:5.1f}x")
+    columns._np = numpy
+
+    array = [random.randrange(2 ** 20) for _ in range(10000)]
+    t_items = min(timeit.repeat(lambda: set(map(set_dtype, array)), number=20))
+    t_bulk = min(timeit.repeat(lambda: column_dtype(array), number=20))
+    print(
+        f"{'array dtype, per item':<32} {len(array) * 20 / t_items:12,.0f} values/s\n"
+        f"{'array dtype, column_dtype':<32} {len(array) * 20 / t_bulk:12,.0f} values/s"
+        f"  speedup: {t_items / t_bulk:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_docs", type=int, default=20000)
+    parser.add_argument("--batch_size", type=int, default=1024)
+    args = parser.parse_args()
+    bench(args.num_docs, args.batch_size)
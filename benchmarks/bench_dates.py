@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""Microbenchmark: string dtype detection, strings per second.
+
+Compares the previous detector (pendulum.parse for every string with a digit) to
+the tiered parse_date.guess_type, with and without pendulum fallback, and to the
+per path learned format (parse_date.FormatCache) of each column.
+
+Usage:
+    python benchmarks/bench_dates.py [--number N]
+"""
+
+import argparse
+import timeit
+import uuid
+
+from pendulum import parse
+
+from spectron import parse_date
+from spectron.data_types import set_dtype
+
+
+def previous_guess_type(s: str):
+    """Reference: previous parse_date.guess_type, always calls pendulum."""
+
+    n = parse_date.num_digits(s)
+    if n < 8:
+        return None
+
+    try:
+        parse(s)
+    except:  # noqa: E722
+        return None
+    return "DATE" if n == 8 else "TIMESTAMP"
+
+
+def previous_str_dtype(s: str):
+    """Reference: previous set_dtype for str, infer_date was ignored."""
+
+    if any(c.isdigit() for c in s):
+        dtype = previous_guess_type(s)
+        if dtype:
+            return dtype
+    return "VARCHAR"
+
+
+def corpus(n: int = 100):
+    strings = []
+    for i in range(n):
+        strings += [
+            str(uuid.UUID(int=i * 7919)),
+            f"{i % 9}.{i % 13}.{i}",
+            f"+1 (555) {i:03d}-{i * 7 % 10000:04d}",
+            f"user_{i}",
+            "lorem ipsum",
+            f"2020-05-{i % 28 + 1:02d}",
+            f"2020-05-{i % 28 + 1:02d}T12:34:{i % 60:02d}.123+0000",
+        ]
+    return strings
+
+
+def bench(number: int):
+    strings = corpus()
+
+    cases = {
+        "previous (pendulum)": previous_str_dtype,
+        "set_dtype": set_dtype,
+        "set_dtype, infer_date": lambda s: set_dtype(s, infer_date=True),
+        "set_dtype, fallback": lambda s: set_dtype(
+            s, infer_date=True, date_fallback=True
+        ),
+    }
+
+    expected = [previous_str_dtype(s) for s in strings]
+    inferred = [set_dtype(s, infer_date=True) for s in strings]
+    diff = sum(a != b for a, b in zip(expected, inferred))
+    print(f"{len(strings):,} strings, {diff:,} typed differently than previous")
+
+    t_prev = None
+    for name, func in cases.items():
+
+        def run():
+            for s in strings:
+                func(s)
+
+        t = min(timeit.repeat(run, number=number, repeat=5)) / number
+        t_prev = t_prev or t
+        print(
+            f"{name:<24} {len(strings) / t:14,.0f} strings/s"
+            f"  speedup: {t_prev / t:7.1f}x"
+        )
+
+    # same strings as columns, one format cache per column
+    columns = [strings[i::7] for i in range(7)]
+
+    def run_format_cache():
+        for column in columns:
+            fmt = parse_date.FormatCache()
+            for s in column:
+                fmt.add(s)
+
+    t = min(timeit.repeat(run_format_cache, number=number, repeat=5)) / number
+    print(
+        f"{'FormatCache, per column':<24} {len(strings) / t:14,.0f} strings/s"
+        f"  speedup: {t_prev / t:7.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20)
+    bench(parser.parse_args().number)
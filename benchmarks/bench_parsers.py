@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark: end to end scan_files per installed parser backend.
+
+Decoding is only part of a scan, lazy backends also change the cost of walking
+documents. parsers.PRIORITY follows this ranking.
+
+Usage:
+    python benchmarks/bench_parsers.py [--lines N] [--wide N]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from pathlib import Path
+
+from spectron import parsers, scan
+
+
+def small_doc(i: int):
+    return {"id": i, "name": f"user_{i}", "score": i / 7, "active": i % 2 == 0}
+
+
+def wide_doc(i: int):
+    return {
+        f"key_{k}": {"a": i, "b": str(k), "c": [i, k], "d": [{"e": 1.5}]}
+        for k in range(50)
+    }
+
+
+def write_ndjson(path: Path, docs):
+    with open(path, "w") as f:
+        for d in docs:
+            f.write(json.dumps(d) + "\n")
+
+
+def bench(lines: int, wide: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixtures = {
+            f"small ({lines:,} lines)": Path(tmp_dir) / "small.json",
+            f"wide ({wide:,} docs)": Path(tmp_dir) / "wide.json",
+        }
+        small_path, wide_path = fixtures.values()
+        write_ndjson(small_path, (small_doc(i) for i in range(lines)))
+        write_ndjson(wide_path, (wide_doc(i) for i in range(wide)))
+
+        for name, path in fixtures.items():
+            timings = []
+            for backend in parsers.available():
+                start = time.perf_counter()
+                scan.scan_files([str(path)], lines=True, parser=backend)
+                timings.append((time.perf_counter() - start, backend))
+
+            ranked = "  ".join(f"{b}: {t:.2f}s" for t, b in sorted(timings))
+            print(f"{name:<22} {ranked}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=400_000)
+    parser.add_argument("--wide", type=int, default=20_000)
+    args = parser.parse_args()
+    bench(args.lines, args.wide)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark: MaxDict.load_dict with and without shape cache.
+
+Runs are interleaved, best of `--repeat` is reported per fixture.
+
+Usage:
+    python benchmarks/bench_shapes.py [--docs N] [--repeat N]
+"""
+
+import argparse
+import time
+
+from spectron.MaxDict import MaxDict
+
+
+def flat_doc(i: int):
+    return {
+        f"k{k}": i * k if k % 3 == 0 else f"s{i}" if k % 3 == 1 else i / 3
+        for k in range(30)
+    }
+
+
+def nested_doc(i: int):
+    return {
+        "id": i,
+        "user": {"name": f"u{i}", "age": i % 90, "tags": ["a", "b"]},
+        "events": [{"ts": i, "ok": True}],
+        **{f"k{k}": i for k in range(20)},
+    }
+
+
+def mixed_doc(i: int):
+    return {
+        **{f"d{k}": {"a": i, "b": str(i)} for k in range(10)},
+        **{f"l{k}": [i, i + 1, i + 2] for k in range(10)},
+        **{f"s{k}": f"str{i}" for k in range(10)},
+    }
+
+
+def heterogeneous_doc(i: int):
+    return {f"k{(i + k) % 200}": i for k in range(i % 7, 30)}
+
+
+FIXTURES = {
+    "flat (30 scalars)": flat_doc,
+    "nested (2 nested, 21 scalars)": nested_doc,
+    "mixed (20 nested, 10 scalars)": mixed_doc,
+    "heterogeneous keys": heterogeneous_doc,
+}
+
+
+def bench(num_docs: int, repeat: int):
+    for name, make_doc in FIXTURES.items():
+        docs = [make_doc(i) for i in range(num_docs)]
+
+        best = {True: float("inf"), False: float("inf")}
+        for _ in range(repeat):
+            for shape_cache in best:
+                md = MaxDict(shape_cache=shape_cache)
+                start = time.perf_counter()
+                for d in docs:
+                    md.load_dict(d)
+                best[shape_cache] = min(best[shape_cache], time.perf_counter() - start)
+
+        print(
+            f"{name:<32} cache: {num_docs / best[True]:9,.0f} docs/s"
+            f"  no cache: {num_docs / best[False]:9,.0f} docs/s"
+            f"  speedup: {best[False] / best[True]:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    bench(args.docs, args.repeat)
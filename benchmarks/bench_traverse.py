@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""Microbenchmark: recursive generator traversal vs traverse.walk.
+
+Usage:
+    python benchmarks/bench_traverse.py [--number N]
+"""
+
+import argparse
+import sys
+import timeit
+
+from spectron import merge
+from spectron.paths import ARRAY_KEY, ROOT, PathTable
+from spectron.traverse import walk
+
+
+def recursive_ids(d, table, parent_id=ROOT):
+    """Reference: recursive generator traversal (previous extract_terminal_ids)."""
+
+    child = table.child
+
+    if isinstance(d, merge.MAPPING_TYPES):
+        for k, v in merge.iter_items(d):
+            path_id = child(parent_id, k)
+            if merge.terminal(v):
+                if isinstance(v, merge.SEQUENCE_TYPES):
+                    yield child(path_id, ARRAY_KEY), None
+                elif isinstance(v, merge.MAPPING_TYPES):
+                    yield path_id, {}
+                else:
+                    yield path_id, v
+            else:
+                yield from recursive_ids(v, table, path_id)
+    elif isinstance(d, merge.SEQUENCE_TYPES):
+        path_id = child(parent_id, ARRAY_KEY)
+        if d:
+            for item in d:
+                yield from recursive_ids(item, table, path_id)
+        else:
+            yield path_id, None
+    else:
+        yield parent_id, d
+
+
+def deep_doc(depth: int):
+    d = leaf = {}
+    for i in range(depth):
+        leaf["v"] = i
+        leaf["next"] = {}
+        leaf = leaf["next"]
+    leaf["end"] = True
+    return d
+
+
+def wide_doc(width: int):
+    return {
+        f"key_{i}": {"a": i, "b": str(i), "c": [i, i + 1], "d": [{"e": 1.5}]}
+        for i in range(width)
+    }
+
+
+FIXTURES = {
+    "deep (depth 200)": deep_doc(200),
+    "wide (1,000 keys)": wide_doc(1000),
+}
+
+
+def bench(number: int):
+    for name, d in FIXTURES.items():
+        table = PathTable()
+        values = []
+
+        def run_recursive():
+            for path_id, value in recursive_ids(d, table):
+                values.append(value)
+
+        def run_walk():
+            walk(d, table, lambda path_id, value: values.append(value))
+
+        t_rec = min(timeit.repeat(run_recursive, number=number, repeat=5))
+        t_walk = min(timeit.repeat(run_walk, number=number, repeat=5))
+
+        print(
+            f"{name:<20} recursive: {t_rec / number * 1e6:9.1f} us"
+            f"  walk: {t_walk / number * 1e6:9.1f} us"
+            f"  speedup: {t_rec / t_walk:.2f}x"
+        )
+
+    # nesting beyond recursion limit
+    depth = sys.getrecursionlimit() * 2
+    d = deep_doc(depth)
+    try:
+        list(recursive_ids(d, PathTable()))
+        rec = "ok"
+    except RecursionError:
+        rec = "RecursionError"
+
+    n = []
+    walk(d, PathTable(), lambda path_id, value: n.append(value))
+    print(f"{'deep (depth ' + format(depth, ',') + ')':<20} recursive: {rec}  walk: ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200)
+    bench(parser.parse_args().number)
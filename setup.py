@@ -39,7 +39,12 @@ setuptools.setup(
     python_requires=">=3.7",
     install_requires=requirements,
     tests_require=["pytest", "pytest-datadir"],
-    extras_require={"json": "ujson==1.35"},
+    extras_require={
+        "json": "ujson==1.35",
+        "orjson": "orjson",
+        "simdjson": "pysimdjson>=3.0",
+        "zstd": "zstandard>=0.15",
+    },
     include_package_data=False,
     classifiers=[
         "Intended Audience :: Developers",
@@ -2,33 +2,103 @@
 
 import logging
 
-from collections import defaultdict
-from itertools import chain
-from typing import Dict
+from typing import Dict, Optional, Sequence
+
+from . import columns
+from .parse_date import FormatCache
 
 logger = logging.getLogger(__name__)
 
 
-def add_hist_dicts(d1: Dict, d2: Dict) -> Dict:
-    d = defaultdict(int)
-    for k, v in chain(d1.items(), d2.items()):
-        d[k] += v
-    return d
+# fixed counter slots per dtype
+DTYPES = ("bool", "int", "float", "str", "dict")
+BOOL, INT, FLOAT, STR, DICT = range(len(DTYPES))
+DTYPE_IX = {bool: BOOL, int: INT, float: FLOAT, str: STR, dict: DICT}
+
+# strings longer than this are stored as a prefix of the longest value seen
+STR_EXEMPLAR_LEN = 256
+
+NUMERIC_DTYPES = {"int", "float"}
+
+
+def dtype_rule(names, str_numeric_override: bool = False) -> Optional[str]:
+    """Dtype of Field given dtype names seen, None if decided by counts."""
+
+    if len(names) == 1:
+        return next(iter(names))
+    if NUMERIC_DTYPES & set(names):
+        if str_numeric_override and "str" in names:
+            return "str"
+        elif "float" in names:
+            return "float"
+    return None
+
+
+# precomputed dtype_rule per (str_numeric_override, bitmask of DTYPES slots seen)
+DTYPE_RULES = {
+    (override, mask): dtype_rule(
+        [name for ix, name in enumerate(DTYPES) if mask & 1 << ix], override
+    )
+    for override in (False, True)
+    for mask in range(1, 2 ** len(DTYPES))
+}
 
 
 class Field:
-    """Tracks max value and data type(s)."""
+    """Tracks max value and data type(s).
+
+    Values are not stored, per dtype counters and streaming stats are kept instead:
+        - int, float: min, max
+        - str: min, max length and (prefix of) longest value
+        - bool: last value
+    Types outside of DTYPES are counted by name with their last value.
+
+    If `str_format` is set, the date format of string values is learned per Field,
+    see parse_date.FormatCache.
+    """
+
+    __slots__ = (
+        "parent_key",
+        "str_numeric_override",
+        "num_na",
+        "counts",
+        "order",
+        "int_min",
+        "int_max",
+        "float_min",
+        "float_max",
+        "str_min_len",
+        "str_max_len",
+        "str_value",
+        "bool_value",
+        "other",
+        "str_format",
+    )
 
     _max_int = 2 ** 64 // 2
     _max_float = 2 ** (65 - 14) // 2
-    numeric_types = {"int", "float"}
-
-    def __init__(self, parent_key: str, value=None, *, str_numeric_override=False):
+    numeric_types = NUMERIC_DTYPES
+
+    def __init__(
+        self,
+        parent_key: str,
+        value=None,
+        *,
+        str_numeric_override=False,
+        str_format: Optional[FormatCache] = None,
+    ):
         self.parent_key = parent_key
         self.str_numeric_override = str_numeric_override
         self.num_na = 0
-        self.dtype_max = {}
-        self.hist = defaultdict(int)
+        self.counts = [0] * len(DTYPES)
+        self.order = []  # dtype slots in order first seen
+        self.int_min = self.int_max = None
+        self.float_min = self.float_max = None
+        self.str_min_len = self.str_max_len = 0
+        self.str_value = None
+        self.bool_value = None
+        self.other = None
+        self.str_format = str_format
         self.add(value)
 
     def __add__(self, other):
@@ -36,14 +106,108 @@ class Field:
             (self.str_numeric_override, other.str_numeric_override)
         )
         field = Field(self.parent_key, str_numeric_override=str_numeric_override)
-        field.num_na = self.num_na + other.num_na
+        field.num_na = 0
+        return field.merge(self).merge(other)
+
+    def copy(self):
+        """Copy of Field, counters are not shared."""
+
+        field = Field.__new__(Field)
+        for attr in self.__slots__:
+            setattr(field, attr, getattr(self, attr))
+
+        field.counts = self.counts.copy()
+        field.order = self.order.copy()
+        if self.other:
+            field.other = self.other.copy()
+        if self.str_format is not None:
+            field.str_format = self.str_format.copy()
+        return field
 
-        for dtype, value in chain(self.dtype_max.items(), other.dtype_max.items()):
-            field._update_dtype_max(dtype, value)
+    def merge(self, other):
+        """Merge counters and stats of other Field in place, other is treated as newer.
 
-        hist = add_hist_dicts(self.hist, other.hist)
-        field.hist.update(hist)
-        return field
+        Returns: self
+        """
+
+        self.str_numeric_override = (
+            self.str_numeric_override or other.str_numeric_override
+        )
+        self.num_na += other.num_na
+        counts = self.counts
+
+        for ix in other.order:
+            if not counts[ix]:
+                self.order.append(ix)
+
+                if ix == INT:
+                    self.int_min, self.int_max = other.int_min, other.int_max
+                elif ix == FLOAT:
+                    self.float_min, self.float_max = other.float_min, other.float_max
+                elif ix == STR:
+                    self.str_min_len = other.str_min_len
+                    self.str_max_len = other.str_max_len
+                    self.str_value = other.str_value
+            elif ix == INT:
+                self.int_min = min(self.int_min, other.int_min)
+                self.int_max = max(self.int_max, other.int_max)
+            elif ix == FLOAT:
+                self.float_min = min(self.float_min, other.float_min)
+                self.float_max = max(self.float_max, other.float_max)
+            elif ix == STR:
+                self.str_min_len = min(self.str_min_len, other.str_min_len)
+                if other.str_max_len >= self.str_max_len:
+                    self.str_max_len = other.str_max_len
+                    self.str_value = other.str_value
+
+            if ix == BOOL:
+                self.bool_value = other.bool_value
+            counts[ix] += other.counts[ix]
+
+        if other.other:
+            if self.other is None:
+                self.other = {}
+            for name, (count, value) in other.other.items():
+                prev_count = self.other.get(name, (0, None))[0]
+                self.other[name] = (prev_count + count, value)
+
+        if other.str_format is not None:
+            if self.str_format is None:
+                self.str_format = other.str_format.copy()
+            else:
+                self.str_format.merge(other.str_format)
+
+        return self
+
+    @property
+    def hist(self) -> Dict[str, int]:
+        """Count per dtype name, in order first seen."""
+
+        hist = {DTYPES[ix]: self.counts[ix] for ix in self.order}
+        if self.other:
+            hist.update((name, count) for name, (count, _) in self.other.items())
+        return hist
+
+    @property
+    def num_dtypes(self) -> int:
+        """Number of dtypes seen."""
+
+        return len(self.order) + len(self.other or ())
+
+    @property
+    def num_values(self) -> int:
+        """Number of non-null values seen."""
+
+        num_values = sum(self.counts)
+        if self.other:
+            num_values += sum(count for count, _ in self.other.values())
+        return num_values
+
+    @property
+    def dtype_max(self) -> Dict:
+        """Max value per dtype name."""
+
+        return {name: self._max_value(name) for name in self.hist}
 
     def push_warnings(self):
         """Detect and log mixed dtypes, int overflow."""
@@ -53,9 +217,10 @@ class Field:
         else:
             par_key = self.parent_key
 
-        if len(self.hist.keys()) > 1:
+        hist = self.hist
+        if len(hist.keys()) > 1:
             logger.warning(
-                f"[{par_key}] dtypes detected {', '.join(sorted(self.hist.keys()))}"
+                f"[{par_key}] dtypes detected {', '.join(sorted(hist.keys()))}"
             )
 
         for str_type, str_ref, num_max in zip(
@@ -63,10 +228,12 @@ class Field:
             ("BIGINT (2**64)", "FLOAT8 (2**(65 - 14)//2)"),
             (self._max_int, self._max_float),
         ):
-            if str_type in self.dtype_max and abs(self.dtype_max[str_type]) >= num_max:
-                logger.warning(
-                    f"[{par_key}] {str_type} exceeds max {str_ref}: {self.dtype_max[str_type]}"
-                )
+            if str_type in hist:
+                max_value = self._max_value(str_type)
+                if abs(max_value) >= num_max:
+                    logger.warning(
+                        f"[{par_key}] {str_type} exceeds max {str_ref}: {max_value}"
+                    )
 
     @property
     def dtype(self):
@@ -76,45 +243,51 @@ class Field:
         dtype is forced as str.
 
         If int and float have been seen, dtype defaults to float.
-        """
-
-        dtype = None
-        if self.hist:
-
-            if len(self.hist.keys()) == 1:
-                dtype = list(self.hist.keys())[0]
-            else:
-                numeric_intersect = self.numeric_types & self.hist.keys()
 
-                if numeric_intersect:
-                    if self.str_numeric_override and "str" in self.hist:
-                        dtype = "str"
-                    elif "float" in numeric_intersect:
-                        dtype = "float"
+        Rules are precomputed per set of dtypes seen, see DTYPE_RULES.
+        """
 
+        order = self.order
+        if self.other:
+            hist = self.hist
+            dtype = dtype_rule(hist, self.str_numeric_override)
             if not dtype:
-                dtype, _ = max(self.hist.items(), key=lambda t: t[1])
-
+                dtype, _ = max(hist.items(), key=lambda t: t[1])
+            return dtype
+        elif not order:
+            return None
+
+        mask = 0
+        for ix in order:
+            mask |= 1 << ix
+        dtype = DTYPE_RULES[self.str_numeric_override, mask]
+        if not dtype:
+            dtype = DTYPES[max(order, key=self.counts.__getitem__)]
         return dtype
 
-    def _get_max_comparable(self, prev_value, value, key_func):
-        """Get max value for inputs which can be compared."""
-
-        max_value = None
-        if prev_value is None:
-            max_value = value
-        else:
-            max_value = max(value, prev_value, key=key_func)
-        return max_value
-
-    def _compare_numeric(self, prev_value, value):
-        return self._get_max_comparable(prev_value, value, abs)
-
-    def _compare_str(self, prev_value, value):
-        return self._get_max_comparable(prev_value, value, len)
-
-    def _compare_other_types(self, prev_value, value):
-        return value
+    @staticmethod
+    def _max_abs(min_value, max_value):
+        # positive max wins ties, -2**15 fits SMALLINT, 2**15 does not
+        return min_value if abs(min_value) > abs(max_value) else max_value
+
+    def _max_value(self, dtype: str):
+        """Get max value seen for dtype: max abs numeric, longest str, last other."""
+
+        if dtype == "int":
+            return self._max_abs(self.int_min, self.int_max)
+        elif dtype == "float":
+            return self._max_abs(self.float_min, self.float_max)
+        elif dtype == "str":
+            if self.str_format is not None:
+                return self.str_format.typed(self.str_value)
+            return self.str_value
+        elif dtype == "bool":
+            return self.bool_value
+        elif dtype == "dict":
+            return {}
+        elif self.other and dtype in self.other:
+            return self.other[dtype][1]
+        return None
 
     @property
     def max_value(self):
@@ -123,37 +296,146 @@ class Field:
         _dtype = self.dtype
         is_numeric = _dtype in self.numeric_types
 
-        if is_numeric and self.numeric_types.issubset(self.hist.keys()):
-            val = self._compare_numeric(self.dtype_max["float"], self.dtype_max["int"])
-            return float(val)
+        if is_numeric and self.counts[INT] and self.counts[FLOAT]:
+            int_value, float_value = self._max_value("int"), self._max_value("float")
+            return float(
+                int_value if abs(int_value) >= abs(float_value) else float_value
+            )
 
-        return self.dtype_max.get(_dtype)
+        return self._max_value(_dtype)
 
-    def _update_dtype_max(self, incoming_dtype, value):
-        """Detect dtype change and store diffs."""
+    def _add_other(self, value) -> bool:
+        if self.other is None:
+            self.other = {}
 
-        if incoming_dtype in self.dtype_max:
-            prev_value = self.dtype_max[incoming_dtype]
+        name = type(value).__name__
+        count, _ = self.other.get(name, (0, None))
+        self.other[name] = (count + 1, value)
+        return not count
 
-            comp_func = None
-            if incoming_dtype == "str":
-                comp_func = self._compare_str
-            elif incoming_dtype in self.numeric_types:
-                comp_func = self._compare_numeric
-            else:
-                comp_func = self._compare_other_types
+    def add(self, value) -> bool:
+        """Add value to field and track dtype.
 
-            self.dtype_max[incoming_dtype] = comp_func(prev_value, value)
+        Returns: True if value is the first of its dtype
+        """
 
-        else:
-            self.dtype_max[incoming_dtype] = value
+        if value is None:
+            self.num_na += 1
+            return False
+
+        ix = DTYPE_IX.get(type(value))
+        if ix is None:
+            return self._add_other(value)
+
+        counts = self.counts
+        first = not counts[ix]
+        counts[ix] += 1
+
+        if first:
+            self.order.append(ix)
+
+        if ix == STR:
+            n = len(value)
+            if first:
+                self.str_min_len = n
+            elif n < self.str_min_len:
+                self.str_min_len = n
+
+            if n >= self.str_max_len:
+                self.str_max_len = n
+                self.str_value = (
+                    value if n <= STR_EXEMPLAR_LEN else value[:STR_EXEMPLAR_LEN]
+                )
 
-    def add(self, value):
-        """Add value to field and track dtype."""
+            if self.str_format is not None:
+                self.str_format.add(value)
+        elif ix == INT:
+            if first:
+                self.int_min = self.int_max = value
+            elif value < self.int_min:
+                self.int_min = value
+            elif value > self.int_max:
+                self.int_max = value
+        elif ix == FLOAT:
+            if first:
+                self.float_min = self.float_max = value
+            elif value < self.float_min:
+                self.float_min = value
+            elif value > self.float_max:
+                self.float_max = value
+        elif ix == BOOL:
+            self.bool_value = value
+
+        return first
+
+    def add_many(self, values: Sequence) -> bool:
+        """Add column of values in bulk, same result as adding one at a time.
+
+        Values are grouped by type in order first seen, numeric min / max are
+        reduced per group, see columns.min_max. Order within a column only matters
+        for last values (bool, other types) and ties of longest strings.
+
+        Returns: True if any value is the first of its dtype
+        """
 
-        if value is not None:
-            incoming_dtype = type(value).__name__
-            self._update_dtype_max(incoming_dtype, value)
-            self.hist[incoming_dtype] += 1
-        else:
-            self.num_na += 1
+        types = dict.fromkeys(map(type, values))
+        if len(types) == 1:
+            return self._add_typed(next(iter(types)), values)
+
+        first = False
+        for t in types:
+            first |= self._add_typed(t, [v for v in values if type(v) is t])
+        return first
+
+    def _add_typed(self, t: type, values: Sequence) -> bool:
+        if t is type(None):
+            self.num_na += len(values)
+            return False
+
+        ix = DTYPE_IX.get(t)
+        if ix is None:
+            first = False
+            for value in values:
+                first |= self._add_other(value)
+            return first
+
+        counts = self.counts
+        first = not counts[ix]
+        counts[ix] += len(values)
+
+        if first:
+            self.order.append(ix)
+
+        if ix == INT:
+            lo, hi = columns.min_max(values, int)
+            if first or lo < self.int_min:
+                self.int_min = lo
+            if first or hi > self.int_max:
+                self.int_max = hi
+        elif ix == FLOAT:
+            lo, hi = columns.min_max(values, float)
+            if first or lo < self.float_min:
+                self.float_min = lo
+            if first or hi > self.float_max:
+                self.float_max = hi
+        elif ix == STR:
+            lens = list(map(len, values))
+            n = min(lens)
+            if first or n < self.str_min_len:
+                self.str_min_len = n
+
+            n = max(lens)
+            if n >= self.str_max_len:
+                # last longest value, same as >= per value
+                value = values[len(lens) - 1 - lens[::-1].index(n)]
+                self.str_max_len = n
+                self.str_value = (
+                    value if n <= STR_EXEMPLAR_LEN else value[:STR_EXEMPLAR_LEN]
+                )
+
+            if self.str_format is not None:
+                self.str_format.add_many(values)
+        elif ix == BOOL:
+            self.bool_value = values[-1]
+
+        return first
@@ -2,65 +2,19 @@
 
 import logging
 
-from collections import defaultdict
-from itertools import chain
-from typing import AbstractSet, Dict, Generator, List, Optional, Tuple, Union
+import time
 
-from . import data_types
-from .Field import Field, add_hist_dicts
-from .merge import construct_branch, extract_terminal_keys
+from itertools import islice
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Union
 
-logger = logging.getLogger(__name__)
-
-# Mixed array group utils --------------------------------------------------------------
-
-
-def get_array_parents(field_key: Tuple[str]) -> Generator[Tuple[str], None, None]:
-    """Get all array parent keys."""
-
-    ix = 0
-    for _ in range(field_key.count("[array]")):
-        ix = field_key.index("[array]", ix)
-        yield field_key[:ix]
-        ix += 1
-
-
-def loc_siblings(
-    parent_key: Tuple[str], keys: List[Tuple[str]], is_array: Optional[bool] = None
-) -> List[Tuple[str]]:
-    """Locate Field keys which share a parent key."""
-
-    if is_array is not None:
-        if is_array:
-            comp = lambda k: k == "[array]"
-        else:
-            comp = lambda k: k != "[array]"
-    else:
-        comp = lambda k: True
-
-    res = []
-    num_parents = len(parent_key)
-    for k in keys:
-        if len(k) > num_parents:
-            if k[:num_parents] == parent_key and comp(k[num_parents]):
-                res.append(k)
-    return res
+from . import data_types, merge
+from .Field import Field
+from .parse_date import FormatCache
+from .merge import ArrayBudget, construct_branch, flatten
+from .paths import MAP_KEY, ROOT, PathMatcher, PathTable, PrunedIds
+from .traverse import walk
 
-
-def is_parent(parent_key: Tuple[str], key: Tuple[str]) -> bool:
-    """Determines if keys have parent:child relationship.
-
-    Example using dot notation:
-        is_parent(a.b, a.b.c) == True
-        is_parent(a.b, a.b.c.d) == True
-        is_parent(a.b, a.x.y) == False
-
-    """
-
-    return len(key) > len(parent_key) and key[: len(parent_key)] == parent_key
-
-
-# --------------------------------------------------------------------------------------
+logger = logging.getLogger(__name__)
 
 
 class MaxDict:
@@ -88,69 +42,795 @@ class MaxDict:
 
             Count of a.b.[array] = 20, count of a.b.c = 10.
             The output of MaxDict.asdict() will contain a.b.[array] and not a.b.c
+
+    High-cardinality keys:
+        If `map_threshold` is set, parents with more distinct child keys than the
+        threshold and a single value type (e.g. user IDs as keys) are collapsed into
+        one `[map]` child. Fields of all child keys are merged, new keys are added to
+        the map Field instead of creating new Fields.
+
+            terminal keys:
+                - a.u1 = 1
+                - a.u2 = 2
+                - ...
+
+            Collapsed to a.[map] = 2, see ddl for map<string, T>.
     """
 
+    # max number of document shapes (top level keys) cached
+    max_shapes = 1024
+
+    # shape cache misses before it is disabled if misses exceed hits
+    max_shape_misses = 256
+
+    # documents loaded between deadline checks
+    deadline_interval = 64
+
+    # estimated memory per Field in bytes, incl. spill bookkeeping, see max_memory
+    field_bytes = 440
+
+    # estimated memory per interned path in bytes, incl. per path flags, paths are
+    # never spilled, see max_memory
+    path_bytes = 180
+
+    # Fields kept in memory after spilling, share of max_memory
+    spill_ratio = 0.5
+
     def __init__(
-        self, case_insensitive: bool = False, str_numeric_override: bool = False
+        self,
+        case_insensitive: bool = False,
+        str_numeric_override: bool = False,
+        shape_cache: bool = True,
+        patience: Optional[int] = None,
+        deadline: Optional[float] = None,
+        array_budget: Optional[Tuple[int, int]] = None,
+        ignore_fields: Optional[List[str]] = None,
+        include_fields: Optional[List[str]] = None,
+        map_threshold: Optional[int] = None,
+        max_memory: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        infer_date: bool = False,
+        date_fallback: bool = False,
+        batch_size: Optional[int] = None,
     ):
+        """
+        Kwargs:
+            batch_size (int):
+                - default: None
+                - load documents in columnar batches of N, see load_batch, requires
+                  shape cache
+            infer_date, date_fallback (bool):
+                - default: False
+                - learn date format of string values per Field, see
+                  parse_date.FormatCache
+            max_memory (int):
+                - default: None
+                - memory budget of Fields and interned paths in bytes, cold Fields
+                  are spilled to a temporary sqlite store in spill_dir, see
+                  spill.SpillStore. Paths are kept in memory, the budget is exceeded
+                  if paths alone use more than `1 - spill_ratio` of it
+            map_threshold (int):
+                - default: None
+                - collapse parents with more distinct child keys of one value type
+                  into a map, see paths.MAP_KEY
+            ignore_fields, include_fields (List[str]):
+                - default: None
+                - key path rules, pruned subtrees are not visited, see
+                  paths.PathMatcher, disables shape cache
+            array_budget (Tuple[int, int]):
+                - default: None
+                - (head, sample) elements visited per array, see merge.ArrayBudget,
+                  disables shape cache
+            patience (int):
+                - default: None
+                - stop loading after N consecutive documents without new keys or
+                  dtypes
+            deadline (float):
+                - default: None
+                - stop loading after timestamp, see time.time
+        """
+
         self.case_insensitive = case_insensitive
         self.str_numeric_override = str_numeric_override
-        self.hist = defaultdict(int)
-        self.key_store = {}
+        self.infer_date = infer_date
+        self.date_fallback = date_fallback
+        self.paths = PathTable(case_insensitive=case_insensitive)
+        self.field_ids = [None]  # Field per path ID, None for non-terminal paths
         self.override_keys = None
 
+        self.array_budget = array_budget
+        self.skipped_ids = {}  # array elements skipped per path ID
+        self._budget = None
+        if array_budget:
+            self._budget = ArrayBudget(*array_budget, skipped=self.skipped_ids)
+
+        self.ignore_fields = ignore_fields
+        self.include_fields = include_fields
+        matcher = PathMatcher(ignore_fields, include_fields, case_insensitive)
+        self._pruned = PrunedIds(self.paths, matcher) if matcher else None
+
+        self.map_threshold = map_threshold
+        self._map_candidates = set()  # parent IDs above threshold
+        self._map_rejected = set()  # parent IDs with mixed value types
+
+        # spill
+        self.max_memory = max_memory
+        self.spill_dir = spill_dir
+        self._spill = None
+        self._spilled = bytearray()  # 1 per spilled path ID
+        self._num_fields = 0  # in memory, upper bound between spills
+        self._touched = {}  # values per path ID at last spill, unchanged are cold
+        self._over_budget = False  # paths exceed max_memory, logged once
+
+        self.shape_cache = shape_cache and not (array_budget or matcher)
+        self.batch_size = batch_size
+        self.clear_shapes()
+
+        # convergence
+        self.patience = patience
+        self.deadline = deadline
+        self.num_docs = 0
+        self.last_change = 0  # document number of last new key or dtype
+        self.stop_reason = None
+        self._num_changes = 0
+
+    @property
+    def key_store(self) -> Dict[Tuple[str], Field]:
+        """Fields keyed by path tuple."""
+
+        return dict(self.items())
+
+    def items(self) -> Generator[Tuple[Tuple[str], Field], None, None]:
+        """Yield (path tuple, Field) pairs, spilled Fields are merged back."""
+
+        path = self.paths.path
+        for path_id, field in self.iter_fields():
+            yield path(path_id), field
+
+    def iter_fields(
+        self, path_ids: Optional[Iterable[int]] = None
+    ) -> Generator[Tuple[int, Field], None, None]:
+        """Yield (path ID, Field) pairs in path ID order or order of path_ids.
+
+        Spilled partials are merged with the in-memory Field into a new Field per
+        path, one path at a time, see max_memory.
+        """
+
+        field_ids = self.field_ids
+        if self._spill is None and path_ids is None:
+            for path_id, field in enumerate(field_ids):
+                if field is not None:
+                    yield path_id, field
+            return
+
+        if path_ids is None:
+            path_ids = range(1, len(self.paths))
+
+        spilled = self._spilled
+        for path_id in path_ids:
+            field = field_ids[path_id] if path_id < len(field_ids) else None
+            if path_id < len(spilled) and spilled[path_id]:
+                field = self._unspill(path_id, field)
+            if field is not None:
+                yield path_id, field
+
+    @property
+    def hist(self) -> Dict:
+        """Number of values seen per key."""
+
+        return {key: field.num_values + field.num_na for key, field in self.items()}
+
+    def set_field(self, key: Tuple[str], field: Field):
+        """Store Field for key, replacing existing Field."""
+
+        path_id = self.paths.intern(key)
+        if path_id >= len(self.field_ids):
+            self.field_ids.extend([None] * (len(self.paths) - len(self.field_ids)))
+        self.field_ids[path_id] = field
+        self.clear_shapes()
+
+    # Shape cache ----------------------------------------------------------------------
+
+    def clear_shapes(self):
+        """Reset document shape cache, required if key_store Fields are replaced."""
+
+        self._shapes = {} if self.shape_cache else None
+        self._shape_hits = 0
+        self._shape_misses = 0
+
+    def _shape_slots(self, d: Dict, shape: Tuple) -> List[List]:
+        """[path ID, Field] per top level key, empty if document is mostly nested.
+
+        Nested values are walked, documents with more nested than scalar values are
+        walked as a whole, which is cheaper.
+        """
+
+        container_types = merge.CONTAINER_TYPES
+        num_nested = sum(isinstance(v, container_types) for v in d.values())
+        if num_nested * 2 > len(shape):
+            return []
+
+        child = self.paths.child
+        return [[child(ROOT, key), None] for key in shape]
+
+    def _cache_shape(self, shape: Tuple, slots: List[List]):
+        if len(self._shapes) < self.max_shapes:
+            self._shapes[shape] = slots
+
+        # disable cache for heterogeneous input
+        self._shape_misses += 1
+        if self._shape_misses > max(self._shape_hits, self.max_shape_misses):
+            logger.debug(f"Disabling shape cache, {len(self._shapes):,} shapes seen")
+            self._shapes = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shapes"] = None
+        if self._spill is not None:
+            state["_spill"] = list(self._spill.rows())
+        return state
+
+    def __setstate__(self, state):
+        rows = state.pop("_spill", None)
+        self.__dict__.update(state)
+        self._spill = None
+        if rows:
+            self._spill_store().put_rows(rows)
+        self.clear_shapes()
+
+    # ----------------------------------------------------------------------------------
+
     def __add__(self, other):
         str_numeric_override = any(
             (self.str_numeric_override, other.str_numeric_override)
         )
-        md = MaxDict(str_numeric_override=str_numeric_override)
-        md.hist.update(add_hist_dicts(self.hist, other.hist))
+        md = MaxDict(
+            case_insensitive=self.case_insensitive or other.case_insensitive,
+            str_numeric_override=str_numeric_override,
+        )
+        return md.merge(self, copy=True).merge(other, copy=True)
+
+    def merge(self, other, copy: bool = False):
+        """Merge other MaxDict in place, other is treated as newer.
+
+        Fields for paths only seen by other are adopted as is, `other` must not be
+        used afterwards unless `copy` is enabled.
+
+        Returns: self
+        """
+
+        self.str_numeric_override = (
+            self.str_numeric_override or other.str_numeric_override
+        )
+        num_docs = self.num_docs
+        self.num_docs += other.num_docs
+        self.stop_reason = self.stop_reason or other.stop_reason
+        changed = False  # other adds new keys or dtypes
+
+        table, other_table = self.paths, other.paths
+        child, path = table.child, table.path
+        field_ids, other_field_ids = self.field_ids, other.field_ids
+
+        # map other path IDs to own IDs, parent IDs always precede child IDs
+        id_map = [0] * len(other_table)
+        for other_id in range(1, len(other_table)):
+            other_parent_id = other_table.parents[other_id]
+            parent_id = id_map[other_parent_id]
+            if (
+                other_table.map_ids.get(other_parent_id) == other_id
+                and parent_id not in table.map_ids
+            ):
+                self._collapse(parent_id)
+
+            path_id = child(parent_id, other_table.names[other_id])
+            id_map[other_id] = path_id
+
+            if other_id >= len(other_field_ids):
+                continue
 
-        for key in self.key_store.keys() & other.key_store.keys():
-            md.key_store[key] = self.key_store[key] + other.key_store[key]
+            other_field = other_field_ids[other_id]
+            if other_field is None:
+                continue
+
+            if path_id >= len(field_ids):
+                field_ids.extend([None] * (len(table) - len(field_ids)))
 
-        for key in self.key_store.keys() ^ other.key_store.keys():
-            if key in self.key_store:
-                field = self.key_store[key]
+            field = field_ids[path_id]
+            if field is not None:
+                num_dtypes = field.num_dtypes
+                field.merge(other_field)
+                changed = changed or field.num_dtypes != num_dtypes
             else:
-                field = other.key_store[key]
+                changed = changed or not self._is_spilled(path_id)
+                field = other_field.copy() if copy else other_field
+                field.parent_key = path(path_id)
+                field_ids[path_id] = field
+                self._num_fields += 1
+                if self.map_threshold:
+                    self._check_map_parents(path_id)
+
+        for other_id, n in other.skipped_ids.items():
+            path_id = id_map[other_id]
+            self.skipped_ids[path_id] = self.skipped_ids.get(path_id, 0) + n
+
+        # spilled partials of other are copied without loading
+        if other._spill is not None:
+            rows = ((id_map[i], n, data) for i, n, data in other._spill.rows())
+            self._spill_store().put_rows(rows)
+            for other_id in other._spill.num_values():
+                path_id = id_map[other_id]
+                changed = changed or not (
+                    self._is_spilled(path_id)
+                    or path_id < len(field_ids)
+                    and field_ids[path_id] is not None
+                )
+                self._set_spilled(path_id)
+
+        # documents of other follow own documents, last change of other is an upper
+        # bound if keys or dtypes of other are new
+        if changed and other.last_change:
+            self.last_change = num_docs + other.last_change
+
+        self._collapse_maps()
+        self._spill_cold()
+        return self
 
-            md.key_store[key] = field + Field(key)  # coerce new instance
+    @classmethod
+    def merge_all(cls, partials: List["MaxDict"]) -> "MaxDict":
+        """Merge partials in order into the first partial, which is returned."""
 
+        if not partials:
+            raise ValueError("No partials to merge...")
+
+        md = partials[0]
+        for other in partials[1:]:
+            md.merge(other)
         return md
 
-    def add(self, key: Union[str, Tuple[str]], value):
+    def add_id(self, path_id: int, value) -> Field:
+        """Add value to Field of interned path ID."""
+
+        field_ids = self.field_ids
+        if path_id < len(field_ids):
+            field = field_ids[path_id]
+            if field is not None:
+                if field.add(value):
+                    self._num_changes += 1
+                return field
+        else:
+            field_ids.extend([None] * (len(self.paths) - len(field_ids)))
+
+        field = Field(
+            self.paths.path(path_id),
+            value,
+            str_numeric_override=self.str_numeric_override,
+            str_format=FormatCache(self.date_fallback) if self.infer_date else None,
+        )
+        field_ids[path_id] = field
+        self._num_fields += 1
+        if not self._is_spilled(path_id):
+            self._num_changes += 1
+        if self.map_threshold:
+            self._check_map_parents(path_id)
+        return field
+
+    def add(self, key: Union[str, Tuple[str]], value) -> Field:
+
+        if isinstance(key, str):
+            key = (key,)
+        field = self.add_id(self.paths.intern(key), value)
+        self._collapse_maps()
+        self._spill_cold()
+        return field
+
+    def load_dict(self, d: Dict):
+        """Add terminal keys of document.
 
-        if self.case_insensitive:
-            if isinstance(key, str):
-                key = key.lower()
+        Keys are resolved to interned path IDs while traversing, see traverse.walk.
+        Documents are also cached by shape (tuple of top level keys): for known
+        shapes, path IDs of top level keys are not looked up and scalar values are
+        pushed directly into cached Fields, nested values are walked.
+        """
+
+        add_id = self.add_id
+        num_changes = self._num_changes
+        shapes = self._shapes
+
+        slots = None
+        if shapes is not None and type(d) is dict:
+            shape = tuple(d)
+            slots = shapes.get(shape)
+            if slots is None:
+                slots = self._shape_slots(d, shape)
+                self._cache_shape(shape, slots)
             else:
-                key = tuple(map(str.lower, key))
+                self._shape_hits += 1
 
-        self.hist[key] += 1
-        if key in self.key_store:
-            self.key_store[key].add(value)
+        if not slots:
+            walk(d, self.paths, add_id, budget=self._budget, pruned=self._pruned)
         else:
-            self.key_store[key] = Field(
-                key, value, str_numeric_override=self.str_numeric_override
-            )
+            # slot: [path ID, Field of scalar values], nested values are walked once
+            nested = None
+            container_types = merge.CONTAINER_TYPES
+            for key, slot, value in zip(shape, slots, d.values()):
+                if isinstance(value, container_types):
+                    if nested is None:
+                        nested = {}
+                    nested[key] = value
+                elif slot[1] is None:
+                    slot[1] = add_id(slot[0], value)
+                elif slot[1].add(value):
+                    self._num_changes += 1
+
+            if nested is not None:
+                walk(nested, self.paths, add_id)
+
+        # collapse and spill after traversal, Fields may be referenced while walking
+        self._collapse_maps()
+        self._spill_cold()
+        self._update_convergence(num_changes)
+
+    def load_batch(self, docs: List[Dict]):
+        """Add terminal keys of documents as columns.
+
+        Documents are grouped by shape (see merge.flatten), values are transposed
+        into one column per path ID and added in bulk, see Field.add_many. Results
+        match load_dict, except for the order of documents across shapes which only
+        affects last values (bool, ties of longest strings). Convergence and map
+        parents are checked per batch.
+        """
 
-    def load_dict(self, d: Dict):
-        for key, value in extract_terminal_keys(d):
-            self.add(key, value)
+        if not self.shape_cache:
+            for d in docs:
+                self.load_dict(d)
+            return
+
+        num_changes = self._num_changes
+
+        groups = {}  # shape: (path IDs, rows of values)
+        nested = []
+        for d in docs:
+            values = []
+            try:
+                shape = flatten(d, values)
+            except RecursionError:
+                nested.append(d)
+                continue
+
+            group = groups.get(shape)
+            if group is None:
+                path_ids = []
+                walk(d, self.paths, lambda i, _: path_ids.append(i))
+                group = groups[shape] = (path_ids, [])
+            group[1].append(values)
+
+        for path_ids, rows in groups.values():
+            for path_id, column in zip(path_ids, zip(*rows)):
+                self._add_column(path_id, column)
+
+        self._collapse_maps()
+        self._spill_cold()
+        self._update_convergence(num_changes, len(docs) - len(nested))
+
+        if nested:
+            logger.debug(f"Skipping batch for {len(nested):,} deeply nested documents")
+            for d in nested:
+                self.load_dict(d)
+
+    def _add_column(self, path_id: int, column: Tuple):
+        field_ids = self.field_ids
+        field = field_ids[path_id] if path_id < len(field_ids) else None
+        if field is None:
+            field = self.add_id(path_id, column[0])
+            column = column[1:]
+
+        if column and field.add_many(column):
+            self._num_changes += 1
+
+    def _update_convergence(self, num_changes: int, num_docs: int = 1):
+        """Count loaded documents, stop early once converged."""
+
+        prev_docs = self.num_docs
+        self.num_docs += num_docs
+        if self._num_changes != num_changes:
+            self.last_change = self.num_docs
+        elif self.patience and self.num_docs - self.last_change >= self.patience:
+            self._stop("patience")
+
+        interval = self.deadline_interval
+        if (
+            self.deadline
+            and self.num_docs // interval != prev_docs // interval
+            and time.time() >= self.deadline
+        ):
+            self._stop("deadline")
+
+    def batch_load_dicts(self, items: Iterable[Dict]):
+        """Load dicts one at a time or in batches, accepts any iterable incl.
+        generators, see batch_size.
+
+        Loading stops early once converged, see patience and deadline.
+        """
+
+        if self.stop_reason:
+            return
+
+        if self.batch_size:
+            items = iter(items)
+            while not self.stop_reason:
+                batch = list(islice(items, self.batch_size))
+                if not batch:
+                    break
+                self.load_batch(batch)
+            return
 
-    def batch_load_dicts(self, items: List[Dict]):
         for d in items:
             self.load_dict(d)
+            if self.stop_reason:
+                break
+
+    # high-cardinality keys -------------------------------------------------------------
+
+    def _check_map_parents(self, path_id: int):
+        """Flag ancestors of new Field with more child keys than map_threshold."""
+
+        table = self.paths
+        parents, num_children, map_ids = table.parents, table.num_children, table.map_ids
+
+        parent_id = parents[path_id]
+        while parent_id > ROOT:
+            if (
+                num_children[parent_id] > self.map_threshold
+                and parent_id not in map_ids
+                and parent_id not in self._map_rejected
+            ):
+                self._map_candidates.add(parent_id)
+            parent_id = parents[parent_id]
+
+    def _value_kinds(self, parent_id: int) -> set:
+        """Value types of child keys: dtype, numeric, struct or array."""
+
+        table = self.paths
+        field_ids = self.field_ids
+
+        kinds = set()
+        for child_id in table.child_ids(parent_id):
+            if table.is_array[child_id]:
+                kinds.add("[array] key")
+                continue
+
+            field = field_ids[child_id] if child_id < len(field_ids) else None
+            dtype = field.dtype if field is not None else None
+            if dtype == "dict":
+                kinds.add("struct")
+            elif dtype in Field.numeric_types:
+                kinds.add("numeric")
+            elif dtype:
+                kinds.add(dtype)
+
+            for grandchild_id in table.child_ids(child_id):
+                kinds.add("array" if table.is_array[grandchild_id] else "struct")
+
+        return kinds
+
+    def _collapse_maps(self):
+        """Collapse flagged parents with a single value type, see map_threshold."""
+
+        if not self._map_candidates:
+            return
+
+        candidates, self._map_candidates = self._map_candidates, set()
+        path = self.paths.path
+
+        detached = set()
+        for parent_id in sorted(candidates):
+            # parent IDs precede child IDs, nested candidates move with ancestors
+            if parent_id in detached:
+                continue
+
+            kinds = self._value_kinds(parent_id)
+            if len(kinds) > 1:
+                self._map_rejected.add(parent_id)
+                logger.debug(
+                    f"[{'.'.join(path(parent_id))}] Not a map, value types: "
+                    f"{', '.join(sorted(kinds))}"
+                )
+            elif kinds:
+                detached.update(self._collapse(parent_id))
+
+    def _collapse(self, parent_id: int) -> List[int]:
+        """Move subtrees of child keys below `[map]` child and merge their Fields.
+
+        Returns: detached path IDs
+        """
+
+        table = self.paths
+        child, names = table.child, table.names
+
+        child_ids = table.child_ids(parent_id)
+        map_id = table.set_map(parent_id)
+
+        detached = []
+        stack = [(child_id, map_id) for child_id in reversed(child_ids)]
+        while stack:
+            old_id, new_id = stack.pop()
+            detached.append(old_id)
+            self._move_field(old_id, new_id)
+            stack.extend(
+                (grandchild_id, child(new_id, names[grandchild_id]))
+                for grandchild_id in reversed(table.child_ids(old_id))
+            )
+
+        logger.info(
+            f"[{'.'.join(table.path(parent_id))}] Collapsed {len(child_ids):,} keys "
+            f"into {MAP_KEY}"
+        )
+        self.clear_shapes()
+        return detached
+
+    def _move_field(self, old_id: int, new_id: int):
+        field_ids = self.field_ids
+        if new_id >= len(field_ids):
+            field_ids.extend([None] * (len(self.paths) - len(field_ids)))
+
+        n = self.skipped_ids.pop(old_id, None)
+        if n:
+            self.skipped_ids[new_id] = self.skipped_ids.get(new_id, 0) + n
+
+        if self._is_spilled(old_id):
+            self._spill.move(old_id, new_id)
+            self._set_spilled(new_id)
+            self._spilled[old_id] = 0
+
+        field = field_ids[old_id] if old_id < len(field_ids) else None
+        if field is None:
+            return
+
+        field_ids[old_id] = None
+        target = field_ids[new_id]
+        if target is None:
+            field.parent_key = self.paths.path(new_id)
+            field_ids[new_id] = field
+        else:
+            target.merge(field)
+
+    # spill ----------------------------------------------------------------------------
+
+    @property
+    def memory_usage(self) -> int:
+        """Estimated memory of in-memory Fields and paths in bytes, see field_bytes
+        and path_bytes."""
+
+        num_fields = sum(field is not None for field in self.field_ids)
+        return num_fields * self.field_bytes + len(self.paths) * self.path_bytes
+
+    def _field_budget(self) -> int:
+        """Share of max_memory left for Fields, at least spill_ratio of max_memory."""
+
+        max_memory = self.max_memory
+        path_memory = len(self.paths) * self.path_bytes
+        min_budget = int(max_memory * self.spill_ratio)
+        if max_memory - path_memory >= min_budget:
+            return max_memory - path_memory
+
+        if not self._over_budget:
+            self._over_budget = True
+            logger.warning(
+                f"Memory budget may be exceeded, {len(self.paths):,} key paths use "
+                f"~{path_memory / 2 ** 20:,.1f} MB and are kept in memory"
+            )
+        return min_budget
+
+    def _is_spilled(self, path_id: int) -> bool:
+        return path_id < len(self._spilled) and bool(self._spilled[path_id])
+
+    def _set_spilled(self, path_id: int):
+        spilled = self._spilled
+        if path_id >= len(spilled):
+            spilled.extend(bytes(len(self.paths) - len(spilled)))
+        spilled[path_id] = 1
+
+    def _spill_store(self):
+        if self._spill is None:
+            from .spill import SpillStore
+
+            self._spill = SpillStore(self.spill_dir)
+        return self._spill
+
+    def _spill_cold(self):
+        """Spill Fields to disk while over max_memory, cold Fields first.
+
+        Fields without new values since the last spill are cold, followed by Fields
+        with the fewest values. Fields are spilled until spill_ratio of the budget
+        left for Fields after interned paths.
+        """
+
+        if not self.max_memory:
+            return
+        max_memory = self._field_budget()
+        if self._num_fields * self.field_bytes <= max_memory:
+            return
+
+        field_ids = self.field_ids
+        items = [(i, field) for i, field in enumerate(field_ids) if field is not None]
+        self._num_fields = len(items)
+        if len(items) * self.field_bytes <= max_memory:
+            return
+
+        touched = self._touched
+
+        def heat(item):
+            path_id, field = item
+            n = field.num_values + field.num_na
+            return n != touched.get(path_id, -1), n
+
+        items.sort(key=heat)
+        keep = int(max_memory * self.spill_ratio) // self.field_bytes
+        cold, hot = items[: len(items) - keep], items[len(items) - keep :]
+
+        self._spill_store().put(cold)
+        for path_id, _ in cold:
+            field_ids[path_id] = None
+            self._set_spilled(path_id)
+
+        self._num_fields = len(hot)
+        self._touched = {i: field.num_values + field.num_na for i, field in hot}
+        self.clear_shapes()
+
+        logger.debug(
+            f"Spilled {len(cold):,} Fields, {len(hot):,} in memory, "
+            f"{len(self._spill):,} partials on disk"
+        )
+
+    def _unspill(self, path_id: int, field: Optional[Field]) -> Field:
+        """Merge spilled partials and in-memory Field (newest) into a new Field."""
+
+        key = self.paths.path(path_id)
+        merged = Field(key, str_numeric_override=self.str_numeric_override)
+        merged.num_na = 0
+        for partial in self._spill.get(path_id, key):
+            merged.merge(partial)
+        if field is not None:
+            merged.merge(field)
+        return merged
+
+    # convergence ----------------------------------------------------------------------
+
+    def _stop(self, reason: str):
+        if not self.stop_reason:
+            self.stop_reason = reason
+            logger.info(f"Stopping early ({reason}): {self.convergence}")
+
+    @property
+    def convergence(self) -> Dict:
+        """Documents loaded, document number of last new key or dtype, stop reason.
+
+        For merged MaxDicts, documents are summed and partials are numbered in merge
+        order. The last change of a partial is kept if it adds keys or dtypes.
+        """
+
+        return {
+            "num_docs": self.num_docs,
+            "last_change": self.last_change,
+            "stop_reason": self.stop_reason,
+        }
+
+    @property
+    def skipped_elements(self) -> Dict[Tuple[str], int]:
+        """Array elements skipped per array key, see array_budget."""
+
+        return {self.paths.path(i): n for i, n in self.skipped_ids.items()}
+
+    # ----------------------------------------------------------------------------------
 
     def fields(self):
-        yield from self.key_store.values()
+        yield from (field for _, field in self.iter_fields())
 
     def fields_seen(self) -> Tuple[int, int]:
         tot = 0
         tot_na = 0
         for field in self.fields():
-            tot += sum(field.hist.values())
+            tot += field.num_values
             tot_na += field.num_na
         return tot, tot_na
 
@@ -166,8 +846,17 @@ class MaxDict:
 
         self.load_override_keys()
 
+        for key, n in self.skipped_elements.items():
+            logger.warning(f"[{'.'.join(key)}] Skipped {n:,} array elements")
+
+        # spilled Fields are merged back one at a time, in key order
+        path = self.paths.path
+        path_ids = [i for i, n in enumerate(self._value_counts()) if n is not None]
+        path_ids.sort(key=path)
+
         d, loc = {}, {}
-        for group_key, field in sorted(self.key_store.items(), key=lambda t: t[0]):
+        for path_id, field in self.iter_fields(path_ids):
+            group_key = path(path_id)
 
             if group_key in self.override_keys:
                 continue
@@ -195,115 +884,112 @@ class MaxDict:
 
     # detect mixed terminal, array - dict keys -----------------------------------------
 
-    def sum_key_groups(self, parent_key: Tuple[str]) -> Dict:
-        """Sums Field value counts in array, non-array branch groups."""
-
-        key_groups = {
-            "array": {"keys": [], "total": 0},
-            "non_array": {"keys": [], "total": 0},
-        }
+    def _value_counts(self) -> List[Optional[int]]:
+        """Non-null values per path ID incl. spilled partials, None without Field."""
 
-        par_ix = len(parent_key)
-        for key, field in self.key_store.items():
-            if is_parent(parent_key, key):
-                count = sum(field.hist.values())
+        counts = [None] * len(self.paths)
+        for path_id, field in enumerate(self.field_ids):
+            if field is not None:
+                counts[path_id] = field.num_values
 
-                if key[par_ix] == "[array]":
-                    group_ref = key_groups["array"]
-                else:
-                    group_ref = key_groups["non_array"]
+        if self._spill is not None:
+            for path_id, n in self._spill.num_values().items():
+                counts[path_id] = (counts[path_id] or 0) + n
+        return counts
 
-                group_ref["total"] += count
-                group_ref["keys"].append(key)
+    def _subtree_ids(
+        self, path_id: int, counts: List[Optional[int]]
+    ) -> Generator[int, None, None]:
+        """Yield path ID and all descendant IDs which have a Field."""
 
-        return key_groups
+        child_ids = self.paths.child_ids
 
-    def detect_mixed_array_parents(
-        self, keys: List[Tuple[str]]
-    ) -> AbstractSet[Tuple[str]]:
-        """Detect parent keys which have array and non-array children.
+        stack = [path_id]
+        while stack:
+            path_id = stack.pop()
+            if counts[path_id] is not None:
+                yield path_id
+            stack.extend(child_ids(path_id))
 
-        Example using dot notation:
-
-            terminal keys:
-                - a.b.[array].d
-                - a.b.c.d
-            mixed array parent:
-                - a.b
-        """
-
-        array_keys = [k for k in keys if "[array]" in k]
-        array_parents = sorted(
-            set(chain(*map(get_array_parents, array_keys))), key=lambda t: len(t)
-        )
-
-        mixed_array_parents = set()
-        for parent_key in array_parents:
-            non_array_siblings = loc_siblings(parent_key, keys, is_array=False)
-            if non_array_siblings:
-                mixed_array_parents.add(parent_key)
+    def load_override_keys(self):
+        """Inspect mixed array groups and select group with highest count.
 
-        return mixed_array_parents
+        Terminal keys which are also parent keys are overridden by their children.
 
-    def detect_mixed_terminal_keys(self, keys: List[Tuple[str]]) -> List[Tuple[str]]:
-        """Detect terminal keys which are also parent keys.
+        If counts are equal, array keys take precedence and non-array keys are ignored
+        when constructing dict.
 
-        Example using dot notation:
-            - a.b (added to override_keysride)
-            - a.b.c
+        Per path counts are accumulated bottom up over the path trie, child IDs are
+        always greater than their parent ID so a single reverse pass is required.
         """
 
-        max_num_keys = max(len(k) for k in keys)
-        mixed_terminal_keys = []
-
-        for parent_key in (k for k in keys if len(k) < max_num_keys):
-            parent_key_len = len(parent_key)
-            for child_key in (k for k in keys if len(k) > parent_key_len):
-                if is_parent(parent_key, child_key):
-                    mixed_terminal_keys.append(parent_key)
-                    break
+        table = self.paths
+        parents, is_array = table.parents, table.is_array
+        num_ids = len(table)
+        counts = self._value_counts()
+
+        num_desc = [0] * num_ids  # Fields strictly below path
+        num_kept = [0] * num_ids  # Fields at or below path, excl. mixed terminal keys
+        num_vals = [0] * num_ids  # non-null values at or below path
+
+        mixed_terminal_ids = []
+        for path_id in range(num_ids - 1, 0, -1):
+            n = counts[path_id]
+            if n is not None:
+                num_vals[path_id] += n
+                if num_desc[path_id]:
+                    mixed_terminal_ids.append(path_id)
+                else:
+                    num_kept[path_id] += 1
 
-        return sorted(mixed_terminal_keys, key=lambda t: len(t))
+            parent_id = parents[path_id]
+            num_desc[parent_id] += num_desc[path_id] + (n is not None)
+            num_kept[parent_id] += num_kept[path_id]
+            num_vals[parent_id] += num_vals[path_id]
 
-    def load_override_keys(self):
-        """Inspect mixed array groups and select group with highest count.
+        override_ids = set(mixed_terminal_ids)
 
-        If counts are equal, array keys take precedence and non-array keys are ignored
-        when constructing dict.
-        """
+        path = table.path
+        for path_id in sorted(
+            mixed_terminal_ids, key=lambda i: (len(path(i)), path(i))
+        ):
+            logger.warning(f"Terminal key detected: {'.'.join(path(path_id))}")
 
-        self.override_keys = []
-        keys = sorted(self.key_store.keys(), key=lambda t: len(t))
-        mixed_terminal_keys = self.detect_mixed_terminal_keys(keys)
-
-        if mixed_terminal_keys:
-            self.override_keys.extend(mixed_terminal_keys)
+        # detect parent keys which have array and non-array children
+        mixed_array_parents = []
+        for array_id in range(1, num_ids):
+            if not (is_array[array_id] and num_kept[array_id]):
+                continue
 
-            # filter terminal keys before detecting mixed array keys
-            keys = [k for k in keys if k not in mixed_terminal_keys]
+            parent_id = parents[array_id]
+            if any(
+                num_kept[child_id]
+                for child_id in table.child_ids(parent_id)
+                if child_id != array_id
+            ):
+                mixed_array_parents.append((parent_id, array_id))
 
-            for terminal_key in mixed_terminal_keys:
-                logger.warning(f"Terminal key detected: {'.'.join(terminal_key)}")
+        mixed_array_parents.sort(key=lambda t: (len(path(t[0])), path(t[0])))
 
-        mixed_array_parents = self.detect_mixed_array_parents(keys)
-        for parent_key in sorted(mixed_array_parents, key=lambda t: len(t)):
-            key_groups = self.sum_key_groups(parent_key)
+        for parent_id, array_id in mixed_array_parents:
+            non_array_ids = [i for i in table.child_ids(parent_id) if i != array_id]
 
-            pk_ref = ".".join(parent_key)
-            num_array = key_groups["array"]["total"]
-            num_non_array = key_groups["non_array"]["total"]
+            num_array = num_vals[array_id]
+            num_non_array = sum(num_vals[i] for i in non_array_ids)
+            pk_ref = ".".join(path(parent_id))
 
             if num_array >= num_non_array:
-                self.override_keys.extend(key_groups["non_array"]["keys"])
+                for child_id in non_array_ids:
+                    override_ids.update(self._subtree_ids(child_id, counts))
 
                 logger.warning(
                     f"Array keys override non-arrays: {num_array:,} >= {num_non_array:,} : {pk_ref}"
                 )
             else:
-                self.override_keys.extend(key_groups["array"]["keys"])
+                override_ids.update(self._subtree_ids(array_id, counts))
 
                 logger.warning(
                     f"Non-Array keys override arrays: {num_non_array:,} >= {num_array:,} : {pk_ref}"
                 )
 
-        self.override_keys = set(self.override_keys)
+        self.override_keys = set(map(path, override_ids))
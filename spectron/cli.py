@@ -3,9 +3,11 @@
 import argparse
 import io
 import logging
+import time
 
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple, Union
 
 try:
     import ujson as json
@@ -14,6 +16,9 @@ except ImportError:
 
 from . import __version__ as version
 from . import ddl
+from . import parsers
+from . import read_json
+from . import sample as sampling
 from .MaxDict import MaxDict
 
 
@@ -34,6 +39,25 @@ def str_list_type(input):
     return val
 
 
+def infile_type(input: str) -> str:
+    if input != "-" and not Path(input).is_file():
+        raise argparse.ArgumentTypeError(f"can't open '{input}': file not found")
+    return input
+
+
+def array_budget_type(input: str) -> Tuple[int, int]:
+    try:
+        budget = tuple(int(s) for s in input.split(","))
+    except ValueError:
+        budget = ()
+
+    if len(budget) == 1:
+        budget = (budget[0], 0)
+    if len(budget) != 2 or min(budget) < 0:
+        raise argparse.ArgumentTypeError(f"invalid array budget: '{input}'")
+    return budget
+
+
 def json_type(input: str):
     d = json.loads(Path(input))
     return tuple(d.items())
@@ -55,7 +79,7 @@ def parse_arguments():
 
     parser.add_argument(
         dest="infile",
-        type=argparse.FileType("r"),
+        type=infile_type,
         nargs="+",
         help="JSON file(s) to convert",
     )
@@ -92,6 +116,13 @@ def parse_arguments():
         help="infer date string types - supports ISO 8601 for date, datetime[TZ]",
     )
 
+    parser.add_argument(
+        "--date_fallback",
+        action="store_true",
+        dest="date_fallback",
+        help="with -d, parse date strings which are not ISO 8601 via pendulum (slow)",
+    )
+
     parser.add_argument(
         "-r",
         "--retain_hyphens",
@@ -114,7 +145,15 @@ def parse_arguments():
         type=str_list_type,
         dest="ignore_fields",
         metavar="col1,col2,...",
-        help="Comma separated fields to ignore",
+        help="Comma separated fields to ignore, dotted paths and globs e.g. payload.*, events.[array].debug",
+    )
+
+    parser.add_argument(
+        "--include_fields",
+        type=str_list_type,
+        dest="include_fields",
+        metavar="col1,col2,...",
+        help="Comma separated fields to include, dotted paths and globs - all other fields are ignored",
     )
 
     parser.add_argument(
@@ -150,6 +189,129 @@ def parse_arguments():
         dest="ignore_malformed_json",
         help="DDL: ignore malformed json",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        dest="jobs",
+        metavar="N",
+        help="number of processes used to scan input files, 0 uses all CPUs",
+    )
+
+    parser.add_argument(
+        "--parser",
+        type=str,
+        default="auto",
+        dest="parser",
+        choices=["auto", *parsers.PRIORITY],
+        help="JSON parser backend, auto selects fastest installed with exact numbers (not orjson or simdjson)",
+    )
+
+    parser.add_argument(
+        "--json_lines",
+        action="store_true",
+        dest="json_lines",
+        help="force newline delimited JSON input (auto-detected by default)",
+    )
+
+    parser.add_argument(
+        "--patience",
+        type=int,
+        dest="patience",
+        metavar="N",
+        help="stop reading input after N consecutive documents without new fields or data types",
+    )
+
+    parser.add_argument(
+        "--time_budget",
+        type=float,
+        dest="time_budget",
+        metavar="seconds",
+        help="stop reading input after time budget",
+    )
+
+    parser.add_argument(
+        "--array_budget",
+        type=array_budget_type,
+        dest="array_budget",
+        metavar="head[,sample]",
+        help="visit first head and sample random elements per array, skipped elements are reported",
+    )
+
+    parser.add_argument(
+        "--map_threshold",
+        type=int,
+        dest="map_threshold",
+        metavar="N",
+        help="DDL: objects with more than N distinct keys of one value type are typed map<string, T>",
+    )
+
+    parser.add_argument(
+        "--max_memory",
+        type=int,
+        dest="max_memory",
+        metavar="MB",
+        help="memory budget of collected fields and key paths, least used fields are spilled to a temporary file, key paths are kept in memory",
+    )
+
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        dest="batch_size",
+        metavar="N",
+        help="load documents in columnar batches of N, fields are updated per column",
+    )
+
+    parser.add_argument(
+        "--sample",
+        type=str,
+        dest="sample_mode",
+        choices=sampling.MODES,
+        help="sample documents: reservoir over all input, head | tail | head_tail | file per file, dir per directory",
+    )
+
+    parser.add_argument(
+        "--sample_size",
+        type=int,
+        default=1000,
+        dest="sample_size",
+        metavar="N",
+        help="number of documents sampled (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        dest="seed",
+        metavar="N",
+        help="random seed for reproducible samples",
+    )
+
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        dest="cache_dir",
+        metavar="dirpath",
+        help="incremental scan: only scan new or changed files, state is cached in dirpath",
+    )
+
+    state_group = parser.add_mutually_exclusive_group()
+
+    state_group.add_argument(
+        "--emit_state",
+        type=str,
+        dest="emit_state",
+        metavar="filepath",
+        help="write partial state of input to filepath instead of DDL, `-` for stdout",
+    )
+
+    state_group.add_argument(
+        "--merge_states",
+        action="store_true",
+        dest="merge_states",
+        help="input files are partial states (see --emit_state), merge and output DDL",
+    )
+
     parser.add_argument(
         "-s",
         "--schema",
@@ -197,30 +359,112 @@ def parse_arguments():
     return args
 
 
+def load_max_dict_from_infiles(
+    infiles: List[Union[str, io.TextIOWrapper]],
+    case_insensitive: bool,
+    lines: bool = None,
+    jobs: int = 1,
+    parser: str = None,
+    cache_dir: str = None,
+    sample: sampling.Sample = None,
+    **kwargs,
+) -> MaxDict:
+    """Load all (or sampled) documents of JSON infile(s) into max dict.
+    If cache_dir is set, only new or changed files are scanned.
+    Additional kwargs are passed to MaxDict.
+    """
+
+    from . import incremental, scan
+
+    if cache_dir and sample:
+        raise ValueError("Sampling is not supported for incremental scans...")
+
+    if cache_dir:
+        md = incremental.scan_incremental(
+            infiles,
+            cache_dir,
+            jobs=jobs or None,
+            lines=lines,
+            parser=parser,
+            case_insensitive=case_insensitive,
+            **kwargs,
+        )
+    else:
+        md = scan.scan_files(
+            infiles,
+            jobs=jobs or None,
+            lines=lines,
+            parser=parser,
+            sample=sample,
+            case_insensitive=case_insensitive,
+            **kwargs,
+        )
+
+    log_convergence(md)
+    return md
+
+
+def log_convergence(md: MaxDict):
+    conv = md.convergence
+    msg = (
+        f"{conv['num_docs']:,} documents loaded, "
+        f"last new field or data type at document {conv['last_change']:,}"
+    )
+
+    if conv["stop_reason"]:
+        logger.warning(f"Stopped early ({conv['stop_reason']}): {msg}")
+    else:
+        logger.info(msg)
+
+
 def load_dict_from_infiles(
-    infiles: List[io.TextIOWrapper], case_insensitive: bool
+    infiles: List[Union[str, io.TextIOWrapper]],
+    case_insensitive: bool,
+    lines: bool = None,
+    jobs: int = 1,
+    parser: str = None,
+    sample: sampling.Sample = None,
+    **kwargs,
 ) -> Dict:
     """Load JSON infile(s) as dict | max dict.
     If > 1 files or any input is a list of dicts, max dict is used as schema source.
+    Documents are streamed into max dict one at a time, or sampled.
+    Additional kwargs are passed to MaxDict.
     """
 
+    from . import scan
+
+    if sample or (
+        jobs != 1
+        and (len(infiles) > 1 or len(scan.shard_path(infiles[0], 2, lines=lines)) > 1)
+    ):
+        md = load_max_dict_from_infiles(
+            infiles,
+            case_insensitive,
+            lines=lines,
+            jobs=jobs,
+            parser=parser,
+            sample=sample,
+            **kwargs,
+        )
+        return md.asdict()
+
+    docs = read_json.iter_files(infiles, lines=lines, parser=parser)
+
+    first_doc = next(docs, None)
+    if first_doc is None:
+        raise ValueError("Input is empty...")
+
     if len(infiles) == 1:
-        d = json.loads(infiles[0].read())
-        if isinstance(d, dict):
-            return d
-        else:
-            infiles[0].seek(0)
-
-    md = MaxDict(case_insensitive=case_insensitive)
-    for infile in infiles:
-        d = json.loads(infile.read())
-
-        if isinstance(d, dict):
-            md.load_dict(d)
-        elif isinstance(d, list) and all(isinstance(sd, dict) for sd in d):
-            md.batch_load_dicts(d)
-        else:
-            raise ValueError("Unsupported input, type must be dict or [dict,]...")
+        next_doc = next(docs, None)
+        if next_doc is None:
+            return parsers.as_dict(first_doc)
+        docs = chain((next_doc,), docs)
+
+    md = MaxDict(case_insensitive=case_insensitive, **kwargs)
+    md.load_dict(first_doc)
+    md.batch_load_dicts(docs)
+    log_convergence(md)
 
     return md.asdict()
 
@@ -228,8 +472,63 @@ def load_dict_from_infiles(
 def create_spectrum_schema():
     """Create Spectrum schema from JSON."""
 
+    from . import state
+
     args = parse_arguments()
-    d = load_dict_from_infiles(args.infile, args.case_insensitive)
+    lines = True if args.json_lines else None
+
+    md_kwargs = {}
+    if args.patience:
+        md_kwargs["patience"] = args.patience
+    if args.time_budget:
+        md_kwargs["deadline"] = time.time() + args.time_budget
+    if args.array_budget:
+        md_kwargs["array_budget"] = args.array_budget
+    if args.ignore_fields:
+        md_kwargs["ignore_fields"] = args.ignore_fields
+    if args.include_fields:
+        md_kwargs["include_fields"] = args.include_fields
+    if args.map_threshold:
+        md_kwargs["map_threshold"] = args.map_threshold
+    if args.max_memory:
+        md_kwargs["max_memory"] = args.max_memory * 2 ** 20
+    if args.batch_size:
+        md_kwargs["batch_size"] = args.batch_size
+    if args.infer_date:
+        md_kwargs["infer_date"] = True
+        md_kwargs["date_fallback"] = args.date_fallback
+
+    sample = None
+    if args.sample_mode:
+        sample = sampling.Sample(args.sample_mode, args.sample_size, seed=args.seed)
+
+    if args.emit_state or args.cache_dir and not args.merge_states:
+        md = load_max_dict_from_infiles(
+            args.infile,
+            args.case_insensitive,
+            lines=lines,
+            jobs=args.jobs,
+            parser=args.parser,
+            cache_dir=args.cache_dir,
+            sample=sample,
+            **md_kwargs,
+        )
+        if args.emit_state:
+            state.dump(md, args.emit_state)
+            return
+        d = md.asdict()
+    elif args.merge_states:
+        d = state.merge_files(args.infile).asdict()
+    else:
+        d = load_dict_from_infiles(
+            args.infile,
+            args.case_insensitive,
+            lines=lines,
+            jobs=args.jobs,
+            parser=args.parser,
+            sample=sample,
+            **md_kwargs,
+        )
 
     kwargs = {k: v for (k, v) in args._get_kwargs()}
     statement = ddl.from_dict(d, **kwargs)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""Bulk statistics of value columns, see Field.add_many and MaxDict.load_batch.
+
+Numeric columns are reduced by NumPy if installed, builtin min / max otherwise.
+NumPy is imported on first use, not at startup.
+"""
+
+import math
+
+from typing import Sequence, Tuple, Type
+
+# shorter columns are reduced by builtins, conversion to arrays is not worth it
+NUMPY_MIN_SIZE = 64
+
+_np = False  # not imported yet, None if not installed
+
+
+def numpy():
+    """NumPy module, imported on first call, None if not installed."""
+
+    global _np
+    if _np is False:
+        try:
+            import numpy as _np
+        except ImportError:
+            _np = None
+    return _np
+
+
+def min_max(values: Sequence, kind: Type = int) -> Tuple:
+    """Min and max of int or float column.
+
+    Ints exceeding 64 bits and floats containing NaN are reduced by builtins, same
+    as adding values one at a time.
+    """
+
+    np = numpy() if len(values) >= NUMPY_MIN_SIZE else None
+    if np is not None:
+        dtype = np.int64 if kind is int else np.float64
+        try:
+            arr = np.fromiter(values, dtype=dtype, count=len(values))
+        except (OverflowError, TypeError, ValueError):
+            pass
+        else:
+            lo, hi = kind(arr.min()), kind(arr.max())
+            if kind is int or not (math.isnan(lo) or math.isnan(hi)):
+                return lo, hi
+
+    return min(values), max(values)
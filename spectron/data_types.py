@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import re
+
 from enum import IntEnum, auto
-from functools import singledispatch
+from functools import lru_cache, singledispatch
+from typing import Optional, Sequence, Tuple
 
-from . import parse_date
+from . import columns, parse_date
 
 
 REDSHIFT_MAP = {
@@ -39,19 +42,148 @@ DATETIME_TYPES = {"DATE", "TIMESTAMP"}
 NUMERIC_TYPES = set(Numeric.__members__.keys())
 
 
+# type lattice -------------------------------------------------------------------------
+
+# base dtype: (kind, rank), dtypes are widened by rank, see widen_type
+LATTICE = {
+    "TINYINT": ("int", 0),
+    "SMALLINT": ("int", Numeric.SMALLINT.value),
+    "INT": ("int", Numeric.INT.value),
+    "BIGINT": ("int", Numeric.BIGINT.value),
+    "FLOAT4": ("float", Numeric.FLOAT4.value),
+    "FLOAT8": ("float", Numeric.FLOAT8.value),
+    "DECIMAL": ("decimal", 0),
+    "BOOL": ("bool", 0),
+    "CHAR": ("str", 0),
+    "VARCHAR": ("str", 1),
+    "DATE": ("datetime", 0),
+    "TIMESTAMP": ("datetime", 1),
+}
+
+# Redshift and Athena names of lattice dtypes
+ALIASES = {
+    **{name.upper(): dtype for name, dtype in REDSHIFT_MAP.items()},
+    "NUMERIC": "DECIMAL",
+    "DOUBLE": "FLOAT8",
+    "REAL": "FLOAT4",
+    "BPCHAR": "CHAR",
+    "NCHAR": "CHAR",
+    "NVARCHAR": "VARCHAR",
+    "STRING": "VARCHAR",
+    "TEXT": "VARCHAR",
+}
+
+RANK = {name: rank for name, (_, rank) in LATTICE.items()}
+
+# Redshift DECIMAL: max precision, default (precision, scale)
+MAX_PRECISION = 38
+DECIMAL_DEFAULT = (18, 0)
+
+DTYPE_PATTERN = re.compile(
+    r"([A-Z][A-Z0-9 ]*?)\s*(?:\(\s*([0-9]+)\s*(?:,\s*([0-9]+)\s*)?\))?"
+)
+
+# resolution of inferred vs. user defined kind, see resolve_type
+USER, INFERRED, WIDEST = range(3)
+
+
+@lru_cache(maxsize=None)
+def parse_dtype(dtype: str) -> Tuple[Optional[str], Tuple[int, ...]]:
+    """Base dtype and parameters, e.g. `numeric(10, 2)` -> (DECIMAL, (10, 2)).
+
+    Returns: (None, ()) for dtypes outside of LATTICE
+    """
+
+    m = DTYPE_PATTERN.fullmatch(dtype.strip().upper())
+    if not m:
+        return None, ()
+
+    name = " ".join(m.group(1).split())
+    base = ALIASES.get(name, name)
+    if base not in LATTICE:
+        return None, ()
+    return base, tuple(int(p) for p in m.groups()[1:] if p is not None)
+
+
+@lru_cache(maxsize=None)
+def dtype_kind(dtype: str) -> Optional[str]:
+    base, _ = parse_dtype(dtype)
+    return base and LATTICE[base][0]
+
+
+def _resolve_rule(inferred: Optional[str], user: Optional[str]) -> int:
+    if inferred == "str":
+        return USER if user in ("str", "datetime") else INFERRED
+    elif user == "decimal":
+        return USER if inferred in ("int", "float") else INFERRED
+    elif inferred == "int":
+        if user in ("bool", "float"):
+            return USER
+        return WIDEST if user == "int" else INFERRED
+    elif inferred == "float":
+        return WIDEST if user == "float" else INFERRED
+    return USER
+
+
+_KINDS = {kind for kind, _ in LATTICE.values()} | {None}
+RESOLVE = {(i, u): _resolve_rule(i, u) for i in _KINDS for u in _KINDS}
+
+
 def largest_numeric_type(*dtypes: str) -> str:
     """Get dtype with largest range."""
 
-    num_type = max((getattr(Numeric, dtype) for dtype in dtypes))
-    return num_type.name
+    return max(dtypes, key=RANK.__getitem__)
+
+
+@lru_cache(maxsize=None)
+def widen_type(dtype: str, other: str) -> str:
+    """Smallest dtype holding values of both dtypes, e.g. SMALLINT, INT -> INT.
+
+    Ints widen to floats, DECIMAL precision and scale or VARCHAR lengths are
+    widened. Can be applied incrementally, widen_type(widen_type(a, b), c).
+
+    The wider dtype is returned as spelled, e.g. FLOAT4, DOUBLE -> DOUBLE, `other`
+    on equal rank. Widened DECIMAL and VARCHAR(n) are built from canonical names.
+
+    Raises: ValueError for dtypes of other kinds or outside of LATTICE
+    """
+
+    if dtype == other:
+        return dtype
+
+    (base, params), (other_base, other_params) = parse_dtype(dtype), parse_dtype(other)
+    kind = base and LATTICE[base][0]
+    other_kind = other_base and LATTICE[other_base][0]
+
+    numeric = kind in ("int", "float") and other_kind in ("int", "float")
+    if not numeric and (kind is None or kind != other_kind):
+        raise ValueError(f"Cannot widen {dtype} and {other}...")
+    elif kind == "decimal":
+        p, s = (*params, *DECIMAL_DEFAULT[len(params) :])
+        other_p, other_s = (*other_params, *DECIMAL_DEFAULT[len(other_params) :])
+        scale = max(s, other_s)
+        precision = min(max(p - s, other_p - other_s) + scale, MAX_PRECISION)
+        return f"DECIMAL({precision},{scale})"
+    elif kind == "str":
+        # missing length is the maximum, VARCHAR(n) otherwise
+        if not (params and other_params):
+            return "VARCHAR"
+        base = max(base, other_base, key=RANK.__getitem__)
+        return f"{base}({max(params[0], other_params[0])})"
+    return dtype if RANK[base] > RANK[other_base] else other
 
 
 def resolve_type(inferred_dtype: str, user_dtype: str) -> str:
     """Detect and resolve data type when inferred != user provided.
 
+    Dtypes are resolved by kind via the precomputed RESOLVE table, see LATTICE.
+    Redshift and Athena aliases resolve like their base dtype, e.g. user defined
+    DOUBLE is a float: INT, DOUBLE -> DOUBLE. The resolved dtype keeps the
+    spelling of the dtype it was taken from, see widen_type.
+
     Rules (inferred vs. user defined):
         string / varchar > all:
-            - override all dtypes except for date/time
+            - override all dtypes except for date/time and varchar(n)
         numeric > all numeric:
             - user defined numeric(x,y) types override int, float
             - other inferred dtypes override user defined
@@ -65,45 +197,43 @@ def resolve_type(inferred_dtype: str, user_dtype: str) -> str:
             - largest float type is used
     """
 
-    dtype = None
-
-    if inferred_dtype == "VARCHAR":
-        if user_dtype in DATETIME_TYPES:
-            dtype = user_dtype
-        else:
-            dtype = inferred_dtype
-    elif "NUMERIC" in user_dtype or "DECIMAL" in user_dtype:
-        if inferred_dtype in NUMERIC_TYPES:
-            dtype = user_dtype
-        else:
-            dtype = inferred_dtype
-    elif "INT" in inferred_dtype:
-        if user_dtype == "BOOL" or "FLOAT" in user_dtype:
-            dtype = user_dtype
-        elif "INT" in user_dtype:
-            dtype = largest_numeric_type(inferred_dtype, user_dtype)
-        else:
-            dtype = inferred_dtype
-    elif "FLOAT" in inferred_dtype:
-        if "FLOAT" in user_dtype:
-            dtype = largest_numeric_type(inferred_dtype, user_dtype)
-        else:
-            dtype = inferred_dtype
-    else:
-        dtype = user_dtype
-
-    return dtype
+    rule = RESOLVE[dtype_kind(inferred_dtype), dtype_kind(user_dtype)]
+    if rule == USER:
+        return user_dtype
+    elif rule == INFERRED:
+        return inferred_dtype
+    return widen_type(inferred_dtype, user_dtype)
 
 
 def type_set(t: list):
     return set(map(type, t))
 
 
+# (min, max) per number of bits, see num_in_bounds
+BOUNDS = {
+    num_bits: (-(2 ** num_bits) // 2, (2 ** num_bits) // 2 - 1)
+    for num_bits in (16, 32, 64, 32 - 6, 64 - 15)
+}
+
+
 def num_in_bounds(num_bits, val):
-    n_max = (2 ** num_bits) // 2
-    if val > 0:
-        n_max -= 1
-    return abs(val) <= n_max
+    bounds = BOUNDS.get(num_bits)
+    if bounds is None:
+        n_max = (2 ** num_bits) // 2
+        bounds = (-n_max, n_max - 1)
+    return bounds[0] <= val <= bounds[1]
+
+
+def column_dtype(values: Sequence, strict: bool = False) -> str:
+    """Smallest numeric dtype holding all int or float values, reduced in bulk.
+
+    Column must contain a single type, see columns.min_max.
+    """
+
+    lo, hi = columns.min_max(values, type(values[0]))
+    return largest_numeric_type(
+        set_dtype(lo, strict=strict), set_dtype(hi, strict=strict)
+    )
 
 
 @singledispatch
@@ -112,15 +242,27 @@ def set_dtype(val, **kwargs):
 
 
 @set_dtype.register
-def __str_dtype(val: str, infer_date: bool = False, **kwargs):
+def __str_dtype(
+    val: str, infer_date: bool = False, date_fallback: bool = False, **kwargs
+):
+    """VARCHAR, or DATE | TIMESTAMP if `infer_date`, see parse_date.guess_type."""
 
-    if any(c.isdigit() for c in val):
-        dtype = parse_date.guess_type(val)
+    if infer_date:
+        dtype = parse_date.guess_type(val, fallback=date_fallback)
         if dtype:
             return dtype
     return "VARCHAR"
 
 
+@set_dtype.register
+def __typed_str_dtype(val: parse_date.TypedStr, infer_date: bool = False, **kwargs):
+    """Learned dtype of string values, see parse_date.FormatCache."""
+
+    if infer_date:
+        return val.dtype
+    return "VARCHAR"
+
+
 @set_dtype.register
 def __float_dtype(val: float, strict: bool = False, **kwargs):
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import re
 import sys
 
 from functools import partial
@@ -12,12 +13,27 @@ except ImportError:
     import json
 
 from . import data_types
-from . import reserved
+from . import merge
+from . import parse_date
+from . import paths
 from . import write_ddl
 
 
 logger = logging.getLogger(__name__)
 
+# map nodes {"[map]": T} as serialized by json.dumps
+MAP_PATTERN = re.compile(r'\{\s*"' + re.escape(paths.MAP_KEY) + r'":\s*')
+SCALAR_MAP_PATTERN = re.compile(r"map<string, ([^\s<>]+)\s+>")
+
+# from_dict kwargs also applied by MaxDict while scanning
+SCAN_OPTIONS = (
+    "array_budget",
+    "ignore_fields",
+    "include_fields",
+    "infer_date",
+    "date_fallback",
+)
+
 # --------------------------------------------------------------------------------------
 
 
@@ -44,7 +60,8 @@ def _conform_syntax(d):
     s = s[1:][:-1]
     s = s.rstrip()
 
-    # replace dict, lists with schema dtypes
+    # replace maps, dict, lists with schema dtypes
+    s = MAP_PATTERN.sub("map<string, ", s)
     s = s.replace("{", "struct<").replace("}", ">")
     s = s.replace("[", "array<").replace("]", ">")
 
@@ -56,6 +73,9 @@ def _conform_syntax(d):
 
     # drop quotes, replace back-ticks
     s = s.replace('"', "").replace("`", '"')
+
+    # single line maps of primitive types
+    s = SCALAR_MAP_PATTERN.sub(r"map<string, \1>", s)
     return s
 
 
@@ -92,8 +112,16 @@ def validate_identifier(key: str):
     return key[0].isalpha() or key.startswith("_")
 
 
+def _reserved_keywords() -> set:
+    """Reserved keywords, imported on first key check, see reserved.py"""
+
+    from .reserved import keywords
+
+    return keywords
+
+
 def detect_reserved_key(key, parent):
-    if key.strip("`").lower() in reserved.keywords:
+    if key.strip("`").lower() in _reserved_keywords():
         logger.info(f"Reserved keyword detected: {parent}.{key}")
 
 
@@ -123,7 +151,7 @@ def conform_key(
     mapped_key = None
 
     use_key_map = mapping and key in mapping
-    is_reserved = key.lower() in reserved.keywords
+    is_reserved = key.lower() in _reserved_keywords()
 
     if use_key_map:
         mapped_key = mapping[key]
@@ -257,8 +285,24 @@ def define_types(
     case_insensitive=False,
     ignore_nested_arrarys=True,
     numeric_overflow=False,
+    array_budget=None,
+    include_fields=None,
+    date_fallback=False,
 ):
-    """Replace values with data types and maintain data structure."""
+    """Replace values with data types and maintain data structure.
+
+    Date and timestamp strings are only typed if `infer_date` is enabled, see
+    parse_date.guess_type for `date_fallback`.
+
+    If `array_budget` (head, sample) is set, only array elements within budget are
+    validated and typed, see merge.ArrayBudget.
+
+    `ignore_fields` and `include_fields` are key path rules (dotted paths, globs),
+    pruned subtrees are not visited, see paths.PathMatcher.
+
+    Dicts with the single key `[map]` (see MaxDict.map_threshold) are typed as
+    map<string, T>, T is the type of the map value.
+    """
 
     key_map = {}  # dict of confirmed keys to include in serde mapping
 
@@ -274,10 +318,19 @@ def define_types(
     }
 
     set_dtype = partial(
-        data_types.set_dtype, infer_date=infer_date, strict=numeric_overflow
+        data_types.set_dtype,
+        infer_date=infer_date,
+        date_fallback=date_fallback,
+        strict=numeric_overflow,
     )
 
-    def parse_types(d, parent=None):
+    budget = merge.ArrayBudget(*array_budget) if array_budget else None
+    matcher = paths.PathMatcher(ignore_fields, include_fields, case_insensitive)
+
+    def pruned(path):
+        return matcher and matcher.pruned(path)
+
+    def parse_types(d, parent=None, path=()):
         """Crawl and assign data types."""
 
         nonlocal key_map
@@ -285,6 +338,12 @@ def define_types(
         if isinstance(d, list):
             as_types = []
             parent_key = _as_parent_key(parent, "array")
+            path = (*path, paths.ARRAY_KEY)
+            if pruned(path):
+                return None
+
+            if budget is not None:
+                d = budget.elements(d, parent_key)
 
             if not validate_array(d, parent_key, ignore_nested_arrarys):
                 return None
@@ -295,23 +354,51 @@ def define_types(
                 else:
                     single_dict = sorted(d, key=count_members, reverse=True)[0]
 
-                as_types.append(parse_types(single_dict, parent=parent_key))
+                as_types.append(parse_types(single_dict, parent=parent_key, path=path))
+
+            elif infer_date and isinstance(d[0], str):
+                # date format is learned from first items, see parse_date.FormatCache
+                str_format = parse_date.FormatCache(date_fallback)
+                for item in d:
+                    str_format.add(item)
+                as_types.append(str_format.dtype)
+
+            elif type(d[0]) in (int, float):
+                # widest type of all items, e.g. [1, 100000] -> INT
+                as_types.append(data_types.column_dtype(d, strict=numeric_overflow))
 
             else:
                 for item in d:
                     if isinstance(item, list):
                         continue
-                    as_types.append(parse_types(item, parent=parent_key))
+                    as_types.append(parse_types(item, parent=parent_key, path=path))
                 as_types = sorted(set(as_types))
 
+        elif isinstance(d, dict) and list(d) == [paths.MAP_KEY]:
+            as_types = None
+            path = (*path, paths.MAP_KEY)
+            if not pruned(path):
+                val = d[paths.MAP_KEY]
+                if isinstance(val, (dict, list)):
+                    dtype = parse_types(val, parent=parent, path=path)
+                else:
+                    dtype = set_dtype(val)
+                    if "UNKNOWN" in dtype:
+                        logger.warning(f"Unknown map dtype for {parent}: {val}")
+                        dtype = None
+
+                if dtype:
+                    as_types = {paths.MAP_KEY: dtype}
+
         elif isinstance(d, dict):
             as_types = {}
 
-            proc_keys = process_keys(parent, d.keys(), **kwargs)
+            keys = [key for key in d.keys() if not pruned((*path, key))]
+            proc_keys = process_keys(parent, keys, **kwargs)
 
-            for key, val in d.items():
-                if ignore_fields and key in ignore_fields:
-                    continue
+            for key in keys:
+                val = d[key]
+                key_path = (*path, key)
 
                 dtype = None
                 parent_key = _as_parent_key(parent, key)
@@ -335,7 +422,7 @@ def define_types(
 
                 # determine dtype and generate new dict
                 if isinstance(val, (dict, list)):
-                    dtype = parse_types(val, parent=parent_key)
+                    dtype = parse_types(val, parent=parent_key, path=key_path)
                     if dtype:
                         as_types[key] = dtype
                 else:
@@ -367,7 +454,11 @@ def define_types(
 
         return as_types
 
-    return parse_types(d), key_map
+    with_types = parse_types(d)
+    if budget is not None:
+        budget.log_skipped()
+
+    return with_types, key_map
 
 
 # --------------------------------------------------------------------------------------
@@ -412,6 +503,9 @@ def from_dict(
     ignore_malformed_json=True,
     ignore_nested_arrarys=True,
     numeric_overflow=False,
+    array_budget=None,
+    include_fields=None,
+    date_fallback=False,
     **kwargs,
 ):
     """Create Spectrum schema from dict."""
@@ -423,11 +517,15 @@ def from_dict(
         mapping=mapping,
         type_map=type_map,
         ignore_fields=ignore_fields,
+        infer_date=infer_date,
+        date_fallback=date_fallback,
         convert_hyphens=convert_hyphens,
         case_map=case_map,
         case_insensitive=case_insensitive,
         ignore_nested_arrarys=ignore_nested_arrarys,
         numeric_overflow=numeric_overflow,
+        array_budget=array_budget,
+        include_fields=include_fields,
     )
 
     statement = write_ddl.create_statement(
@@ -442,3 +540,55 @@ def from_dict(
     )
 
     return statement
+
+
+def from_files(
+    paths,
+    jobs=1,
+    lines=None,
+    parser=None,
+    case_insensitive=False,
+    cache_dir=None,
+    sample=None,
+    map_threshold=None,
+    **kwargs,
+):
+    """Create Spectrum schema from JSON file(s).
+
+    All documents are merged via MaxDict. With jobs > 1, files are scanned by a
+    process pool and partial results are merged. `parser` selects the JSON parser
+    backend, default selects the fastest installed. If `cache_dir` is set, only new
+    or changed files are scanned, see incremental.scan_incremental. `sample` limits
+    documents scanned, see sample.Sample. Objects with more than `map_threshold`
+    keys of one value type are typed as maps, see MaxDict. Array budget, ignored or
+    included fields and date inference apply while scanning, skipped elements and
+    pruned subtrees are never walked.
+    """
+
+    from . import incremental, scan
+
+    scan_kwargs = dict(
+        jobs=jobs, lines=lines, parser=parser, case_insensitive=case_insensitive
+    )
+    if map_threshold:
+        scan_kwargs["map_threshold"] = map_threshold
+    for key in SCAN_OPTIONS:
+        if kwargs.get(key):
+            scan_kwargs[key] = kwargs[key]
+    if cache_dir:
+        md = incremental.scan_incremental(paths, cache_dir, **scan_kwargs)
+    else:
+        md = scan.scan_files(paths, sample=sample, **scan_kwargs)
+    return from_dict(md.asdict(), case_insensitive=case_insensitive, **kwargs)
+
+
+def from_states(paths, case_insensitive=False, **kwargs):
+    """Create Spectrum schema from partial MaxDict state file(s), see state.dump.
+
+    States are merged in order, as if all documents were scanned by one MaxDict.
+    """
+
+    from . import state
+
+    md = state.merge_files(paths)
+    return from_dict(md.asdict(), case_insensitive=case_insensitive, **kwargs)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import io
+import queue
+import threading
+
+from typing import IO, Optional
+
+
+CHUNK_SIZE = 2 ** 20
+MAX_CHUNKS = 8
+
+MAGIC_BYTES = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+_MAGIC_LEN = max(map(len, MAGIC_BYTES))
+
+
+def detect_compression(stream: io.BufferedReader) -> Optional[str]:
+    """Detect compression format from magic bytes without consuming stream."""
+
+    head = stream.peek(_MAGIC_LEN)[:_MAGIC_LEN]
+    for magic, fmt in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return fmt
+    return None
+
+
+def decompressor(stream: IO, fmt: str) -> IO:
+    """Wrap binary stream with decompressing reader for format."""
+
+    # codecs are imported on first use, most input is uncompressed
+    if fmt == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    elif fmt == "bz2":
+        import bz2
+
+        return bz2.BZ2File(stream, mode="rb")
+    elif fmt == "xz":
+        import lzma
+
+        return lzma.LZMAFile(stream, mode="rb")
+    elif fmt == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd input requires zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(
+            stream, read_across_frames=True, closefd=False
+        )
+    raise ValueError(f"Unsupported compression: {fmt}")
+
+
+class ThreadedReader(io.RawIOBase):
+    """Read binary stream in a background thread.
+
+    Chunks are passed through a bounded queue, so decompression (which releases the
+    GIL) overlaps with parsing and traversal in the consuming thread.
+    """
+
+    def __init__(
+        self, stream: IO, chunk_size: int = CHUNK_SIZE, max_chunks: int = MAX_CHUNKS
+    ):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._queue = queue.Queue(max_chunks)
+        self._stop = threading.Event()
+        self._buf = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self):
+        try:
+            while True:
+                chunk = self.stream.read(self.chunk_size)
+                if not self._put(chunk) or not chunk:
+                    break
+        except Exception as e:
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._buf:
+            if self._eof:
+                return 0
+
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._buf = memoryview(item)
+
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self.stream.close()
+        super().close()
+
+
+def open_binary(stream: io.BufferedReader, threaded: bool = True) -> IO:
+    """Return decompressed binary stream if compression is detected."""
+
+    fmt = detect_compression(stream)
+    if fmt is None:
+        return stream
+
+    reader = decompressor(stream, fmt)
+    if threaded:
+        reader = io.BufferedReader(ThreadedReader(reader), buffer_size=CHUNK_SIZE)
+    return reader
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""Incremental scans backed by an on-disk cache.
+
+The cache directory holds a manifest of scanned files (size, mtime, content hash)
+with one partial state per file, see state, and the merged state of all files:
+
+    cache_dir/
+        manifest.json
+        merged.state
+        files/<path digest>.state
+
+Unchanged files are never read again. If files are only appended to the input,
+new partial states are merged into the cached merged state. Changed or removed
+files can't be subtracted from the merged state, it is rebuilt from per file states
+instead, only changed files are rescanned.
+
+Files stopped early (patience, deadline) are not cached, they are scanned again by
+the next run. The merged state is only written if all files are cached.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+from . import scan
+from . import state
+from .MaxDict import MaxDict
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+MERGED_NAME = "merged.state"
+FILES_DIR = "files"
+
+HASH_CHUNK_SIZE = 2 ** 20
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """Content hash of file."""
+
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _state_name(path: str) -> str:
+    return hashlib.blake2b(path.encode("utf-8"), digest_size=16).hexdigest() + ".state"
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class Cache:
+    """Manifest and partial states of a cache directory."""
+
+    def __init__(self, cache_dir: Union[str, Path], options: Dict):
+        self.cache_dir = Path(cache_dir)
+        # normalized as JSON, options are compared with manifest
+        self.options = json.loads(
+            json.dumps({**options, "state_version": state.VERSION})
+        )
+        self.files: Dict[str, Dict] = {}  # manifest entry per path, in merged order
+        self.load_manifest()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / MANIFEST_NAME
+
+    @property
+    def merged_path(self) -> Path:
+        return self.cache_dir / MERGED_NAME
+
+    def state_path(self, path: str) -> Path:
+        return self.cache_dir / FILES_DIR / self.files[path]["state"]
+
+    def load_manifest(self):
+        if not self.manifest_path.is_file():
+            return
+
+        manifest = json.loads(self.manifest_path.read_text())
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.warning("Ignoring cache with unsupported manifest version")
+        elif manifest.get("options") != self.options:
+            logger.warning("Ignoring cache created with different options")
+        else:
+            self.files = manifest["files"]
+
+    def save_manifest(self):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "options": self.options,
+            "files": self.files,
+        }
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode())
+
+    def is_unchanged(self, path: str, stat: os.stat_result) -> bool:
+        """Compare size, mtime with manifest, content hash is checked on mismatch."""
+
+        entry = self.files.get(path)
+        if entry is None or stat.st_size != entry["size"]:
+            return False
+
+        if stat.st_mtime_ns == entry["mtime"]:
+            return True
+
+        if file_hash(path) == entry["hash"]:
+            entry["mtime"] = stat.st_mtime_ns
+            return True
+        return False
+
+    def add(self, path: str, stat: os.stat_result, md: MaxDict):
+        self.files[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": file_hash(path),
+            "state": _state_name(path),
+        }
+        _write_atomic(self.state_path(path), state.dumps(md))
+
+    def remove(self, path: str):
+        state_path = self.state_path(path)
+        del self.files[path]
+        if state_path.is_file():
+            state_path.unlink()
+
+
+def scan_incremental(
+    paths: Sequence[Union[str, Path]],
+    cache_dir: Union[str, Path],
+    jobs: Optional[int] = 1,
+    lines: Optional[bool] = None,
+    parser: Optional[str] = None,
+    **kwargs,
+) -> MaxDict:
+    """Scan new or changed paths and merge with cached state of previous scans.
+
+    Results match scan.scan_files over all paths. See scan.scan_files for kwargs,
+    additional kwargs are passed to MaxDict.
+    """
+
+    if any(str(path) == "-" for path in paths):
+        raise ValueError("Incremental scans require file paths, not stdin...")
+
+    paths = list(dict.fromkeys(str(Path(path).resolve()) for path in paths))
+    if not paths:
+        raise ValueError("Input is empty...")
+
+    (Path(cache_dir) / FILES_DIR).mkdir(parents=True, exist_ok=True)
+    # deadline, memory budget and batch size are specific to each run and do not
+    # invalidate cache
+    run_options = ("deadline", "max_memory", "spill_dir", "batch_size")
+    options = {k: v for k, v in kwargs.items() if k not in run_options}
+    cache = Cache(cache_dir, {"lines": lines, **options})
+
+    stats = {path: os.stat(path) for path in paths}
+    cached = [path for path in cache.files if path in stats]
+    unchanged = {path for path in cached if cache.is_unchanged(path, stats[path])}
+
+    removed = [path for path in cache.files if path not in stats]
+    changed = [path for path in cached if path not in unchanged]
+    new_paths = [path for path in paths if path not in unchanged]
+
+    logger.info(
+        f"Incremental scan: {len(unchanged):,} unchanged, {len(changed):,} changed, "
+        f"{len(removed):,} removed, {len(new_paths) - len(changed):,} new files"
+    )
+
+    for path in removed + changed:
+        cache.remove(path)
+
+    partials = scan.scan_each(
+        new_paths, jobs=jobs, lines=lines, parser=parser, **kwargs
+    )
+    stopped = []
+    for path, md in zip(new_paths, partials):
+        if md.stop_reason:
+            stopped.append(path)
+        else:
+            cache.add(path, stats[path], md)
+
+    # append only: cached files precede new files in input order
+    is_append = (
+        not (removed or changed)
+        and paths[: len(unchanged)] == cached
+        and cache.merged_path.is_file()
+    )
+
+    if not unchanged:
+        md = MaxDict.merge_all(partials)
+    elif is_append:
+        md = state.merge_files([cache.merged_path])
+        for partial in partials:
+            md.merge(partial)
+    else:
+        logger.info("Rebuilding merged state from file states")
+        scanned = dict(zip(new_paths, partials))
+        md = MaxDict(**kwargs)
+        for path in paths:
+            partial = scanned.get(path)
+            md.merge(partial or state.load(cache.state_path(path)))
+
+    cache.files = {path: cache.files[path] for path in paths if path in cache.files}
+    if stopped:
+        # merged state would include partial files, it is rebuilt by the next run
+        logger.info(f"Not caching {len(stopped):,} files stopped early")
+        if cache.merged_path.is_file():
+            cache.merged_path.unlink()
+    else:
+        _write_atomic(cache.merged_path, state.dumps(md))
+    cache.save_manifest()
+    return md
@@ -1,6 +1,91 @@
 # -*- coding: utf-8 -*-
 
-from typing import Any, Dict, Generator, List, Optional, Tuple, Union
+import logging
+import random
+
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+# container types walked during traversal, lazy parser backends add their own
+MAPPING_TYPES = (dict,)
+SEQUENCE_TYPES = (list,)
+CONTAINER_TYPES = MAPPING_TYPES + SEQUENCE_TYPES
+
+
+def register_container_types(mapping_types=(), sequence_types=()):
+    """Register additional mapping / sequence types to traverse."""
+
+    global MAPPING_TYPES, SEQUENCE_TYPES, CONTAINER_TYPES
+
+    MAPPING_TYPES += tuple(t for t in mapping_types if t not in MAPPING_TYPES)
+    SEQUENCE_TYPES += tuple(t for t in sequence_types if t not in SEQUENCE_TYPES)
+    CONTAINER_TYPES = MAPPING_TYPES + SEQUENCE_TYPES
+
+
+class ArrayBudget:
+    """Per array element budget, first `head` elements plus `sample` random others.
+
+    Elements outside the budget are never visited, skipped elements are counted
+    per array key. Random elements are selected via a seeded generator.
+    """
+
+    def __init__(
+        self,
+        head: int,
+        sample: int = 0,
+        seed: Optional[int] = 0,
+        skipped: Optional[Dict] = None,
+    ):
+        if head < 0 or sample < 0:
+            raise ValueError(f"Invalid array budget: {head}, {sample}")
+
+        self.head = head
+        self.sample = sample
+        self.limit = head + sample
+        self.rng = random.Random(seed)
+        self.skipped: Dict[Hashable, int] = {} if skipped is None else skipped
+
+    def elements(self, seq: Sequence, key: Hashable) -> Sequence:
+        """Elements of seq within budget, in input order."""
+
+        n = len(seq)
+        if n <= self.limit:
+            return seq
+
+        self.skipped[key] = self.skipped.get(key, 0) + n - self.limit
+
+        ixs = self.rng.sample(range(self.head, n), self.sample)
+        if type(seq) is list:
+            return seq[: self.head] + [seq[ix] for ix in sorted(ixs)]
+
+        # lazy sequences, avoid random access
+        ixs = set(ixs)
+        return list(islice(seq, self.head)) + [
+            item for ix, item in enumerate(seq) if ix in ixs
+        ]
+
+    def log_skipped(self, as_str=str):
+        for key, n in self.skipped.items():
+            logger.warning(f"[{as_str(key)}] Skipped {n:,} array elements")
+
+
+def iter_items(d):
+    """Iterate mapping items, values of lazy mappings are accessed per key."""
+
+    if type(d) is dict:
+        return d.items()
+    return ((k, d[k]) for k in d)
 
 
 def pk(parent: Optional[Union[Tuple[str], List[str]]], key: str) -> Tuple[str]:
@@ -14,37 +99,66 @@ def pk(parent: Optional[Union[Tuple[str], List[str]]], key: str) -> Tuple[str]:
 def terminal(v: Any) -> bool:
     """Detect terminal key ending in type other than non-empty dict or list."""
 
-    if isinstance(v, (dict, list)):
+    if isinstance(v, CONTAINER_TYPES):
         if v:
             return False
     return True
 
 
 def extract_terminal_keys(
-    d: Dict, parent: Optional[List[str]] = None
-) -> Generator[Tuple[Tuple[str], Dict], None, None]:
-    """Get parent keys that reference a value or no other keys."""
-
-    if isinstance(d, dict):
-        for k, v in d.items():
-            parent_key = pk(parent, k)
-            if terminal(v):
-                if isinstance(v, list):
-                    yield pk(parent_key, "[array]"), None
-                else:
-                    yield parent_key, v
+    d: Dict,
+    parent: Optional[List[str]] = None,
+    budget: Optional[ArrayBudget] = None,
+    matcher=None,
+) -> List[Tuple[Tuple[str], Any]]:
+    """Get parent keys that reference a value or no other keys, as (key, value) list.
+
+    If `budget` is set, only array elements within budget are visited. Subtrees of
+    keys pruned by `matcher` are not visited, see paths.PathMatcher.
+
+    Keys are collected via traverse.walk_keys, which does not recurse.
+    """
+
+    from .traverse import walk_keys
+
+    items = []
+    walk_keys(
+        d,
+        lambda key, value: items.append((key, value)),
+        tuple(parent) if parent else None,
+        budget,
+        matcher,
+    )
+    return items
+
+
+def flatten(d: Any, values: List) -> Tuple:
+    """Append terminal values to `values` and return structural signature.
+
+    Values are appended in the same order as extract_terminal_keys returns them.
+    Documents with equal signatures produce the same sequence of terminal keys.
+    """
+
+    if isinstance(d, MAPPING_TYPES):
+        sig = []
+        for _, v in iter_items(d):
+            if isinstance(v, CONTAINER_TYPES) and v:
+                sig.append(flatten(v, values))
+            elif isinstance(v, SEQUENCE_TYPES):
+                values.append(None)
+                sig.append(1)
             else:
-                yield from extract_terminal_keys(v, parent_key)
-    elif isinstance(d, list):
+                values.append({} if isinstance(v, MAPPING_TYPES) else v)
+                sig.append(0)
+        return tuple(d), tuple(sig)
+    elif isinstance(d, SEQUENCE_TYPES):
         if d:
-            for item in d:
-                parent_key = pk(parent, "[array]")
-                yield from extract_terminal_keys(item, parent_key)
-        else:
-            parent_key = pk(parent, "[array]")
-            yield parent_key, None
+            return (tuple([flatten(item, values) for item in d]),)
+        values.append(None)
+        return 1
     else:
-        yield parent, d
+        values.append(d)
+        return 0
 
 
 # Create Dict --------------------------------------------------------------------------
@@ -1,17 +1,82 @@
 # -*- coding: utf-8 -*-
 
-from pendulum import parse
+"""Date and timestamp detection for strings.
+
+Tiers, cheapest first:
+    1. precompiled ISO 8601 shape check (basic and extended format)
+    2. datetime.fromisoformat on the normalized match, validates ranges
+    3. optional pendulum fallback for strings failing 1 or 2
+"""
+
+import re
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+ISO_8601 = re.compile(
+    r"(?P<year>[0-9]{4})(?P<sep>-?)(?P<month>[0-9]{2})(?P=sep)(?P<day>[0-9]{2})"
+    r"(?:[T ](?P<hour>[0-9]{2})"
+    r"(?::?(?P<minute>[0-9]{2})"
+    r"(?::?(?P<second>[0-9]{2})(?:[.,](?P<fraction>[0-9]+))?)?)?"
+    r"(?P<tz>Z|[+-](?P<tz_hour>[0-9]{2})(?::?(?P<tz_minute>[0-9]{2}))?)?)?"
+)
+
+# shortest ISO 8601 date, YYYYMMDD
+MIN_LEN = 8
+
+VARCHAR = "VARCHAR"
+
+# time of day and offset for learned layouts, fraction and offset may vary per value
+_TIME = (
+    r"[0-9]{2}(?::?[0-9]{2}(?::?[0-9]{2}(?:[.,][0-9]+)?)?)?"
+    r"(?:Z|[+-][0-9]{2}(?::?[0-9]{2})?)?"
+)
 
 
 def num_digits(s: str):
     return sum(c.isdigit() for c in s)
 
 
-def guess_type(s: str):
-    """Guess datetime data type for input string. Supports ISO 8601.
-    Uses pendulum parser to determine if input is valid date(time).
+def _fromisoformat(s: str, m) -> bool:
+    """Validate ranges of ISO 8601 match via datetime.fromisoformat.
+
+    If input is rejected, the match is normalized to the extended format, basic
+    format and `Z` are not accepted by fromisoformat before Python 3.11.
     """
 
+    try:
+        datetime.fromisoformat(s)
+        return True
+    except ValueError:
+        pass
+
+    g = m.groupdict()
+    try:
+        if g["hour"] is None:
+            date.fromisoformat(f"{g['year']}-{g['month']}-{g['day']}")
+            return True
+
+        s = (
+            f"{g['year']}-{g['month']}-{g['day']}T{g['hour']}:"
+            f"{g['minute'] or '00'}:{g['second'] or '00'}"
+        )
+        if g["fraction"]:
+            s += "." + g["fraction"][:6].ljust(6, "0")
+        if g["tz"] == "Z":
+            s += "+00:00"
+        elif g["tz"]:
+            s += f"{g['tz'][0]}{g['tz_hour']}:{g['tz_minute'] or '00'}"
+
+        datetime.fromisoformat(s)
+    except ValueError:
+        return False
+    return True
+
+
+def _pendulum_type(s: str) -> Optional[str]:
+    from pendulum import parse
+
     n = num_digits(s)
 
     # ISO 8601 dates have at least 8 digits
@@ -28,3 +93,147 @@ def guess_type(s: str):
     else:
         dtype = "TIMESTAMP"
     return dtype
+
+
+def guess_type(s: str, fallback: bool = False) -> Optional[str]:
+    """Guess datetime data type for input string. Supports ISO 8601.
+
+    Strings are matched against the ISO 8601 shape and validated via
+    datetime.fromisoformat. If `fallback` is enabled, strings failing either check
+    are parsed by pendulum, which is slow and only imported when used.
+    """
+
+    dtype = None
+    if len(s) >= MIN_LEN:
+        m = ISO_8601.fullmatch(s)
+        if m and _fromisoformat(s, m):
+            dtype = "DATE" if m.group("hour") is None else "TIMESTAMP"
+
+    if dtype is None and fallback:
+        dtype = _pendulum_type(s)
+    return dtype
+
+
+# learned formats -----------------------------------------------------------------------
+
+
+@lru_cache(maxsize=None)
+def compile_layout(pattern: str):
+    return re.compile(pattern)
+
+
+def layout_pattern(s: str):
+    """Compiled pattern of ISO 8601 layout of s (date separator, time separator).
+
+    Returns: None if s is not ISO 8601 shaped
+    """
+
+    m = ISO_8601.fullmatch(s)
+    if not m:
+        return None
+
+    sep = m.group("sep")
+    pattern = f"[0-9]{{4}}{sep}[0-9]{{2}}{sep}[0-9]{{2}}"
+    if m.group("hour") is not None:
+        pattern += re.escape(s[m.end("day")]) + _TIME
+    return compile_layout(pattern)
+
+
+class TypedStr(str):
+    """String value with known dtype, see data_types.set_dtype."""
+
+    def __new__(cls, value: str, dtype: str):
+        obj = super().__new__(cls, value)
+        obj.dtype = dtype
+        return obj
+
+    def __reduce__(self):
+        return TypedStr, (str(self), self.dtype)
+
+
+class FormatCache:
+    """Learned date format of string values under one path.
+
+    The first value selects the dtype (DATE, TIMESTAMP or VARCHAR) and its ISO 8601
+    layout. The next `learn_size` values are fully validated via guess_type, later
+    values are only checked against the compiled layout. Paths are demoted to
+    VARCHAR on the first mismatch, VARCHAR paths are never checked again.
+    """
+
+    __slots__ = ("dtype", "pattern", "num_validate", "fallback")
+
+    # values validated via guess_type after the first value
+    learn_size = 8
+
+    def __init__(self, fallback: bool = False):
+        self.dtype = None
+        self.pattern = None
+        self.num_validate = self.learn_size
+        self.fallback = fallback
+
+    def __repr__(self) -> str:
+        return f"FormatCache({self.dtype}, {self.pattern and self.pattern.pattern})"
+
+    def copy(self) -> "FormatCache":
+        fmt = FormatCache(self.fallback)
+        fmt.dtype, fmt.pattern = self.dtype, self.pattern
+        fmt.num_validate = self.num_validate
+        return fmt
+
+    @property
+    def layout(self) -> Optional[str]:
+        """Source of learned layout pattern, compiled patterns may be distinct
+        objects after pickling or loading state."""
+
+        return self.pattern and self.pattern.pattern
+
+    def demote(self):
+        self.dtype = VARCHAR
+        self.pattern = None
+
+    def add(self, s: str):
+        dtype = self.dtype
+        if dtype == VARCHAR:
+            return
+
+        if dtype is None:
+            self.dtype = guess_type(s, self.fallback) or VARCHAR
+            if self.dtype != VARCHAR:
+                self.pattern = layout_pattern(s)
+        elif self.pattern is not None and not self.pattern.fullmatch(s):
+            self.demote()
+        elif self.num_validate or self.pattern is None:
+            # pattern is None for fallback formats, always validated
+            if self.num_validate:
+                self.num_validate -= 1
+            if guess_type(s, self.fallback) != dtype:
+                self.demote()
+
+    def add_many(self, values):
+        add = self.add
+        for s in values:
+            if self.dtype == VARCHAR:
+                break
+            add(s)
+
+    def merge(self, other: "FormatCache") -> "FormatCache":
+        """Merge learned format of other in place.
+
+        Returns: self
+        """
+
+        if other.dtype is None:
+            return self
+        if self.dtype is None:
+            self.dtype, self.pattern = other.dtype, other.pattern
+            self.num_validate = other.num_validate
+        elif self.dtype != other.dtype or self.layout != other.layout:
+            self.demote()
+        else:
+            self.num_validate = min(self.num_validate, other.num_validate)
+        return self
+
+    def typed(self, s: str):
+        """Value typed by learned format, unchanged if nothing was learned."""
+
+        return s if self.dtype is None or s is None else TypedStr(s, self.dtype)
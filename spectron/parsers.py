@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from . import merge
+
+logger = logging.getLogger(__name__)
+
+
+class Backend(NamedTuple):
+    """JSON parser backend.
+
+    Lazy backends return container types other than dict / list, these are
+    registered with merge so documents are walked without building Python dicts.
+
+    Backends decoding numbers differently from json (`exact` is False) are not
+    selected automatically, e.g. orjson decodes ints exceeding 64 bits as floats.
+    """
+
+    name: str
+    loads: Callable
+    mapping_types: Tuple[type, ...] = ()
+    sequence_types: Tuple[type, ...] = ()
+    exact: bool = True
+
+
+# backends in order of preference for auto selection, ranked by end to end scans
+# (see benchmarks/bench_parsers.py): walking lazy simdjson documents costs more than
+# decoding dicts, simdjson ranks after json and is only used if selected
+PRIORITY = ("orjson", "ujson", "json", "simdjson")
+
+_factories: Dict[str, Callable[[], Backend]] = {}
+_backends: Dict[str, Backend] = {}
+
+
+def register(name: str):
+    """Register backend factory, factory should raise ImportError if unavailable."""
+
+    def wrapper(factory: Callable[[], Backend]):
+        _factories[name] = factory
+        _backends.pop(name, None)
+        return factory
+
+    return wrapper
+
+
+def _with_fallback(loads: Callable) -> Callable:
+    """Decode documents rejected by loads via json, e.g. ints exceeding 64 bits,
+    NaN or Infinity. Invalid JSON raises json.JSONDecodeError."""
+
+    def wrapper(s):
+        try:
+            return loads(s)
+        except (ValueError, RuntimeError):
+            return json.loads(s)
+
+    return wrapper
+
+
+@register("orjson")
+def _orjson() -> Backend:
+    import orjson
+
+    # ints exceeding 64 bits are decoded as floats without error
+    return Backend("orjson", _with_fallback(orjson.loads), exact=False)
+
+
+@register("simdjson")
+def _simdjson() -> Backend:
+    import simdjson
+
+    pool = [simdjson.Parser()]
+
+    def loads(s):
+        # a parser can't be reused while documents referencing it are alive
+        for parser in pool:
+            try:
+                return parser.parse(s)
+            except RuntimeError:
+                continue
+
+        parser = simdjson.Parser()
+        doc = parser.parse(s)
+        pool.append(parser)
+        return doc
+
+    return Backend(
+        "simdjson", _with_fallback(loads), (simdjson.Object,), (simdjson.Array,)
+    )
+
+
+@register("ujson")
+def _ujson() -> Backend:
+    import ujson
+
+    return Backend("ujson", _with_fallback(ujson.loads))
+
+
+@register("json")
+def _json() -> Backend:
+    return Backend("json", json.loads)
+
+
+def _load(name: str) -> Backend:
+    if name not in _backends:
+        if name not in _factories:
+            raise ValueError(
+                f"Unknown parser backend: {name}, options: {', '.join(_factories)}"
+            )
+
+        backend = _factories[name]()
+        merge.register_container_types(backend.mapping_types, backend.sequence_types)
+        _backends[name] = backend
+
+    return _backends[name]
+
+
+def _ordered() -> List[str]:
+    names = [n for n in PRIORITY if n in _factories]
+    names.extend(n for n in _factories if n not in PRIORITY)
+    return names
+
+
+def available() -> List[str]:
+    """Names of installed backends in order of preference."""
+
+    names = []
+    for name in _ordered():
+        try:
+            _load(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend(name: Optional[str] = None) -> Backend:
+    """Get parser backend by name, None or `auto` selects fastest installed backend
+    decoding numbers same as json, see Backend.exact."""
+
+    if name is not None and name != "auto":
+        return _load(name)
+
+    for name in _ordered():
+        try:
+            backend = _load(name)
+        except ImportError:
+            continue
+        if not backend.exact:
+            continue
+        logger.debug(f"Using parser backend: {name}")
+        return backend
+
+    raise ImportError("No JSON parser backend available...")
+
+
+def as_dict(doc) -> Dict:
+    """Materialize document from lazy backend as dict."""
+
+    if isinstance(doc, dict):
+        return doc
+    return doc.as_dict()
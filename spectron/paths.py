@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+import fnmatch
+import re
+import sys
+
+from array import array
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import merge
+
+
+ARRAY_KEY = "[array]"
+MAP_KEY = "[map]"
+ROOT = 0
+
+
+class PathTable:
+    """Intern key paths as compact integer IDs.
+
+    Each path is stored once as (parent ID, key): child IDs are resolved by a
+    single (parent ID, key) dict, parents, array flags and child lists (first child,
+    next sibling) are kept in arrays. Path tuples are not stored, they are built on
+    request, see path. ID 0 is the root (empty path).
+
+    Map parents (see set_map) resolve any child key to their single `[map]` child.
+    """
+
+    def __init__(self, case_insensitive: bool = False):
+        self.case_insensitive = case_insensitive
+        self.ids: Dict[Tuple[int, str], int] = {}
+        self.parents = array("i", [-1])
+        self.names: List[Optional[str]] = [None]
+        self.is_array = bytearray(1)
+        self.num_children = array("i", [0])
+        self.map_ids: Dict[int, int] = {}  # map parent ID: [map] child ID
+
+        # child lists, 0 terminates (root is never a child)
+        self._first_child = array("i", [0])
+        self._next_sibling = array("i", [0])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def child(self, parent_id: int, name: str) -> int:
+        """Get or create ID of child key."""
+
+        path_id = self.ids.get((parent_id, name))
+        if path_id is None:
+            return self._add_child(parent_id, name)
+        return path_id
+
+    def _add_child(self, parent_id: int, name: str) -> int:
+        map_id = self.map_ids.get(parent_id)
+        if map_id is not None:
+            return map_id
+
+        ids = self.ids
+        key = name.lower() if self.case_insensitive else name
+        path_id = ids.get((parent_id, key))
+
+        if path_id is None:
+            key = sys.intern(key)
+            path_id = len(self.names)
+            self.parents.append(parent_id)
+            self.names.append(key)
+            self.is_array.append(key == ARRAY_KEY)
+            self.num_children.append(0)
+            self.num_children[parent_id] += 1
+            self._first_child.append(0)
+            self._next_sibling.append(self._first_child[parent_id])
+            self._first_child[parent_id] = path_id
+            ids[(parent_id, key)] = path_id
+
+        ids[(parent_id, name)] = path_id
+        return path_id
+
+    def intern(self, path: Tuple[str]) -> int:
+        """Get or create ID of path."""
+
+        path_id = ROOT
+        for name in path:
+            path_id = self.child(path_id, name)
+        return path_id
+
+    def path(self, path_id: int) -> Tuple[str]:
+        """Get path tuple for ID, built from parents, no recursion for deep paths."""
+
+        names, parents = self.names, self.parents
+        keys = []
+        while path_id > ROOT:
+            keys.append(names[path_id])
+            path_id = parents[path_id]
+        return tuple(reversed(keys))
+
+    def set_map(self, parent_id: int) -> int:
+        """Resolve all child keys of parent to its `[map]` child, returns map ID.
+
+        Previous child IDs are detached from parent, they are kept in the table but
+        no longer resolved or listed.
+        """
+
+        map_id = self.child(parent_id, MAP_KEY)
+        ids, names = self.ids, self.names
+        detached = {i for i in self.child_ids(parent_id) if i != map_id}
+        for child_id in detached:
+            del ids[(parent_id, names[child_id])]
+        if self.case_insensitive:
+            # keys as seen, resolved to lowercase child keys
+            aliases = [k for k in ids if k[0] == parent_id and ids[k] in detached]
+            for k in aliases:
+                del ids[k]
+
+        self._first_child[parent_id] = map_id
+        self._next_sibling[map_id] = 0
+        self.num_children[parent_id] = 1
+        self.map_ids[parent_id] = map_id
+        return map_id
+
+    def child_ids(self, path_id: int) -> List[int]:
+        """Unique child IDs in order created."""
+
+        first_child, next_sibling = self._first_child, self._next_sibling
+        child_ids = []
+        child_id = first_child[path_id]
+        while child_id:
+            child_ids.append(child_id)
+            child_id = next_sibling[child_id]
+        child_ids.reverse()
+        return child_ids
+
+
+class PathMatcher:
+    """Ignore / include rules for key paths, compiled once.
+
+    Rules are dotted paths, each key may be a glob (see fnmatch) and `**` matches
+    any number of keys. Array elements are matched by the `[array]` key, e.g.
+    `events.[array].debug`. An ignore rule without dots matches the last key of a
+    path at any depth, same as ignore_fields, include rules always match from the
+    top level key.
+
+    A path is pruned if it matches an ignore rule, or if include rules are set and
+    the path neither is, is below or leads to an included path. Ancestors are
+    expected to be checked first, pruned subtrees are never visited.
+    """
+
+    DEEP = "**"
+
+    def __init__(
+        self,
+        ignore: Optional[Sequence[str]] = None,
+        include: Optional[Sequence[str]] = None,
+        case_insensitive: bool = False,
+    ):
+        self.case_insensitive = case_insensitive
+        self.ignore = [self._compile(rule, anywhere=True) for rule in ignore or ()]
+        self.include = [self._compile(rule) for rule in include or ()]
+        self._cache: Dict[Tuple[str], bool] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.ignore or self.include)
+
+    def _compile(self, rule: str, anywhere: bool = False) -> Tuple:
+        if self.case_insensitive:
+            rule = rule.lower()
+
+        keys = rule.split(".")
+        if anywhere and len(keys) == 1:
+            keys.insert(0, self.DEEP)
+
+        compiled = []
+        for key in keys:
+            if key == self.DEEP or key == ARRAY_KEY:
+                compiled.append(key)
+            elif any(c in key for c in "*?["):
+                compiled.append(re.compile(fnmatch.translate(key)))
+            else:
+                compiled.append(key)
+        return tuple(compiled)
+
+    @staticmethod
+    def _match_key(rule_key, key: str) -> bool:
+        if isinstance(rule_key, str):
+            return rule_key == key
+        return rule_key.match(key) is not None
+
+    def _match(self, rule: Tuple, path: Tuple[str], i: int = 0, j: int = 0) -> bool:
+        """Rule matches full path."""
+
+        while i < len(rule):
+            if rule[i] == self.DEEP:
+                return any(
+                    self._match(rule, path, i + 1, k) for k in range(j, len(path) + 1)
+                )
+            if j >= len(path) or not self._match_key(rule[i], path[j]):
+                return False
+            i += 1
+            j += 1
+        return j == len(path)
+
+    def _leads_to(self, rule: Tuple, path: Tuple[str]) -> bool:
+        """Path is a prefix of paths matching rule."""
+
+        for i, key in enumerate(path):
+            if i >= len(rule):
+                return False
+            if rule[i] == self.DEEP:
+                return True
+            if not self._match_key(rule[i], key):
+                return False
+        return True
+
+    def _included(self, path: Tuple[str]) -> bool:
+        for rule in self.include:
+            if self._leads_to(rule, path):
+                return True
+            if any(self._match(rule, path[:n]) for n in range(1, len(path) + 1)):
+                return True
+        return False
+
+    def pruned(self, path: Tuple[str]) -> bool:
+        """Path (and subtree) is excluded, results are cached per path."""
+
+        is_pruned = self._cache.get(path)
+        if is_pruned is None:
+            is_pruned = self._cache[path] = self._pruned(path)
+        return is_pruned
+
+    def _pruned(self, path: Tuple[str]) -> bool:
+        if self.case_insensitive:
+            path = tuple(k.lower() for k in path)
+
+        return any(self._match(rule, path) for rule in self.ignore) or (
+            bool(self.include) and not self._included(path)
+        )
+
+
+class PrunedIds:
+    """PathMatcher results per interned path ID of table, path tuples are not
+    cached."""
+
+    def __init__(self, table: PathTable, matcher: PathMatcher):
+        self.table = table
+        self.matcher = matcher
+        self.flags = [False]
+
+    def __call__(self, path_id: int) -> bool:
+        flags = self.flags
+        if path_id >= len(flags):
+            path, pruned = self.table.path, self.matcher._pruned
+            flags.extend(pruned(path(i)) for i in range(len(flags), len(self.table)))
+        return flags[path_id]
+
+
+def extract_terminal_ids(
+    d: Any,
+    table: PathTable,
+    parent_id: int = ROOT,
+    budget: Optional[merge.ArrayBudget] = None,
+    pruned: Optional[Callable[[int], bool]] = None,
+) -> List[Tuple[int, Any]]:
+    """Same as merge.extract_terminal_keys, returning interned path IDs as keys.
+
+    Skipped array elements are counted per array path ID. Subtrees of path IDs
+    for which `pruned` is True are not visited, see PrunedIds. Prefer
+    traverse.walk with a sink to avoid collecting pairs.
+    """
+
+    from .traverse import walk
+
+    items = []
+    walk(
+        d,
+        table,
+        lambda path_id, value: items.append((path_id, value)),
+        parent_id,
+        budget,
+        pruned,
+    )
+    return items
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+import io
+import logging
+import mmap
+import os
+import sys
+
+from contextlib import contextmanager
+from json import JSONDecoder
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    IO,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import json
+
+from . import decompress
+from . import merge
+from . import parsers
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2 ** 16
+WHITESPACE = " \t\n\r"
+
+_decoder = JSONDecoder()
+
+
+def iter_items(doc: Any) -> Generator[Dict, None, None]:
+    """Yield dict document(s) from parsed JSON value."""
+
+    if isinstance(doc, merge.MAPPING_TYPES):
+        yield doc
+    elif isinstance(doc, merge.SEQUENCE_TYPES) and all(
+        isinstance(sd, merge.MAPPING_TYPES) for sd in doc
+    ):
+        yield from doc
+    else:
+        raise ValueError("Unsupported input, type must be dict or [dict,]...")
+
+
+def iter_lines(infile: IO, loads: Callable = json.loads) -> Generator[Dict, None, None]:
+    """Yield documents from newline delimited JSON, one line at a time."""
+
+    for line in infile:
+        line = line.strip()
+        if line:
+            yield from iter_items(loads(line))
+
+
+def iter_raw_lines(
+    infile: IO, loads: Callable = json.loads
+) -> Generator[Union[str, Dict], None, None]:
+    """Yield objects of newline delimited JSON as undecoded lines.
+
+    Lines holding arrays of documents are decoded and yield each document, so
+    every yielded item is a single document. Lines are not validated.
+    """
+
+    for line in infile:
+        line = line.strip()
+        if line.startswith("{"):
+            yield line
+        elif line:
+            yield from iter_items(loads(line))
+
+
+def _skip_whitespace(infile: IO) -> str:
+    """Consume leading whitespace and return first non-whitespace char."""
+
+    c = infile.read(1)
+    while c and c in WHITESPACE:
+        c = infile.read(1)
+    return c
+
+
+def _decode_container(buf: str, pos: int, loads: Callable) -> Tuple[Any, int]:
+    """Decode object or array starting at pos via loads.
+
+    Candidate ends are closing brackets balancing the opening bracket, confirmed by
+    decoding. Brackets within strings may unbalance counts, if no candidate is
+    confirmed the end is located by json.JSONDecoder.raw_decode instead.
+
+    Returns: (value, end)
+    Raises: ValueError if value is incomplete or invalid
+    """
+
+    open_c = buf[pos]
+    close_c = "}" if open_c == "{" else "]"
+
+    balance, last, end = 0, pos, pos
+    while True:
+        end = buf.find(close_c, end + 1)
+        if end == -1:
+            _, end = _decoder.raw_decode(buf, pos)
+            return loads(buf[pos:end]), end
+
+        segment = buf[last : end + 1]
+        balance += segment.count(open_c) - segment.count(close_c)
+        last = end + 1
+        if balance == 0:
+            try:
+                return loads(buf[pos : end + 1]), end + 1
+            except ValueError:
+                continue
+
+
+def iter_array(
+    infile: IO, chunk_size: int = CHUNK_SIZE, loads: Callable = json.loads
+) -> Generator[Dict, None, None]:
+    """Yield elements of top level JSON array incrementally.
+
+    Opening bracket must already be consumed from infile. Input is read in chunks
+    and each element is decoded as soon as it is complete, so memory is bounded by
+    the largest element rather than the array. Objects and arrays are decoded by
+    `loads`, see parsers.get_backend.
+    """
+
+    buf, pos = "", 0
+    eof = False
+    expect_value = True
+    num_items = 0
+    read_size = chunk_size
+
+    while True:
+        while pos < len(buf) and buf[pos] in WHITESPACE:
+            pos += 1
+
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unterminated array...")
+            buf, pos = infile.read(read_size), 0
+            eof = not buf
+            continue
+
+        c = buf[pos]
+        if not expect_value:
+            if c == ",":
+                expect_value = True
+                pos += 1
+                continue
+            if c == "]":
+                break
+            raise ValueError(f"Expecting ',' delimiter in array at item {num_items}")
+
+        if c == "]" and not num_items:
+            break
+
+        try:
+            if c in "{[" and loads is not json.loads:
+                item, end = _decode_container(buf, pos, loads)
+            else:
+                item, end = _decoder.raw_decode(buf, pos)
+        except ValueError:
+            item, end = None, None
+            if eof:
+                raise
+
+        # incomplete element or value possibly truncated at end of chunk
+        if end is None or (end == len(buf) and not eof):
+            chunk = infile.read(read_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            read_size *= 2
+            continue
+
+        yield from iter_items(item)
+        num_items += 1
+        expect_value = False
+        read_size = chunk_size
+        pos = end
+
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+    if (buf[pos + 1 :] + infile.read(chunk_size)).strip():
+        raise ValueError("Extra data after array...")
+
+
+def iter_documents(
+    infile: IO,
+    lines: Optional[bool] = None,
+    loads: Callable = json.loads,
+    raw: bool = False,
+) -> Generator[Dict, None, None]:
+    """Yield dict documents from JSON infile.
+
+    Top level shape is detected from the first non-whitespace char:
+        - [ : array elements are decoded incrementally
+        - otherwise newline delimited JSON is detected when the first line is a
+          complete document, else the file is parsed as a single document.
+
+    Kwargs:
+        lines (bool):
+            - default: None
+            - True forces newline delimited JSON, False forces a single document
+        loads (callable):
+            - default: json.loads
+        raw (bool):
+            - default: False
+            - True yields newline delimited objects as undecoded lines, see
+              iter_raw_lines, documents of other input are decoded
+    """
+
+    read_lines = iter_raw_lines if raw else iter_lines
+
+    if lines:
+        yield from read_lines(infile, loads)
+        return
+
+    if lines is False:
+        yield from iter_items(loads(infile.read()))
+        return
+
+    first_char = _skip_whitespace(infile)
+    if first_char == "[":
+        yield from iter_array(infile, loads=loads)
+        return
+
+    first_line = first_char + infile.readline()
+    try:
+        doc = loads(first_line)
+    except ValueError:
+        yield from iter_items(loads(first_line + infile.read()))
+    else:
+        logger.debug("Newline delimited JSON detected")
+        yield from iter_items(doc)
+        yield from read_lines(infile, loads)
+
+
+@contextmanager
+def open_infile(infile: Union[str, Path, IO], threaded: bool = True):
+    """Open filepath for reading as text, `-` reads from stdin.
+
+    Compressed input (gzip, bz2, xz, zstd) is detected by magic bytes and
+    decompressed in a background thread. File objects pass through.
+    """
+
+    if hasattr(infile, "read"):
+        yield infile
+        return
+
+    is_stdin = str(infile) == "-"
+    stream = sys.stdin.buffer if is_stdin else open(infile, "rb")
+
+    try:
+        binary = decompress.open_binary(stream, threaded)
+        f = io.TextIOWrapper(binary)
+        try:
+            yield f
+        finally:
+            # close decompressing readers only, stream is closed below
+            if binary is stream:
+                f.detach()
+            else:
+                f.close()
+    finally:
+        if not is_stdin:
+            stream.close()
+
+
+def iter_files(
+    infiles: Iterable[Union[str, Path, IO]],
+    lines: Optional[bool] = None,
+    parser: Optional[str] = None,
+    raw: bool = False,
+) -> Generator[Dict, None, None]:
+    """Yield dict documents from each infile, opening one file at a time.
+
+    Kwargs:
+        lines (bool):
+            - default: None
+            - see iter_documents
+        parser (str):
+            - default: None
+            - parser backend name, see parsers.get_backend
+        raw (bool):
+            - default: False
+            - see iter_documents
+    """
+
+    loads = parsers.get_backend(parser).loads
+    for infile in infiles:
+        with open_infile(infile) as f:
+            yield from iter_documents(f, lines=lines, loads=loads, raw=raw)
+
+
+def is_json_lines(path: Union[str, Path]) -> bool:
+    """Detect newline delimited JSON from the first non-empty line of filepath."""
+
+    with open_infile(path, threaded=False) as f:
+        first_char = _skip_whitespace(f)
+        if not first_char or first_char == "[":
+            return False
+        try:
+            json.loads(first_char + f.readline())
+        except ValueError:
+            return False
+    return True
+
+
+# Byte ranges --------------------------------------------------------------------------
+
+
+def split_ranges(path: Union[str, Path], num_ranges: int) -> List[Tuple[int, int]]:
+    """Split file into contiguous byte ranges which start and end on line breaks."""
+
+    size = os.path.getsize(path)
+    if not size:
+        return []
+
+    num_ranges = max(1, min(num_ranges, size))
+    step = size // num_ranges
+
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        for n in range(1, num_ranges):
+            if start >= size:
+                break
+
+            f.seek(max(start, n * step))
+            f.readline()
+            end = f.tell()
+
+            if end > start:
+                ranges.append((start, end))
+                start = end
+
+        if start < size:
+            ranges.append((start, size))
+
+    return ranges
+
+
+def iter_range(
+    path: Union[str, Path], start: int, end: int, loads: Callable = json.loads
+) -> Generator[Dict, None, None]:
+    """Yield documents from memory-mapped lines within byte range [start, end)."""
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = start
+            while pos < end:
+                line_end = mm.find(b"\n", pos, end)
+                if line_end == -1:
+                    line_end = end
+
+                line = mm[pos:line_end].strip()
+                if line:
+                    yield from iter_items(loads(line))
+                pos = line_end + 1
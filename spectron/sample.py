@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from . import parsers
+from . import read_json
+
+# sampled over all input
+GLOBAL_MODES = ("reservoir", "dir")
+
+# sampled per input file, files can be sampled independently
+FILE_MODES = ("head", "tail", "head_tail", "file")
+
+MODES = (*GLOBAL_MODES, *FILE_MODES)
+
+
+class Sample(NamedTuple):
+    """Document sampling.
+
+    Modes:
+        - reservoir: uniform sample of `size` documents over all input
+        - head: first `size` documents per file
+        - tail: last `size` documents per file
+        - head_tail: first and last `size` documents per file
+        - file: uniform sample of `size` documents per file
+        - dir: uniform sample of `size` documents per directory (partition)
+
+    Random modes are reproducible if `seed` is set, sampled documents are yielded
+    in input order.
+    """
+
+    mode: str
+    size: int
+    seed: Optional[int] = None
+
+    @property
+    def per_file(self) -> bool:
+        return self.mode in FILE_MODES
+
+
+def validate(sample: Sample):
+    if sample.mode not in MODES:
+        raise ValueError(f"Unknown sample mode: {sample.mode}, options: {MODES}")
+    if sample.size < 1:
+        raise ValueError(f"Sample size must be positive: {sample.size}")
+
+
+def _uniform(rng: random.Random) -> float:
+    """Uniform float in open interval (0, 1)."""
+
+    u = rng.random()
+    while not u:
+        u = rng.random()
+    return u
+
+
+def _identity(item):
+    return item
+
+
+def reservoir(
+    items: Iterable,
+    k: int,
+    rng: random.Random,
+    materialize: Callable = _identity,
+) -> List:
+    """Uniform sample of k items in input order, reservoir Algorithm L.
+
+    Random numbers are only drawn for accepted items, skipped items are only
+    consumed. Accepted items are passed through `materialize`, e.g. to decode raw
+    lines or copy lazy documents, see _decoder.
+    """
+
+    it = enumerate(items)
+    res = [(ix, materialize(item)) for ix, item in islice(it, k)]
+
+    if res and len(res) == k:
+        w = math.exp(math.log(_uniform(rng)) / k)
+        while True:
+            skip = math.floor(math.log(_uniform(rng)) / math.log1p(-w))
+            nxt = next(islice(it, skip, None), None)
+            if nxt is None:
+                break
+
+            res[rng.randrange(k)] = (nxt[0], materialize(nxt[1]))
+            w *= math.exp(math.log(_uniform(rng)) / k)
+
+        res.sort(key=lambda t: t[0])
+
+    return [item for _, item in res]
+
+
+def head_tail(
+    items: Iterable, head: int, tail: int, materialize: Callable = _identity
+) -> Generator:
+    """Yield first `head` and last `tail` items, items are never repeated.
+
+    Yielded items are passed through `materialize`, see reservoir.
+    """
+
+    it = iter(items)
+    yield from map(materialize, islice(it, head))
+    if tail:
+        yield from map(materialize, deque(it, maxlen=tail))
+
+
+def _rng(sample: Sample, key: str = "") -> random.Random:
+    # string seeds are hashed deterministically, files are sampled independently
+    return random.Random(None if sample.seed is None else f"{sample.seed}:{key}")
+
+
+def _decoder(parser: Optional[str] = None) -> Callable:
+    """Materialize items of read_json.iter_files(raw=True) as dicts.
+
+    Raw newline delimited lines are decoded, so documents skipped by sampling are
+    never decoded.
+    """
+
+    loads = parsers.get_backend(parser).loads
+
+    def decode(item) -> Dict:
+        return parsers.as_dict(loads(item) if isinstance(item, str) else item)
+
+    return decode
+
+
+def iter_file(
+    path: Union[str, Path], sample: Sample, lines=None, parser=None
+) -> Generator[Dict, None, None]:
+    """Yield sampled documents of a single file for per file modes."""
+
+    if sample.mode == "head":
+        docs = read_json.iter_files([path], lines=lines, parser=parser)
+        yield from islice(docs, sample.size)
+        docs.close()
+        return
+
+    docs = read_json.iter_files([path], lines=lines, parser=parser, raw=True)
+    decode = _decoder(parser)
+    if sample.mode == "tail":
+        yield from head_tail(docs, 0, sample.size, decode)
+    elif sample.mode == "head_tail":
+        yield from head_tail(docs, sample.size, sample.size, decode)
+    elif sample.mode == "file":
+        yield from reservoir(docs, sample.size, _rng(sample, str(path)), decode)
+    else:
+        raise ValueError(f"Sample mode is not per file: {sample.mode}")
+
+
+def iter_sample(
+    paths: Iterable[Union[str, Path]],
+    sample: Sample,
+    lines: Optional[bool] = None,
+    parser: Optional[str] = None,
+) -> Generator[Dict, None, None]:
+    """Yield sampled documents from paths.
+
+    Kwargs:
+        lines, parser: see read_json.iter_files
+    """
+
+    validate(sample)
+
+    if sample.per_file:
+        for path in paths:
+            yield from iter_file(path, sample, lines=lines, parser=parser)
+
+    elif sample.mode == "reservoir":
+        docs = read_json.iter_files(paths, lines=lines, parser=parser, raw=True)
+        yield from reservoir(docs, sample.size, _rng(sample), _decoder(parser))
+
+    elif sample.mode == "dir":
+        strata = {}
+        for path in paths:
+            strata.setdefault(str(Path(path).parent), []).append(path)
+
+        for key, dir_paths in strata.items():
+            docs = read_json.iter_files(dir_paths, lines=lines, parser=parser, raw=True)
+            yield from reservoir(docs, sample.size, _rng(sample, key), _decoder(parser))
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from . import decompress
+from . import parsers
+from . import read_json
+from . import sample as sampling
+from .MaxDict import MaxDict
+
+logger = logging.getLogger(__name__)
+
+# number of tasks submitted per worker, smooths out uneven file sizes
+TASKS_PER_JOB = 4
+
+# newline delimited JSON files larger than this are split into byte ranges
+MIN_SHARD_SIZE = 2 ** 25
+
+
+def scan_paths(
+    paths: Sequence[Union[str, Path]],
+    lines: Optional[bool] = None,
+    parser: Optional[str] = None,
+    sample: Optional[sampling.Sample] = None,
+    **kwargs,
+) -> MaxDict:
+    """Load all (or sampled) documents from paths into a single MaxDict.
+
+    Kwargs are passed to MaxDict.
+    """
+
+    if sample:
+        docs = sampling.iter_sample(paths, sample, lines=lines, parser=parser)
+    else:
+        docs = read_json.iter_files(paths, lines=lines, parser=parser)
+
+    md = MaxDict(**kwargs)
+    md.batch_load_dicts(docs)
+    return md
+
+
+def _scan_task(task: Dict) -> MaxDict:
+    lines, parser, sample = task["lines"], task["parser"], task.get("sample")
+    loads = parsers.get_backend(parser).loads
+
+    md = MaxDict(**task["kwargs"])
+    for unit in task["units"]:
+        if isinstance(unit, tuple):
+            md.batch_load_dicts(read_json.iter_range(*unit, loads=loads))
+        elif sample:
+            md.batch_load_dicts(
+                sampling.iter_file(unit, sample, lines=lines, parser=parser)
+            )
+        else:
+            md.batch_load_dicts(
+                read_json.iter_files([unit], lines=lines, parser=parser)
+            )
+    return md
+
+
+def tree_merge(partials: List[MaxDict]) -> MaxDict:
+    """Reduce partial MaxDicts pairwise in place, preserving input order."""
+
+    if not partials:
+        raise ValueError("No partials to merge...")
+
+    while len(partials) > 1:
+        merged = [a.merge(b) for a, b in zip(partials[::2], partials[1::2])]
+        if len(partials) % 2:
+            merged.append(partials[-1])
+        partials = merged
+
+    return partials[0]
+
+
+def split_paths(paths: Sequence, num_chunks: int) -> List[Sequence]:
+    """Split paths into contiguous chunks of near equal length."""
+
+    num_chunks = max(1, min(num_chunks, len(paths)))
+    size, rem = divmod(len(paths), num_chunks)
+
+    chunks, ix = [], 0
+    for n in range(num_chunks):
+        end = ix + size + (1 if n < rem else 0)
+        chunks.append(paths[ix:end])
+        ix = end
+    return chunks
+
+
+def shard_path(
+    path: Union[str, Path], num_shards: int, lines: Optional[bool] = None
+) -> List[Union[str, Path, Tuple[str, int, int]]]:
+    """Split large newline delimited JSON file into (path, start, end) byte ranges.
+
+    Compressed and other files are returned as a single unit.
+    """
+
+    if lines is False or str(path) == "-" or num_shards < 2:
+        return [path]
+
+    size = os.path.getsize(path)
+    num_shards = min(num_shards, size // MIN_SHARD_SIZE)
+    if num_shards < 2:
+        return [path]
+
+    with open(path, "rb") as f:
+        if decompress.detect_compression(f):
+            return [path]
+
+    if not (lines or read_json.is_json_lines(path)):
+        return [path]
+
+    ranges = read_json.split_ranges(path, num_shards)
+    logger.info(f"Sharding {path} into {len(ranges)} byte ranges")
+    return [(str(path), start, end) for (start, end) in ranges]
+
+
+def scan_files(
+    paths: Sequence[Union[str, Path]],
+    jobs: Optional[int] = 1,
+    lines: Optional[bool] = None,
+    parser: Optional[str] = None,
+    sample: Optional[sampling.Sample] = None,
+    **kwargs,
+) -> MaxDict:
+    """Scan paths with a process pool and merge partial MaxDicts.
+
+    Large newline delimited JSON files are split into byte ranges aligned to line
+    breaks. Each worker builds a MaxDict over a contiguous subset of files and
+    ranges. Partials are reduced in input order via tree merge, so results match a
+    sequential scan.
+
+    Kwargs:
+        jobs (int):
+            - default: 1
+            - number of worker processes, None uses all available CPUs
+        lines (bool):
+            - default: None
+            - see read_json.iter_documents
+        parser (str):
+            - default: None
+            - parser backend name, see parsers.get_backend
+        sample (sample.Sample):
+            - default: None
+            - sample documents, files are not split into byte ranges and modes
+              sampling over all input are scanned by a single process
+    Additional kwargs are passed to MaxDict.
+    """
+
+    paths = list(paths)
+    if not paths:
+        raise ValueError("Input is empty...")
+
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1
+
+    if sample:
+        sampling.validate(sample)
+        if not sample.per_file:
+            jobs = 1
+
+    if jobs == 1:
+        return scan_paths(paths, lines=lines, parser=parser, sample=sample, **kwargs)
+
+    num_tasks = jobs * TASKS_PER_JOB
+    units = []
+    for path in paths:
+        if sample:
+            units.append(path)
+        else:
+            units.extend(shard_path(path, num_tasks, lines=lines))
+
+    if len(units) == 1:
+        return scan_paths(paths, lines=lines, parser=parser, sample=sample, **kwargs)
+
+    tasks = [
+        {
+            "units": chunk,
+            "lines": lines,
+            "parser": parser,
+            "sample": sample,
+            "kwargs": kwargs,
+        }
+        for chunk in split_paths(units, num_tasks)
+    ]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    logger.info(f"Scanning {len(paths):,} files in {len(tasks):,} tasks ({jobs} jobs)")
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        partials = list(executor.map(_scan_task, tasks))
+
+    return tree_merge(partials)
+
+
+def scan_each(
+    paths: Sequence[Union[str, Path]],
+    jobs: Optional[int] = 1,
+    lines: Optional[bool] = None,
+    parser: Optional[str] = None,
+    **kwargs,
+) -> List[MaxDict]:
+    """Scan paths into one MaxDict per path, see scan_files for kwargs."""
+
+    paths = list(paths)
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1
+
+    if jobs == 1 or len(paths) < 2:
+        return [
+            scan_files([path], jobs=jobs, lines=lines, parser=parser, **kwargs)
+            for path in paths
+        ]
+
+    tasks = [
+        {"units": [path], "lines": lines, "parser": parser, "kwargs": kwargs}
+        for path in paths
+    ]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    logger.info(f"Scanning {len(paths):,} files ({jobs} jobs)")
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        return list(executor.map(_scan_task, tasks))
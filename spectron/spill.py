@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""On-disk store for Fields spilled from memory bounded MaxDicts.
+
+Fields are appended to a temporary sqlite database as serialized partials (see
+state.encode_field), a path may be spilled more than once. Partials are read back
+per path ID in the order spilled and merged, see MaxDict.max_memory.
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import weakref
+
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
+
+from . import state
+from .Field import Field
+
+logger = logging.getLogger(__name__)
+
+
+# (path ID, number of values, serialized Field)
+Row = Tuple[int, int, bytes]
+
+
+def _remove(conn: sqlite3.Connection, path: str):
+    conn.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class SpillStore:
+    """Temporary sqlite store of Field partials keyed by path ID.
+
+    The database file is created in `spill_dir` (default: system temp directory)
+    and removed once the store is closed or garbage collected.
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(
+            prefix="spectron-", suffix=".sqlite", dir=spill_dir
+        )
+        os.close(fd)
+
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute(
+            "CREATE TABLE fields "
+            "(seq INTEGER PRIMARY KEY, path_id INTEGER, num_values INTEGER, data BLOB)"
+        )
+        self.conn.execute("CREATE INDEX fields_path_id ON fields (path_id, seq)")
+        self._finalize = weakref.finalize(self, _remove, self.conn, self.path)
+        self.num_rows = 0
+
+        logger.debug(f"Spilling Fields to {self.path}")
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def close(self):
+        self._finalize()
+
+    def put_rows(self, rows: Iterable[Row]):
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT INTO fields (path_id, num_values, data) VALUES (?, ?, ?)",
+                rows,
+            )
+        self.num_rows += cur.rowcount
+
+    def put(self, items: Iterable[Tuple[int, Field]]):
+        """Append (path ID, Field) partials."""
+
+        self.put_rows(
+            (path_id, field.num_values, state.encode_field(field))
+            for path_id, field in items
+        )
+
+    def rows(self) -> Generator[Row, None, None]:
+        """Yield all rows in the order spilled."""
+
+        yield from self.conn.execute(
+            "SELECT path_id, num_values, data FROM fields ORDER BY seq"
+        )
+
+    def get(self, path_id: int, parent_key=None) -> List[Field]:
+        """Partials of path ID in the order spilled."""
+
+        cur = self.conn.execute(
+            "SELECT data FROM fields WHERE path_id = ? ORDER BY seq", (path_id,)
+        )
+        return [state.decode_field(data, parent_key) for (data,) in cur]
+
+    def num_values(self) -> Dict[int, int]:
+        """Number of non-null values spilled per path ID."""
+
+        cur = self.conn.execute(
+            "SELECT path_id, SUM(num_values) FROM fields GROUP BY path_id"
+        )
+        return dict(cur)
+
+    def move(self, old_id: int, new_id: int):
+        """Reassign partials of path ID, e.g. collapsed map keys."""
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE fields SET path_id = ? WHERE path_id = ?", (new_id, old_id)
+            )
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+"""Versioned binary serialization of MaxDict state.
+
+Partial states are small compared to the JSON they summarize, they can be emitted
+per shard and merged elsewhere (map / reduce). Layout, all unsigned integers are
+LEB128 varints and signed integers are zigzag encoded:
+
+    header: magic, version, flags (case_insensitive, str_numeric_override)
+    convergence: number of documents, last change, stop reason (empty if none)
+    paths: count, then per path ID > 0: parent ID, key, `[map]` keys mark map parents
+    skipped: count, then per array path: path ID delta, array elements skipped
+    fields: count, then per Field: path ID delta, Field
+    Field: flags, num_na, number of dtypes, per dtype in order seen: dtype, count,
+        stats (int: min, max | float: min, max | str: min len, max len, value |
+        bool: value), other types: count, per type: name, count, JSON value,
+        learned string format if flagged: dtype, layout pattern, values left to
+        validate, fallback
+
+Version 1 states (no string formats) and version 2 states (no convergence, no
+skipped elements) are read as is.
+
+Strings are length prefixed UTF-8, floats are little endian doubles.
+"""
+
+import json
+import struct
+import sys
+
+from pathlib import Path
+from typing import Iterable, Union
+
+from . import decompress
+from .Field import BOOL, DTYPES, FLOAT, INT, STR, Field
+from .MaxDict import MaxDict
+from .parse_date import FormatCache, compile_layout
+from .paths import MAP_KEY, PathTable
+
+MAGIC = b"SPXS"
+VERSION = 3
+READ_VERSIONS = (1, 2, 3)
+
+HEADER = struct.Struct("<4sBB")
+DOUBLE = struct.Struct("<d")
+
+# header, Field flags
+CASE_INSENSITIVE = 1
+STR_NUMERIC_OVERRIDE = 2
+STR_FORMAT = 4
+
+
+# encoding -----------------------------------------------------------------------------
+
+
+def _write_uint(buf: bytearray, n: int):
+    while n > 0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _write_int(buf: bytearray, n: int):
+    _write_uint(buf, n << 1 if n >= 0 else (-n << 1) - 1)
+
+
+def _write_str(buf: bytearray, s: str):
+    b = s.encode("utf-8", "surrogatepass")
+    _write_uint(buf, len(b))
+    buf += b
+
+
+def _write_field(buf: bytearray, field: Field):
+    fmt = field.str_format
+    flags = STR_NUMERIC_OVERRIDE if field.str_numeric_override else 0
+    if fmt is not None:
+        flags |= STR_FORMAT
+    buf.append(flags)
+    _write_uint(buf, field.num_na)
+
+    _write_uint(buf, len(field.order))
+    for ix in field.order:
+        buf.append(ix)
+        _write_uint(buf, field.counts[ix])
+
+        if ix == INT:
+            _write_int(buf, field.int_min)
+            _write_int(buf, field.int_max)
+        elif ix == FLOAT:
+            buf += DOUBLE.pack(field.float_min)
+            buf += DOUBLE.pack(field.float_max)
+        elif ix == STR:
+            _write_uint(buf, field.str_min_len)
+            _write_uint(buf, field.str_max_len)
+            _write_str(buf, field.str_value)
+        elif ix == BOOL:
+            buf.append(field.bool_value)
+
+    other = field.other or {}
+    _write_uint(buf, len(other))
+    for name, (count, value) in other.items():
+        _write_str(buf, name)
+        _write_uint(buf, count)
+        _write_str(buf, json.dumps(value, default=str))
+
+    if fmt is not None:
+        _write_str(buf, fmt.dtype or "")
+        _write_str(buf, fmt.pattern.pattern if fmt.pattern else "")
+        _write_uint(buf, fmt.num_validate)
+        buf.append(fmt.fallback)
+
+
+def _write_paths(buf: bytearray, table: PathTable):
+    _write_uint(buf, len(table) - 1)
+    for path_id in range(1, len(table)):
+        _write_uint(buf, table.parents[path_id])
+        _write_str(buf, table.names[path_id])
+
+
+def encode_field(field: Field) -> bytes:
+    """Serialize single Field, parent key is not included."""
+
+    buf = bytearray()
+    _write_field(buf, field)
+    return bytes(buf)
+
+
+def dumps(md: MaxDict) -> bytes:
+    """Serialize MaxDict state as bytes."""
+
+    flags = 0
+    if md.case_insensitive:
+        flags |= CASE_INSENSITIVE
+    if md.str_numeric_override:
+        flags |= STR_NUMERIC_OVERRIDE
+
+    buf = bytearray(HEADER.pack(MAGIC, VERSION, flags))
+    _write_uint(buf, md.num_docs)
+    _write_uint(buf, md.last_change)
+    _write_str(buf, md.stop_reason or "")
+
+    _write_paths(buf, md.paths)
+
+    _write_uint(buf, len(md.skipped_ids))
+    prev_id = 0
+    for path_id, n in sorted(md.skipped_ids.items()):
+        _write_uint(buf, path_id - prev_id)
+        _write_uint(buf, n)
+        prev_id = path_id
+
+    # spilled Fields are merged back one at a time, see MaxDict.iter_fields
+    fields = bytearray()
+    num_fields = prev_id = 0
+    for path_id, field in md.iter_fields():
+        _write_uint(fields, path_id - prev_id)
+        _write_field(fields, field)
+        num_fields += 1
+        prev_id = path_id
+
+    _write_uint(buf, num_fields)
+    buf += fields
+
+    return bytes(buf)
+
+
+# decoding -----------------------------------------------------------------------------
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def byte(self) -> int:
+        try:
+            b = self.data[self.pos]
+        except IndexError:
+            raise ValueError("Truncated state...") from None
+        self.pos += 1
+        return b
+
+    def uint(self) -> int:
+        n, shift = 0, 0
+        while True:
+            b = self.byte()
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def int(self) -> int:
+        z = self.uint()
+        return z >> 1 if not z & 1 else -((z + 1) >> 1)
+
+    def bytes(self, n: int) -> memoryview:
+        end = self.pos + n
+        if end > len(self.data):
+            raise ValueError("Truncated state...")
+        b = self.data[self.pos : end]
+        self.pos = end
+        return b
+
+    def str(self) -> str:
+        return str(self.bytes(self.uint()), "utf-8", "surrogatepass")
+
+    def double(self) -> float:
+        return DOUBLE.unpack(self.bytes(DOUBLE.size))[0]
+
+
+def _read_field(reader: _Reader, parent_key) -> Field:
+    field = Field(parent_key)
+    flags = reader.byte()
+    field.str_numeric_override = bool(flags & STR_NUMERIC_OVERRIDE)
+    field.num_na = reader.uint()
+
+    for _ in range(reader.uint()):
+        ix = reader.byte()
+        if ix >= len(DTYPES):
+            raise ValueError(f"Unknown dtype in state: {ix}")
+
+        field.order.append(ix)
+        field.counts[ix] = reader.uint()
+
+        if ix == INT:
+            field.int_min, field.int_max = reader.int(), reader.int()
+        elif ix == FLOAT:
+            field.float_min, field.float_max = reader.double(), reader.double()
+        elif ix == STR:
+            field.str_min_len, field.str_max_len = reader.uint(), reader.uint()
+            field.str_value = reader.str()
+        elif ix == BOOL:
+            field.bool_value = bool(reader.byte())
+
+    num_other = reader.uint()
+    if num_other:
+        field.other = {}
+        for _ in range(num_other):
+            name, count = reader.str(), reader.uint()
+            field.other[name] = (count, json.loads(reader.str()))
+
+    if flags & STR_FORMAT:
+        fmt = FormatCache()
+        fmt.dtype = reader.str() or None
+        pattern = reader.str()
+        fmt.pattern = compile_layout(pattern) if pattern else None
+        fmt.num_validate = reader.uint()
+        fmt.fallback = bool(reader.byte())
+        field.str_format = fmt
+
+    return field
+
+
+def decode_field(data: bytes, parent_key) -> Field:
+    """Deserialize single Field, see encode_field."""
+
+    reader = _Reader(data)
+    field = _read_field(reader, parent_key)
+    if reader.pos != len(data):
+        raise ValueError("Extra data after Field...")
+    return field
+
+
+def loads(data: bytes) -> MaxDict:
+    """Deserialize MaxDict state from bytes."""
+
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated state...")
+
+    magic, version, flags = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Input is not a spectron state...")
+    if version not in READ_VERSIONS:
+        raise ValueError(f"Unsupported state version: {version}, expected {VERSION}")
+
+    md = MaxDict(
+        case_insensitive=bool(flags & CASE_INSENSITIVE),
+        str_numeric_override=bool(flags & STR_NUMERIC_OVERRIDE),
+    )
+
+    reader = _Reader(data)
+    reader.pos = HEADER.size
+
+    if version >= 3:
+        md.num_docs = reader.uint()
+        md.last_change = reader.uint()
+        md.stop_reason = reader.str() or None
+
+    table = md.paths
+    for path_id in range(1, reader.uint() + 1):
+        parent_id = reader.uint()
+        if parent_id >= path_id:
+            raise ValueError(f"Invalid parent in state: {parent_id} >= {path_id}")
+        name = reader.str()
+        if table.child(parent_id, name) != path_id:
+            raise ValueError(f"Duplicate path in state: {path_id}")
+        if name == MAP_KEY:
+            table.set_map(parent_id)
+
+    if version >= 3:
+        path_id = 0
+        for _ in range(reader.uint()):
+            path_id += reader.uint()
+            if path_id >= len(table):
+                raise ValueError(f"Invalid path in state: {path_id}")
+            md.skipped_ids[path_id] = reader.uint()
+
+    field_ids = md.field_ids
+    field_ids.extend([None] * (len(table) - len(field_ids)))
+
+    path_id = 0
+    for _ in range(reader.uint()):
+        path_id += reader.uint()
+        if path_id >= len(table):
+            raise ValueError(f"Invalid path in state: {path_id}")
+        field_ids[path_id] = _read_field(reader, table.path(path_id))
+
+    if reader.pos != len(data):
+        raise ValueError("Extra data after state...")
+
+    return md
+
+
+# files --------------------------------------------------------------------------------
+
+
+def dump(md: MaxDict, path: Union[str, Path]):
+    """Write MaxDict state to path, `-` writes to stdout."""
+
+    data = dumps(md)
+    if str(path) == "-":
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    else:
+        Path(path).write_bytes(data)
+
+
+def load(path: Union[str, Path]) -> MaxDict:
+    """Read MaxDict state from path, `-` reads from stdin.
+
+    Compressed states are detected and decompressed, see decompress.
+    """
+
+    if str(path) == "-":
+        return loads(decompress.open_binary(sys.stdin.buffer, threaded=False).read())
+
+    with open(path, "rb") as f:
+        return loads(decompress.open_binary(f, threaded=False).read())
+
+
+def merge_files(paths: Iterable[Union[str, Path]]) -> MaxDict:
+    """Load and merge states in order, states are loaded one at a time."""
+
+    md = None
+    for path in paths:
+        partial = load(path)
+        md = partial if md is None else md.merge(partial)
+
+    if md is None:
+        raise ValueError("No states to merge...")
+    return md
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+"""Iterative document traversal.
+
+Terminal (path, value) pairs are passed to a sink callback in the same order as
+merge.extract_terminal_keys returns them. An explicit stack of iterators replaces
+recursion, so nesting depth is not limited by the interpreter and no generator
+frames are stacked per level.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from . import merge
+from .paths import ARRAY_KEY, ROOT, PathTable
+
+_EMPTY = object()
+
+
+def walk(
+    d: Any,
+    table: PathTable,
+    sink: Callable[[int, Any], Any],
+    parent_id: int = ROOT,
+    budget: Optional[merge.ArrayBudget] = None,
+    pruned: Optional[Callable[[int], bool]] = None,
+):
+    """Call sink(path ID, value) for each terminal key of document.
+
+    Keys are interned in table while traversing, see paths.extract_terminal_ids for
+    `budget` and `pruned`.
+    """
+
+    mapping_types, sequence_types = merge.MAPPING_TYPES, merge.SEQUENCE_TYPES
+    container_types = merge.CONTAINER_TYPES
+    child, iter_items = table.child, merge.iter_items
+
+    # (iterator, path ID, is mapping)
+    stack: List[Tuple] = []
+    node = d
+
+    while True:
+        if node is not _EMPTY:
+            if isinstance(node, mapping_types):
+                stack.append((iter(iter_items(node)), parent_id, True))
+            elif isinstance(node, sequence_types):
+                path_id = child(parent_id, ARRAY_KEY)
+                if pruned is None or not pruned(path_id):
+                    if not node:
+                        sink(path_id, None)
+                    else:
+                        if budget is not None:
+                            node = budget.elements(node, path_id)
+                        stack.append((iter(node), path_id, False))
+            else:
+                sink(parent_id, node)
+            node = _EMPTY
+
+        if not stack:
+            return
+
+        it, path_id, is_mapping = stack[-1]
+
+        if is_mapping:
+            for k, v in it:
+                child_id = child(path_id, k)
+                if pruned is not None and pruned(child_id):
+                    continue
+
+                if isinstance(v, container_types):
+                    if v:
+                        node, parent_id = v, child_id
+                        break
+                    if isinstance(v, sequence_types):
+                        array_id = child(child_id, ARRAY_KEY)
+                        if pruned is None or not pruned(array_id):
+                            sink(array_id, None)
+                    else:
+                        sink(child_id, {})
+                else:
+                    sink(child_id, v)
+            else:
+                stack.pop()
+        else:
+            for item in it:
+                if isinstance(item, container_types):
+                    node, parent_id = item, path_id
+                    break
+                sink(path_id, item)
+            else:
+                stack.pop()
+
+
+def walk_keys(
+    d: Any,
+    sink: Callable[[Tuple[str], Any], Any],
+    parent: Optional[Tuple[str]] = None,
+    budget: Optional[merge.ArrayBudget] = None,
+    matcher=None,
+):
+    """Call sink(path tuple, value) for each terminal key of document.
+
+    Same as walk without a PathTable, path tuples are built from a reused key
+    buffer for emitted keys only. See merge.extract_terminal_keys for `budget` and
+    `matcher`.
+    """
+
+    mapping_types, sequence_types = merge.MAPPING_TYPES, merge.SEQUENCE_TYPES
+    container_types = merge.CONTAINER_TYPES
+    iter_items = merge.iter_items
+
+    buf = list(parent or ())
+
+    def is_pruned():
+        return matcher is not None and matcher.pruned(tuple(buf))
+
+    # (iterator, buffer length, is mapping)
+    stack: List[Tuple] = []
+    node = d
+
+    while True:
+        if node is not _EMPTY:
+            if isinstance(node, mapping_types):
+                stack.append((iter(iter_items(node)), len(buf), True))
+            elif isinstance(node, sequence_types):
+                buf.append(ARRAY_KEY)
+                if not is_pruned():
+                    if not node:
+                        sink(tuple(buf), None)
+                    else:
+                        if budget is not None:
+                            node = budget.elements(node, tuple(buf))
+                        stack.append((iter(node), len(buf), False))
+            else:
+                sink(parent, node)
+            node = _EMPTY
+
+        if not stack:
+            return
+
+        it, n, is_mapping = stack[-1]
+        del buf[n:]
+
+        if is_mapping:
+            for k, v in it:
+                del buf[n:]
+                buf.append(k)
+                if is_pruned():
+                    continue
+
+                if isinstance(v, container_types):
+                    if v:
+                        node = v
+                        break
+                    if isinstance(v, sequence_types):
+                        buf.append(ARRAY_KEY)
+                        if not is_pruned():
+                            sink(tuple(buf), None)
+                    else:
+                        sink(tuple(buf), {})
+                else:
+                    sink(tuple(buf), v)
+            else:
+                stack.pop()
+        else:
+            for item in it:
+                if isinstance(item, container_types):
+                    node = item
+                    break
+                sink(tuple(buf), item)
+            else:
+                stack.pop()
@@ -2,7 +2,8 @@
 
 import pytest
 
-from spectron.Field import Field
+from spectron.Field import STR_EXEMPLAR_LEN, Field
+from spectron.parse_date import FormatCache
 
 
 none__vals = [None, None]
@@ -11,8 +12,11 @@ none__expected = [None, None]
 int_none__vals = [None, 1, None]
 int_none__expected = ["int", 1]
 
-int_abs__vals = [1, 100, -100]
-int_abs__expected = ["int", -100]
+int_abs__vals = [1, 100, -101]
+int_abs__expected = ["int", -101]
+
+int_tie__vals = [-32768, 32768]
+int_tie__expected = ["int", 32768]
 
 int_to_float__vals = [1, 0.1]
 int_to_float__expected = ["float", 1]
@@ -36,6 +40,7 @@ int_to_str__expected = ["float", 100.0]
         (none__vals, none__expected),
         (int_none__vals, int_none__expected),
         (int_abs__vals, int_abs__expected),
+        (int_tie__vals, int_tie__expected),
         (int_to_float__vals, int_to_float__expected),
         (float_to_int__vals, float_to_int__expected),
         (bool__vals, bool__expected),
@@ -52,3 +57,141 @@ def test__Field(vals, expected):
     dtype, max_value = expected
     assert field.dtype == dtype
     assert field.max_value == max_value
+
+
+@pytest.mark.parametrize(
+    "vals, str_numeric_override, expected",
+    [
+        ([True, 1, 1], False, "int"),
+        ([True, True, 1], False, "bool"),
+        (["a", 1, 1], False, "int"),
+        (["a", 1, 1], True, "str"),
+        (["a", "b", 1.5, {}], False, "float"),
+        ([[1], [2], 1], False, "list"),
+        ([1, [1]], False, "int"),
+        ([1, 1.5, [1], [2], [3]], False, "float"),
+    ],
+)
+def test__Field__dtype(vals, str_numeric_override, expected):
+    field = Field("test", str_numeric_override=str_numeric_override)
+    for v in vals:
+        field.add(v)
+    assert field.dtype == expected
+
+
+def test__Field__long_str():
+    field = Field("test", "x")
+    field.add("y" * 10 ** 6)
+    field.add("z" * 10)
+
+    assert field.dtype == "str"
+    assert field.str_min_len == 1
+    assert field.str_max_len == 10 ** 6
+    assert field.max_value == "y" * STR_EXEMPLAR_LEN
+
+
+@pytest.mark.parametrize(
+    "vals, expected",
+    [
+        (none__vals, none__expected),
+        (int_none__vals, int_none__expected),
+        (int_tie__vals, int_tie__expected),
+        (int_to_float__vals, int_to_float__expected),
+        (float_to_int__vals, float_to_int__expected),
+        (bool__vals, bool__expected),
+        (str__vals, str__expected),
+        (int_to_str__vals, int_to_str__expected),
+    ],
+)
+def test__Field__add(vals, expected):
+    f1 = Field("test", vals[0])
+    f2 = Field("test", vals[1])
+    for v in vals[2:]:
+        f2.add(v)
+
+    field = f1 + f2
+    dtype, max_value = expected
+    assert field.dtype == dtype
+    assert field.max_value == max_value
+    assert field.num_na == vals.count(None)
+
+
+def test__Field__merge():
+    f1 = Field("test", 1)
+    f2 = Field("test", "abc")
+    f2.add(None)
+
+    copied = f1.copy()
+    assert f1.merge(f2) is f1
+    assert f1.hist == {"int": 1, "str": 1}
+    assert f1.num_na == 1
+    assert copied.hist == {"int": 1}
+    assert copied.num_na == 0
+
+
+def test__Field__add__first():
+    field = Field("test")
+    assert [field.add(v) for v in [None, 1, 2, 1.5, "a", 3, [], [1]]] == [
+        False,
+        True,
+        False,
+        True,
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+@pytest.mark.parametrize(
+    "vals, expected",
+    [
+        (["2020-05-01", None, "2020-05-02"], "DATE"),
+        (["2020-05-01", "n/a"], "VARCHAR"),
+        (["2020-05-01T12:34:56", 1, "2020-05-01T12:34:57"], "TIMESTAMP"),
+    ],
+)
+def test__Field__str_format(vals, expected):
+    field = Field("test", str_format=FormatCache())
+    for val in vals:
+        field.add(val)
+    assert field.max_value.dtype == expected
+
+    copied = field.copy()
+    assert copied.str_format is not field.str_format
+    assert copied.str_format.dtype == expected
+
+    merged = Field("test", "x").merge(field)
+    assert merged.str_format.dtype == expected
+
+
+@pytest.mark.parametrize(
+    "vals",
+    [
+        [None, None],
+        [1, None, -100, 100, 2.5],
+        list(range(-50, 50)) + [None, 1.5] * 40,
+        [2 ** 70] + list(range(100)),
+        ["a", "", "bbb", "ccc", True, False, [], {}],
+        ["2020-05-01", None, "2020-05-02", "x" * 200],
+    ],
+)
+def test__Field__add_many(vals):
+    expected = Field("test", str_format=FormatCache())
+    for val in vals:
+        expected.add(val)
+
+    field = Field("test", str_format=FormatCache())
+    field.add_many(vals)
+
+    for attr in Field.__slots__:
+        if attr != "str_format":
+            assert getattr(field, attr) == getattr(expected, attr), attr
+    assert field.str_format.dtype == expected.str_format.dtype
+
+
+def test__Field__add_many__first():
+    field = Field("test")
+    assert field.add_many([None, 1, 2]) is True
+    assert field.add_many([3, None]) is False
+    assert field.add_many(["a", 4]) is True
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import pickle
 import pytest
 from spectron.MaxDict import MaxDict
 
@@ -90,3 +91,353 @@ def test__max_dicts__case():
     }
 
     assert mdx.asdict() == expected
+
+
+shape_dicts = [
+    {"a": 1, "b": {"c": "x", "d": []}},
+    {"a": 2.5, "b": {"c": "xyz", "d": []}},
+    {"a": None, "b": {"c": "", "d": [1, 2]}},
+    {"b": {"c": "test", "d": {}}, "a": 1},
+    {"a": [{"x": 1}, {}, [], [[1]], "s"], "b": {"c": {}, "d": [{"e": None}]}},
+    {"a": [{"x": 10}, {}, [], [[2]], "ss"], "b": {"c": {}, "d": [{"e": True}]}},
+]
+
+
+@pytest.mark.parametrize("max_shapes", [0, 1, 1024])
+def test__shape_cache(max_shapes):
+    md = MaxDict(shape_cache=False)
+    md.batch_load_dicts(shape_dicts * 3)
+
+    mdx = MaxDict()
+    mdx.max_shapes = max_shapes
+    mdx.batch_load_dicts(shape_dicts * 3)
+
+    assert mdx.hist == md.hist
+    assert mdx.asdict() == md.asdict()
+
+
+def test__shape_cache__hits():
+    md = MaxDict()
+    md.batch_load_dicts(shape_dicts * 3)
+    # shapes are top level keys in order
+    assert set(md._shapes) == {("a", "b"), ("b", "a")}
+    assert md._shape_hits == len(shape_dicts) * 3 - 2
+
+
+def test__shape_cache__heterogeneous():
+    docs = [{f"k{i}": i, "a": {"b": i}} for i in range(MaxDict.max_shape_misses + 1)]
+
+    md = MaxDict()
+    md.batch_load_dicts(docs)
+    assert md._shapes is None
+
+    expected = MaxDict(shape_cache=False)
+    expected.batch_load_dicts(docs)
+    assert md.hist == expected.hist
+
+
+def test__load_override_keys():
+    md = MaxDict()
+    md.batch_load_dicts(
+        [
+            {"a": {"b": 1, "c": [{"d": 1}], "e": {"f": 1}}},
+            {"a": {"b": {"x": 1}, "c": [{"d": 2}]}},
+            {"a": {"c": {"g": 1}}, "h": [1, 2]},
+            {"h": {"i": 1}},
+        ]
+    )
+    md.load_override_keys()
+    assert md.override_keys == {
+        ("a", "b"),
+        ("a", "c", "g"),
+        ("h", "i"),
+    }
+
+
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test__merge(case_insensitive):
+    parts = [shape_dicts[:2], shape_dicts[2:3], shape_dicts[3:]]
+
+    md = MaxDict(case_insensitive=case_insensitive)
+    md.batch_load_dicts(shape_dicts)
+
+    partials = []
+    for part in parts:
+        mdx = MaxDict(case_insensitive=case_insensitive)
+        mdx.batch_load_dicts(part)
+        partials.append(mdx)
+
+    added = partials[0] + partials[1] + partials[2]
+    merged = MaxDict.merge_all(partials)
+
+    assert merged is partials[0]
+    assert merged.hist == added.hist == md.hist
+    assert merged.asdict() == added.asdict() == md.asdict()
+
+
+def test__merge__shape_cache():
+    md = MaxDict()
+    md.batch_load_dicts(shape_dicts)
+
+    mdx = MaxDict()
+    mdx.batch_load_dicts(shape_dicts)
+    mdx.merge(md)
+    mdx.batch_load_dicts(shape_dicts)
+
+    expected = MaxDict(shape_cache=False)
+    expected.batch_load_dicts(shape_dicts * 3)
+    assert mdx.hist == expected.hist
+
+
+@pytest.mark.parametrize(
+    "patience, num_docs, stop_reason",
+    [(None, 18, None), (3, 9, "patience"), (12, 18, "patience"), (13, 18, None)],
+)
+def test__patience(patience, num_docs, stop_reason):
+    md = MaxDict(patience=patience)
+    md.batch_load_dicts(iter(shape_dicts * 3))
+
+    # last new dtype at shape_dicts[5]
+    assert md.convergence == {
+        "num_docs": num_docs,
+        "last_change": 6,
+        "stop_reason": stop_reason,
+    }
+
+
+@pytest.mark.parametrize("split", [0, 3, 6, 7, 12, 18])
+def test__merge__convergence(split):
+    docs = shape_dicts * 3 + [{"z": 1}]
+
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+
+    md, mdx = MaxDict(), MaxDict()
+    md.batch_load_dicts(docs[:split])
+    mdx.batch_load_dicts(docs[split:])
+    md.merge(mdx)
+
+    # last new dtype at shape_dicts[5], new key at docs[18]
+    assert md.convergence == expected.convergence == {
+        "num_docs": 19,
+        "last_change": 19,
+        "stop_reason": None,
+    }
+
+
+def test__merge__convergence__unchanged():
+    expected = MaxDict()
+    expected.batch_load_dicts(shape_dicts * 3)
+
+    md, mdx = MaxDict(), MaxDict()
+    md.batch_load_dicts(shape_dicts * 2)
+    mdx.batch_load_dicts(shape_dicts)
+    md.merge(mdx)
+
+    assert md.convergence == expected.convergence
+    assert md.convergence["last_change"] == 6
+
+
+def test__deadline():
+    md = MaxDict(deadline=1)
+    md.deadline_interval = 2
+    md.batch_load_dicts(shape_dicts * 3)
+    assert md.convergence["num_docs"] == 2
+    assert md.convergence["stop_reason"] == "deadline"
+
+    md.batch_load_dicts(shape_dicts)
+    assert md.convergence["num_docs"] == 2
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 1000])
+def test__batch_size(batch_size):
+    docs = shape_dicts * 3 + _wide_docs(100)
+
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+
+    md = MaxDict(batch_size=batch_size)
+    md.batch_load_dicts(iter(docs))
+    assert md.asdict() == expected.asdict()
+    assert md.hist == expected.hist
+    assert md.num_docs == len(docs)
+
+
+@pytest.mark.parametrize(
+    "batch_size, num_docs, stop_reason",
+    [(3, 9, "patience"), (4, 12, "patience"), (20, 18, None)],
+)
+def test__batch_size__patience(batch_size, num_docs, stop_reason):
+    md = MaxDict(patience=3, batch_size=batch_size)
+    md.batch_load_dicts(shape_dicts * 3)
+    assert md.convergence["num_docs"] == num_docs
+    assert md.convergence["stop_reason"] == stop_reason
+
+
+def test__array_budget():
+    d = {"a": [{"b": i} for i in range(10)], "c": {"d": list(range(5))}}
+
+    md = MaxDict(array_budget=(2, 1))
+    md.batch_load_dicts([d, d])
+    assert md._shapes is None
+    assert md.hist == {("a", "[array]", "b"): 6, ("c", "d", "[array]"): 6}
+    assert md.skipped_elements == {("a", "[array]"): 14, ("c", "d", "[array]"): 4}
+
+    merged = MaxDict().merge(md)
+    assert merged.skipped_elements == md.skipped_elements
+
+
+def test__ignore_include_fields():
+    d = {"a": 1, "payload": {"raw": "x", "b": 2}, "events": [{"debug": 1, "k": 2}]}
+
+    md = MaxDict(ignore_fields=["payload.*", "debug"])
+    md.batch_load_dicts([d, d])
+    assert md._shapes is None
+    assert md.asdict() == {"a": 1, "events": [{"k": 2}]}
+
+    md = MaxDict(include_fields=["payload.b", "events"], ignore_fields=["k"])
+    md.load_dict(d)
+    assert md.asdict() == {"payload": {"b": 2}, "events": [{"debug": 1}]}
+
+
+def _user_docs(n, value=lambda i: i):
+    return [{"id": i, "users": {f"u{i}": value(i)}} for i in range(n)]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (lambda i: i, 9),
+        (lambda i: i / 2, 4.5),
+        (lambda i: {"name": "x" * i, "tags": [i]}, {"name": "x" * 9, "tags": [9]}),
+    ],
+)
+def test__map_threshold(value, expected):
+    md = MaxDict(map_threshold=4)
+    md.batch_load_dicts(_user_docs(10, value))
+
+    assert md.paths.map_ids
+    assert md.asdict() == {"id": 9, "users": {"[map]": expected}}
+    assert all(key[:2] in (("id",), ("users", "[map]")) for key in md.key_store)
+
+    # new keys are added to map Fields
+    num_fields = len(md.key_store)
+    md.batch_load_dicts(_user_docs(20, value))
+    assert len(md.key_store) == num_fields
+
+
+def test__map_threshold__mixed():
+    docs = _user_docs(10, lambda i: i if i % 2 else str(i))
+
+    md = MaxDict(map_threshold=4)
+    md.batch_load_dicts(docs)
+    assert not md.paths.map_ids
+    assert len(md.asdict()["users"]) == 10
+
+    md = MaxDict()
+    md.batch_load_dicts(_user_docs(10))
+    assert not md.paths.map_ids
+
+
+def test__map_threshold__shape_cache():
+    docs = [{"users": {f"u{i % 6}": i}} for i in range(20)]
+
+    md = MaxDict(map_threshold=4)
+    md.batch_load_dicts(docs)
+    assert md.paths.map_ids
+    assert md.hist == {("users", "[map]"): 20}
+
+
+@pytest.mark.parametrize("collapsed", [(True, False), (False, True), (True, True)])
+def test__merge__map(collapsed):
+    partials = []
+    for ix, is_map in enumerate(collapsed):
+        md = MaxDict(map_threshold=4 if is_map else None)
+        md.batch_load_dicts({"users": {f"u{ix}_{i}": i}} for i in range(6))
+        assert bool(md.paths.map_ids) == is_map
+        partials.append(md)
+
+    md = MaxDict.merge_all(partials)
+    assert md.hist == {("users", "[map]"): 12}
+
+
+def test__merge__map_threshold():
+    partials = []
+    for ix in range(2):
+        md = MaxDict(map_threshold=8)
+        md.batch_load_dicts({"users": {f"u{ix}_{i}": i}} for i in range(6))
+        partials.append(md)
+
+    md = MaxDict.merge_all(partials)
+    assert md.hist == {("users", "[map]"): 12}
+
+
+def _wide_docs(n):
+    return [
+        {"id": i, "a": {f"k{i % 50}": i, "s": "x" * (i % 7)}, "b": [{"c": i}]}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("map_threshold", [None, 20])
+def test__max_memory(map_threshold):
+    docs = _wide_docs(500)
+    docs += [{"m": {f"u{i}": {"v": i}}} for i in range(30)]
+
+    expected = MaxDict(map_threshold=map_threshold)
+    expected.batch_load_dicts(docs)
+
+    # interned paths count toward the budget, half is left for Fields
+    max_memory = 2 * len(expected.paths) * MaxDict.path_bytes + 10 * MaxDict.field_bytes
+    md = MaxDict(map_threshold=map_threshold, max_memory=max_memory)
+    md.batch_load_dicts(docs)
+
+    assert len(md._spill)
+    assert not md._over_budget
+    assert md.memory_usage <= md.max_memory
+    assert md.asdict() == expected.asdict()
+    assert md.hist == expected.hist
+    assert md.convergence == expected.convergence
+
+
+def test__max_memory__paths(caplog):
+    docs = _wide_docs(200)
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+
+    # paths alone exceed the budget, Fields keep spill_ratio of it
+    max_memory = len(expected.paths) * MaxDict.path_bytes
+    md = MaxDict(max_memory=max_memory)
+    md.batch_load_dicts(docs)
+
+    assert md._over_budget
+    assert "Memory budget may be exceeded" in caplog.text
+    assert md._num_fields * MaxDict.field_bytes <= max_memory * md.spill_ratio
+    assert md.asdict() == expected.asdict()
+
+
+def test__max_memory__merge_pickle():
+    docs = _wide_docs(200)
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+
+    md = MaxDict(max_memory=10 * MaxDict.field_bytes)
+    md.batch_load_dicts(docs)
+
+    assert pickle.loads(pickle.dumps(md)).asdict() == expected.asdict()
+    assert MaxDict().merge(md).hist == expected.hist
+
+
+def test__infer_date():
+    docs = [
+        {"ts": f"2020-05-{i + 1:02d}T12:00:00Z", "mixed": "2020-05-01" if i else "-"}
+        for i in range(20)
+    ]
+
+    md = MaxDict(infer_date=True)
+    md.batch_load_dicts(docs)
+    d = md.asdict()
+    assert d == {"ts": "2020-05-20T12:00:00Z", "mixed": "2020-05-01"}
+    assert (d["ts"].dtype, d["mixed"].dtype) == ("TIMESTAMP", "VARCHAR")
+
+    assert MaxDict().merge(md).asdict()["mixed"].dtype == "VARCHAR"
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from spectron import columns
+
+
+@pytest.mark.parametrize(
+    "values, kind, expected",
+    [
+        ([3, -1, 2], int, (-1, 3)),
+        (list(range(-500, 1000)), int, (-500, 999)),
+        (list(range(100)) + [2 ** 70], int, (0, 2 ** 70)),
+        ([float(i) for i in range(100)], float, (0.0, 99.0)),
+        ([1.5, float("nan")] * 40, float, (1.5, 1.5)),
+    ],
+)
+def test__min_max(values, kind, expected):
+    assert columns.min_max(values, kind) == expected
+    assert all(type(v) is kind for v in columns.min_max(values, kind))
+
+
+def test__min_max__builtins(monkeypatch):
+    monkeypatch.setattr(columns, "_np", None)
+    assert columns.min_max(list(range(100)), int) == (0, 99)
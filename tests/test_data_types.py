@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import functools
+
 import pytest
 
-from spectron.data_types import set_dtype
+from spectron.data_types import (
+    column_dtype,
+    num_in_bounds,
+    parse_dtype,
+    resolve_type,
+    set_dtype,
+    widen_type,
+)
 
 
 @pytest.mark.parametrize(
@@ -24,7 +33,112 @@ def test__set_dtype(val, expected):
     assert set_dtype(val) == expected
 
 
+@pytest.mark.parametrize(
+    "val, kwargs, expected",
+    [
+        ("2020-05-01", {}, "VARCHAR"),
+        ("2020-05-01", {"infer_date": True}, "DATE"),
+        ("2020-05-01T12:34:56Z", {"infer_date": True}, "TIMESTAMP"),
+        ("2020-0501", {"infer_date": True}, "VARCHAR"),
+        ("2020-0501", {"infer_date": True, "date_fallback": True}, "DATE"),
+        ("2020-0501", {"date_fallback": True}, "VARCHAR"),
+    ],
+)
+def test__set_dtype__infer_date(val, kwargs, expected):
+    assert set_dtype(val, **kwargs) == expected
+
+
 @pytest.mark.parametrize("val", [float(2 ** (64 - 15) // 2), (2 ** 64 // 2)])
 def test__set_dtype__out_of_bounds(val):
     with pytest.raises(OverflowError):
         set_dtype(val, strict=True)
+
+
+@pytest.mark.parametrize(
+    "num_bits, val, expected",
+    [(16, 32767, True), (16, 32768, False), (16, -32768, True), (8, -129, False)],
+)
+def test__num_in_bounds(num_bits, val, expected):
+    assert num_in_bounds(num_bits, val) is expected
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([1, -32768], "SMALLINT"),
+        ([1, 32768], "INT"),
+        (list(range(100)) + [-(2 ** 40)], "BIGINT"),
+        ([0.5, 281474976710655.0], "FLOAT8"),
+    ],
+)
+def test__column_dtype(values, expected):
+    assert column_dtype(values) == expected
+
+
+@pytest.mark.parametrize(
+    "dtype, expected",
+    [
+        ("int", ("INT", ())),
+        (" numeric(10, 2) ", ("DECIMAL", (10, 2))),
+        ("Decimal(5)", ("DECIMAL", (5,))),
+        ("character varying(256)", ("VARCHAR", (256,))),
+        ("double", ("FLOAT8", ())),
+        ("string", ("VARCHAR", ())),
+        ("INTERVAL", (None, ())),
+        ("UNKNOWN_list", (None, ())),
+    ],
+)
+def test__parse_dtype(dtype, expected):
+    assert parse_dtype(dtype) == expected
+
+
+@pytest.mark.parametrize(
+    "inferred, user, expected",
+    [
+        ("VARCHAR", "DATE", "DATE"),
+        ("VARCHAR", "VARCHAR(100)", "VARCHAR(100)"),
+        ("VARCHAR", "INT", "VARCHAR"),
+        ("SMALLINT", "DECIMAL(10,2)", "DECIMAL(10,2)"),
+        ("BOOL", "NUMERIC(10,2)", "BOOL"),
+        ("INT", "BOOL", "BOOL"),
+        ("INT", "FLOAT4", "FLOAT4"),
+        ("BIGINT", "SMALLINT", "BIGINT"),
+        ("SMALLINT", "int8", "int8"),
+        ("INT", "DOUBLE", "DOUBLE"),
+        ("FLOAT4", "DOUBLE", "DOUBLE"),
+        ("FLOAT8", "REAL", "FLOAT8"),
+        ("FLOAT8", "DOUBLE", "DOUBLE"),
+        ("INT", "INTERVAL", "INT"),
+        ("FLOAT8", "FLOAT4", "FLOAT8"),
+        ("FLOAT4", "INT", "FLOAT4"),
+        ("DATE", "TIMESTAMP", "TIMESTAMP"),
+        ("BOOL", "TEST_TYPE", "TEST_TYPE"),
+    ],
+)
+def test__resolve_type(inferred, user, expected):
+    assert resolve_type(inferred, user) == expected
+
+
+@pytest.mark.parametrize(
+    "dtypes, expected",
+    [
+        (["SMALLINT", "INT", "SMALLINT"], "INT"),
+        (["INT", "FLOAT4", "BIGINT"], "FLOAT4"),
+        (["FLOAT4", "DOUBLE", "BIGINT"], "DOUBLE"),
+        (["INT", "double precision", "FLOAT8"], "FLOAT8"),
+        (["DECIMAL(10,2)", "DECIMAL(5,4)"], "DECIMAL(12,4)"),
+        (["DECIMAL(30,0)", "NUMERIC(30,20)"], "DECIMAL(38,20)"),
+        (["DECIMAL", "DECIMAL(5,2)"], "DECIMAL(20,2)"),
+        (["VARCHAR(10)", "CHAR(20)"], "VARCHAR(20)"),
+        (["VARCHAR(10)", "VARCHAR"], "VARCHAR"),
+        (["DATE", "TIMESTAMP"], "TIMESTAMP"),
+    ],
+)
+def test__widen_type(dtypes, expected):
+    assert functools.reduce(widen_type, dtypes) == expected
+
+
+@pytest.mark.parametrize("dtype, other", [("INT", "VARCHAR"), ("DATE", "SUPER")])
+def test__widen_type__exceptions(dtype, other):
+    with pytest.raises(ValueError):
+        widen_type(dtype, other)
@@ -93,6 +93,97 @@ def test__define_types__overflow():
         ddl.define_types(d, numeric_overflow=True)
 
 
+@pytest.mark.parametrize(
+    "array_budget, expected",
+    [
+        # mixed dtypes, array is ignored
+        (None, {}),
+        ((3, 0), {"a": ["SMALLINT"]}),
+        ((3, 2), {}),
+    ],
+)
+def test__define_types__array_budget(array_budget, expected, caplog):
+    d = {"a": [1, 2, 3] + ["x"] * 100}
+    assert ddl.define_types(d, array_budget=array_budget) == (expected, {})
+
+    if array_budget:
+        skipped = 100 - array_budget[1]
+        assert f"[a.array] Skipped {skipped:,} array elements" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "ignore_fields, include_fields, expected",
+    [
+        (["b"], None, {"a": "SMALLINT", "c": [{"d": "SMALLINT"}]}),
+        (
+            ["c.[array].b"],
+            None,
+            {"a": "SMALLINT", "b": "SMALLINT", "c": [{"d": "SMALLINT"}]},
+        ),
+        (["c.[array]"], None, {"a": "SMALLINT", "b": "SMALLINT"}),
+        (None, ["c.*.d"], {"c": [{"d": "SMALLINT"}]}),
+    ],
+)
+def test__define_types__ignore_include(ignore_fields, include_fields, expected):
+    d = {"a": 1, "b": 1, "c": [{"b": 1, "d": 1}]}
+    result = ddl.define_types(
+        d, ignore_fields=ignore_fields, include_fields=include_fields
+    )
+    assert result == (expected, {})
+
+
+@pytest.mark.parametrize(
+    "d, expected",
+    [
+        ({"a": {"[map]": 1}}, "a map<string, SMALLINT>"),
+        ({"a": [{"b": {"[map]": "x"}}]}, "b: map<string, VARCHAR>"),
+        ({"a": {"[map]": {"b": 1}}}, "a map<string, struct<"),
+        ({"a": {"[map]": [1]}}, "a map<string, array<"),
+    ],
+)
+def test__from_dict__map(d, expected):
+    result = ddl.from_dict(d)
+    assert expected in result
+    assert "[map]" not in result
+
+
+@pytest.mark.parametrize(
+    "infer_date, expected", [(False, "a VARCHAR"), (True, "a TIMESTAMP")]
+)
+def test__from_dict__infer_date(infer_date, expected):
+    result = ddl.from_dict({"a": "2020-05-01 12:34:56"}, infer_date=infer_date)
+    assert expected in result
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["2020-05-01", "2020-05-02"], ["DATE"]),
+        (["2020-05-01", "x"], ["VARCHAR"]),
+        (["x", "2020-05-01"], ["VARCHAR"]),
+    ],
+)
+def test__define_types__array_str_format(values, expected):
+    assert ddl.define_types({"a": values}, infer_date=True) == ({"a": expected}, {})
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([1, 100000, -5], ["INT"]),
+        (list(range(1000)) + [2 ** 40], ["BIGINT"]),
+        ([1.5, 2.5], ["FLOAT4"]),
+    ],
+)
+def test__define_types__array_numeric(values, expected):
+    assert ddl.define_types({"a": values}) == ({"a": expected}, {})
+
+
+def test__define_types__map():
+    d = {"a": {"[map]": {"b": 1}}, "c": {"[map]": None}}
+    assert ddl.define_types(d) == ({"a": {"[map]": {"b": "SMALLINT"}}}, {})
+
+
 # Test Key Ops -------------------------------------------------------------------------
 
 str_128_chars = "x" * 128
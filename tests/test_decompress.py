@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import bz2
+import gzip
+import io
+import lzma
+import pytest
+
+from spectron import decompress, read_json
+
+
+def _zstd(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+lines = "\n".join('{"a": %d, "b": "%s"}' % (i, "x" * i) for i in range(1000))
+
+
+@pytest.mark.parametrize(
+    "fmt, compress",
+    [
+        (None, lambda b: b),
+        ("gzip", gzip.compress),
+        ("bz2", bz2.compress),
+        ("xz", lzma.compress),
+        ("zstd", _zstd),
+    ],
+)
+@pytest.mark.parametrize("threaded", [True, False])
+def test__open_infile(tmp_path, fmt, compress, threaded):
+    path = tmp_path / "test.json.x"
+    path.write_bytes(compress(lines.encode()))
+
+    with open(path, "rb") as f:
+        assert decompress.detect_compression(f) == fmt
+
+    with read_json.open_infile(path, threaded=threaded) as f:
+        docs = list(read_json.iter_documents(f))
+
+    assert len(docs) == 1000
+    assert docs[-1] == {"a": 999, "b": "x" * 999}
+
+
+def test__threaded_reader__chunks():
+    data = bytes(range(256)) * 100
+    reader = io.BufferedReader(decompress.ThreadedReader(io.BytesIO(data), 7, 2))
+    assert reader.read() == data
+    reader.close()
+
+
+def test__threaded_reader__early_close():
+    stream = io.BytesIO(b"x" * 10000)
+    reader = decompress.ThreadedReader(stream, chunk_size=10, max_chunks=1)
+    assert reader.read(5) == b"xxxxx"
+    reader.close()
+    assert stream.closed
+
+
+def test__threaded_reader__error():
+    class Broken(io.RawIOBase):
+        def read(self, n):
+            raise OSError("broken")
+
+    with pytest.raises(OSError):
+        decompress.ThreadedReader(Broken()).read(1)
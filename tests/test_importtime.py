@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# optional dependencies and large tables, imported on first use only
+LAZY_MODULES = [
+    "numpy",
+    "pendulum",
+    "zstandard",
+    "sqlite3",
+    "concurrent.futures.process",
+    "spectron.reserved",
+    "spectron.incremental",
+    "spectron.state",
+    "bz2",
+    "lzma",
+]
+
+
+def importtime(module: str) -> dict:
+    """Cumulative import time per module in microseconds, see python -X importtime."""
+
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["spectron", "spectron.cli"])
+def test__lazy_imports(module):
+    times = importtime(module)
+    assert module in times
+    assert [name for name in LAZY_MODULES if name in times] == []
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import pytest
+
+from spectron import ddl, incremental, scan
+from spectron.MaxDict import MaxDict
+
+docs = [
+    {"a": 1, "b": {"c": "x"}},
+    {"a": 2.5, "b": {"c": "xyz", "d": [1, 2]}},
+    {"a": -100, "e": [{"f": True}]},
+    {"a": 10 ** 10, "b": {"c": "", "d": []}, "e": [{"f": False, "g": "test"}]},
+]
+
+
+@pytest.fixture
+def infiles(tmp_path):
+    paths = []
+    for i, d in enumerate(docs):
+        path = tmp_path / "data" / f"{i:02d}.json"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(json.dumps(d))
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def scanned(monkeypatch):
+    """Record paths scanned."""
+
+    paths = []
+    scan_each = scan.scan_each
+
+    def wrapper(new_paths, **kwargs):
+        paths.extend(os.path.basename(p) for p in new_paths)
+        return scan_each(new_paths, **kwargs)
+
+    monkeypatch.setattr(scan, "scan_each", wrapper)
+    return paths
+
+
+def expected_dict(docs):
+    md = MaxDict()
+    md.batch_load_dicts(docs)
+    return md.asdict()
+
+
+def test__scan_incremental__unchanged(infiles, tmp_path, scanned):
+    cache_dir = tmp_path / "cache"
+
+    md = incremental.scan_incremental(infiles, cache_dir)
+    assert md.asdict() == expected_dict(docs)
+    assert scanned == ["00.json", "01.json", "02.json", "03.json"]
+
+    # touched file is compared by content hash
+    os.utime(infiles[0], ns=(0, 0))
+
+    scanned.clear()
+    md = incremental.scan_incremental(infiles, cache_dir)
+    assert md.asdict() == expected_dict(docs)
+    assert scanned == []
+
+
+def test__scan_incremental__append(infiles, tmp_path, scanned):
+    cache_dir = tmp_path / "cache"
+
+    incremental.scan_incremental(infiles[:2], cache_dir)
+    scanned.clear()
+
+    md = incremental.scan_incremental(infiles, cache_dir)
+    assert md.asdict() == expected_dict(docs)
+    assert scanned == ["02.json", "03.json"]
+
+
+@pytest.mark.parametrize("action", ["modify", "remove", "insert"])
+def test__scan_incremental__rebuild(infiles, tmp_path, scanned, action):
+    cache_dir = tmp_path / "cache"
+
+    if action == "insert":
+        incremental.scan_incremental(infiles[1:], cache_dir)
+    else:
+        incremental.scan_incremental(infiles, cache_dir)
+    scanned.clear()
+
+    expected_docs = list(docs)
+    if action == "modify":
+        doc = {"a": "string", "x": [{"y": 1}]}
+        with open(infiles[1], "w") as f:
+            f.write(json.dumps(doc))
+        expected_docs[1] = doc
+    elif action == "remove":
+        os.remove(infiles[1])
+        del infiles[1]
+        del expected_docs[1]
+
+    md = incremental.scan_incremental(infiles, cache_dir)
+    assert md.asdict() == expected_dict(expected_docs)
+    assert (
+        scanned == {"modify": ["01.json"], "remove": [], "insert": ["00.json"]}[action]
+    )
+
+    state_files = list((cache_dir / incremental.FILES_DIR).iterdir())
+    assert len(state_files) == len(infiles)
+
+
+def test__scan_incremental__options(infiles, tmp_path, scanned):
+    cache_dir = tmp_path / "cache"
+
+    incremental.scan_incremental(infiles, cache_dir)
+    scanned.clear()
+
+    md = incremental.scan_incremental(infiles, cache_dir, case_insensitive=True)
+    assert md.case_insensitive
+    assert len(scanned) == len(infiles)
+
+
+def test__scan_incremental__stdin(tmp_path):
+    with pytest.raises(ValueError, match="stdin"):
+        incremental.scan_incremental(["-"], tmp_path)
+
+
+def test__from_files__cache_dir(infiles, tmp_path):
+    md = MaxDict()
+    md.batch_load_dicts(docs)
+
+    for _ in range(2):
+        result = ddl.from_files(infiles, cache_dir=tmp_path / "cache")
+        assert result == ddl.from_dict(md.asdict())
+
+
+def test__scan_incremental__stopped(infiles, tmp_path, scanned, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(MaxDict, "deadline_interval", 2)
+
+    # deadline is checked after two documents, third document is not loaded
+    added = [{"a": 1}, {"a": 199999.5, "x": True}]
+    for path in infiles[2:]:
+        with open(path, "a") as f:
+            f.write("".join("\n" + json.dumps(d) for d in added))
+
+    md = incremental.scan_incremental(infiles, cache_dir, deadline=1)
+    assert md.convergence["stop_reason"] == "deadline"
+    assert "x" not in md.asdict()
+    assert not (cache_dir / incremental.MERGED_NAME).is_file()
+
+    # files stopped early are scanned again, complete files are cached
+    scanned.clear()
+    md = incremental.scan_incremental(infiles, cache_dir)
+    expected = docs + added * 2
+    assert md.asdict() == expected_dict(expected)
+    assert scanned == ["02.json", "03.json"]
+    assert md.convergence["stop_reason"] is None
+
+
+def test__scan_incremental__convergence(infiles, tmp_path, scanned):
+    cache_dir = tmp_path / "cache"
+
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+
+    for _ in range(2):
+        md = incremental.scan_incremental(infiles, cache_dir)
+        assert md.convergence == expected.convergence
+    assert len(scanned) == len(infiles)
@@ -29,7 +29,7 @@ _dicts = [
 def test__construct_single_branch(d):
     """Test single linear branch."""
 
-    group_key = list(merge.extract_terminal_keys(d))[0][0]
+    group_key = merge.extract_terminal_keys(d)[0][0]
 
     xd, xloc = {}, {}
     xd, xloc = merge.construct_branch(xd, xloc, group_key)
@@ -74,3 +74,31 @@ def test__construct_branch_idempotent(d):
         merge.construct_branch(xd, xloc, gk, is_dict=is_dict)
 
     assert reconstructed_dict == xd
+
+
+@pytest.mark.parametrize(
+    "n, head, sample, expected_len",
+    [(5, 2, 2, 4), (4, 2, 2, 4), (3, 2, 2, 3), (10, 0, 3, 3), (10, 3, 0, 3)],
+)
+def test__ArrayBudget(n, head, sample, expected_len):
+    budget = merge.ArrayBudget(head, sample)
+    seq = list(range(n))
+    result = budget.elements(seq, "key")
+
+    assert len(result) == expected_len
+    assert result[:head] == seq[:head]
+    assert result == sorted(set(result))
+    assert budget.skipped == ({"key": n - expected_len} if n > expected_len else {})
+
+    # lazy sequences yield same elements
+    lazy = merge.ArrayBudget(head, sample).elements(tuple(seq), "key")
+    assert list(lazy) == list(result)
+
+
+def test__extract_terminal_keys__budget():
+    d = {"a": [{"b": i} for i in range(10)], "c": [[1, 2, 3]] * 2}
+    budget = merge.ArrayBudget(1, 1)
+
+    keys = merge.extract_terminal_keys(d, budget=budget)
+    assert len(keys) == 2 + 2 * 2
+    assert budget.skipped == {("a", "[array]"): 8, ("c", "[array]", "[array]"): 2}
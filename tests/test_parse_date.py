@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import pickle
 import pytest
 
 from spectron import parse_date
@@ -24,8 +25,105 @@ def test_num_digits(s, expected):
         ("2020-05-01 12:34:56.123+0000", "TIMESTAMP"),
         ("2020-05-01T12:34:56.123+0000", "TIMESTAMP"),
         ("2020-05-01T12:34:56+0000", "TIMESTAMP"),
-        ("2020-05-01T12:34:56.123+8000", "TIMESTAMP"),
+        ("2020-05-01T12:34:56Z", "TIMESTAMP"),
+        ("2020-05-01T12:34:56.1234567+05:30", "TIMESTAMP"),
+        ("20200501T123456", "TIMESTAMP"),
+        ("2020-05-01T12:34:56.123+8000", None),
+        ("2020-13-01", None),
+        ("2020-05-01T25", None),
+        ("2020-0501", None),
+        ("123e4567-e89b-12d3-a456-426614174000", None),
+        ("+1 (555) 123-4567", None),
     ],
 )
 def test_guess_type(s, expected):
     assert parse_date.guess_type(s) == expected
+
+
+@pytest.mark.parametrize(
+    "s, expected",
+    [
+        ("2020-05-01", "DATE"),
+        ("2020-0501", "DATE"),
+        ("2020-05-01T12:34:56.123+8000", "TIMESTAMP"),
+        ("12345678", None),
+    ],
+)
+def test_guess_type__fallback(s, expected):
+    assert parse_date.guess_type(s, fallback=True) == expected
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["2020-05-01"] * 20, "DATE"),
+        ([f"2020-05-01T12:34:{i:02d}.{i}Z" for i in range(20)], "TIMESTAMP"),
+        (["2020-05-01T12:34:56Z", "2020-05-01T12:34:56+00:00"], "TIMESTAMP"),
+        (["2020-05-01"] * 20 + ["n/a"], "VARCHAR"),
+        (["2020-05-01", "2020-05-01T12:34:56"], "VARCHAR"),
+        (["2020-05-01", "20200501"], "VARCHAR"),
+        (["2020-05-01", "2020-13-01"], "VARCHAR"),
+        (["abc", "2020-05-01"], "VARCHAR"),
+        ([], None),
+    ],
+)
+def test_FormatCache(values, expected):
+    fmt = parse_date.FormatCache()
+    for s in values:
+        fmt.add(s)
+    assert fmt.dtype == expected
+
+
+def test_FormatCache__compiled_check():
+    fmt = parse_date.FormatCache()
+    for _ in range(fmt.learn_size + 1):
+        fmt.add("2020-05-01")
+    assert not fmt.num_validate
+
+    # ranges are only validated while learning
+    fmt.add("2020-13-01")
+    assert fmt.dtype == "DATE"
+    fmt.add("2020-05-01 ")
+    assert fmt.dtype == "VARCHAR" and fmt.pattern is None
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("2020-05-01", "2020-05-02", "DATE"),
+        ("2020-05-01", "20200502", "VARCHAR"),
+        ("2020-05-01", "x", "VARCHAR"),
+        ("2020-05-01", None, "DATE"),
+        (None, "2020-05-01", "DATE"),
+    ],
+)
+def test_FormatCache__merge(a, b, expected):
+    fmt, other = parse_date.FormatCache(), parse_date.FormatCache()
+    if a:
+        fmt.add(a)
+    if b:
+        other.add(b)
+    assert fmt.merge(other).dtype == expected
+
+
+def test_FormatCache__merge__pickle():
+    fmt = parse_date.FormatCache()
+    fmt.add("2020-05-01T12:34:56Z")
+    other = pickle.loads(pickle.dumps(fmt))
+    assert other.pattern is not fmt.pattern
+
+    assert fmt.merge(other).dtype == "TIMESTAMP"
+    assert fmt.pattern is not None
+
+
+def test_TypedStr():
+    s = parse_date.FormatCache().typed("x")
+    assert type(s) is str
+
+    fmt = parse_date.FormatCache()
+    fmt.add("2020-05-01")
+    s = fmt.typed("2020-05-01")
+    assert s == "2020-05-01" and s.dtype == "DATE"
+
+    s = pickle.loads(pickle.dumps(s))
+    assert s == "2020-05-01" and s.dtype == "DATE"
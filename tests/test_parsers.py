@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import json
+import math
+import pytest
+
+from spectron import parsers, read_json
+from spectron.MaxDict import MaxDict
+
+docs = [
+    {"a": 1, "b": {"c": "x", "d": {}}, "e": []},
+    {"a": 2.5, "b": {"c": "xyz", "d": {"f": None}}, "e": [[1, 2], [3]]},
+    {"a": None, "g": [{"h": True}, {"h": False, "i": "test"}]},
+]
+
+
+@pytest.fixture(params=parsers.PRIORITY)
+def backend(request):
+    try:
+        return parsers.get_backend(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} not installed")
+
+
+def test__get_backend__auto():
+    exact = [n for n in parsers.available() if parsers.get_backend(n).exact]
+    assert parsers.get_backend().name == exact[0]
+    assert parsers.get_backend("auto").name == exact[0]
+    assert parsers.get_backend().name not in ("orjson", "simdjson")
+
+
+@pytest.mark.parametrize(
+    "s, expected",
+    [
+        ('{"a": 18446744073709551616}', {"a": 2 ** 64}),
+        ('{"a": -9223372036854775809}', {"a": -(2 ** 63) - 1}),
+        ('{"a": 18446744073709551615}', {"a": 2 ** 64 - 1}),
+        ('{"a": Infinity, "b": -Infinity}', {"a": float("inf"), "b": float("-inf")}),
+    ],
+)
+def test__backend__numbers(backend, s, expected):
+    doc = parsers.as_dict(backend.loads(s))
+    if backend.exact:
+        assert doc == expected
+        assert list(map(type, doc.values())) == list(map(type, expected.values()))
+    else:
+        assert doc == pytest.approx(expected)
+
+
+def test__backend__nan(backend):
+    doc = parsers.as_dict(backend.loads('{"a": NaN, "b": 1}'))
+    assert math.isnan(doc["a"]) and doc["b"] == 1
+
+
+def test__backend__invalid(backend):
+    with pytest.raises(ValueError):
+        backend.loads('{"a": 1')
+
+
+def test__backend__big_int_dtype(backend, tmp_path):
+    path = tmp_path / "test.json"
+    path.write_text('[{"a": 1}, {"a": 18446744073709551616}]')
+
+    md = MaxDict()
+    md.batch_load_dicts(read_json.iter_files([path], parser=backend.name))
+    expected = {"int": 2} if backend.exact else {"int": 1, "float": 1}
+    assert md.key_store[("a",)].hist == expected
+
+
+def test__get_backend__unknown():
+    with pytest.raises(ValueError):
+        parsers.get_backend("unknown")
+
+
+def test__backend__max_dict(backend, tmp_path):
+    path = tmp_path / "test.json"
+    path.write_text("\n".join(json.dumps(d) for d in docs))
+
+    expected = MaxDict()
+    expected.batch_load_dicts(docs)
+
+    md = MaxDict()
+    md.batch_load_dicts(read_json.iter_files([path], parser=backend.name))
+    assert md.asdict() == expected.asdict()
+
+
+def test__backend__as_dict(backend):
+    assert parsers.as_dict(backend.loads(json.dumps(docs[1]))) == docs[1]
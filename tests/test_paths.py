@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from spectron import merge
+from spectron.paths import (
+    ARRAY_KEY,
+    MAP_KEY,
+    ROOT,
+    PathMatcher,
+    PathTable,
+    PrunedIds,
+    extract_terminal_ids,
+)
+
+
+@pytest.mark.parametrize(
+    "d",
+    [
+        {"a": None},
+        {"a": {}, "b": []},
+        {"a": {"b": [{"c": [{"d": []}]}]}},
+        {"a": [1, [2, []], {}, {"b": "x"}]},
+        {"a": {"array-parent": [[{"nested-array-child-dict": None}]]}},
+    ],
+)
+def test__extract_terminal_ids(d):
+    table = PathTable()
+    result = [(table.path(i), v) for i, v in extract_terminal_ids(d, table)]
+    assert result == merge.extract_terminal_keys(d)
+
+
+def test__path_table():
+    table = PathTable()
+    path_id = table.intern(("a", ARRAY_KEY, "b"))
+
+    assert table.intern(("a", ARRAY_KEY, "b")) == path_id
+    assert table.path(path_id) == ("a", ARRAY_KEY, "b")
+    assert table.path(ROOT) == ()
+    assert table.is_array[table.parents[path_id]]
+    assert table.child_ids(table.intern(("a",))) == [table.parents[path_id]]
+    assert len(table) == 4
+
+
+def test__path_table__case_insensitive():
+    table = PathTable(case_insensitive=True)
+    path_id = table.intern(("A", "b"))
+
+    assert table.intern(("a", "B")) == path_id
+    assert table.path(path_id) == ("a", "b")
+    assert table.child_ids(ROOT) == [table.intern(("a",))]
+    assert table.num_children[ROOT] == 1
+
+
+def test__path_table__child_ids():
+    table = PathTable()
+    path_ids = [table.intern(key) for key in (("b",), ("a",), ("b", "c"), ("c",))]
+
+    assert table.child_ids(ROOT) == [path_ids[0], path_ids[1], path_ids[3]]
+    assert table.child_ids(path_ids[0]) == [path_ids[2]]
+    assert table.child_ids(path_ids[2]) == []
+
+
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test__path_table__set_map(case_insensitive):
+    table = PathTable(case_insensitive=case_insensitive)
+    table.intern(("a", "U0"))
+    parent_id = table.intern(("a",))
+    detached_id = table.intern(("a", "u1"))
+
+    map_id = table.set_map(parent_id)
+    assert table.path(map_id) == ("a", MAP_KEY)
+    assert table.set_map(parent_id) == map_id
+    assert table.child_ids(parent_id) == [map_id]
+
+    for key in ("U0", "u1", "u2", MAP_KEY):
+        assert table.child(parent_id, key) == map_id
+    assert table.num_children[parent_id] == 1
+    assert table.intern(("a", "u3", "b")) == table.child(map_id, "b")
+    assert table.path(detached_id) == ("a", "u1")
+
+
+@pytest.mark.parametrize(
+    "ignore, include, path, expected",
+    [
+        (["x"], None, ("a", "x"), True),
+        (["x"], None, ("x",), True),
+        (["x"], None, ("x", "a"), False),
+        (["a.x"], None, ("b", "x"), False),
+        (["payload.*"], None, ("payload",), False),
+        (["payload.*"], None, ("payload", "raw"), True),
+        (["*.debug"], None, ("events", "debug"), True),
+        (["events.[array].debug"], None, ("events", ARRAY_KEY, "debug"), True),
+        (["events.[array].debug"], None, ("events", "debug"), False),
+        (["a.**.z"], None, ("a", "z"), True),
+        (["a.**.z"], None, ("a", "b", "c", "z"), True),
+        (["A.x"], None, ("a", "x"), False),
+        (None, ["events"], ("events",), False),
+        (None, ["events"], ("events", ARRAY_KEY, "k"), False),
+        (None, ["events"], ("a", "events"), True),
+        (None, ["a.b"], ("a",), False),
+        (None, ["a.b"], ("a", "c"), True),
+        (None, ["a.*.c"], ("a", "x"), False),
+        (None, ["a.*.c"], ("a", "x", "d"), True),
+        (["a.b.x"], ["a.b"], ("a", "b", "x"), True),
+    ],
+)
+def test__PathMatcher(ignore, include, path, expected):
+    matcher = PathMatcher(ignore, include)
+    assert bool(matcher)
+    assert matcher.pruned(path) is expected
+
+
+def test__PathMatcher__case_insensitive():
+    matcher = PathMatcher(["A.X"], ["a"], case_insensitive=True)
+    assert matcher.pruned(("a", "x"))
+    assert matcher.pruned(("A", "x"))
+    assert not matcher.pruned(("A", "y"))
+    assert not PathMatcher()
+
+
+def test__extract_terminal_ids__pruned():
+    d = {
+        "a": 1,
+        "payload": {"raw": "x" * 100, "meta": {"b": 1}},
+        "events": [{"debug": {"c": 1}, "k": 1}],
+        "e": [],
+    }
+    matcher = PathMatcher(["payload.*", "events.[array].debug", "e.[array]"])
+
+    table = PathTable()
+    keys = [
+        table.path(path_id)
+        for path_id, _ in extract_terminal_ids(
+            d, table, pruned=PrunedIds(table, matcher)
+        )
+    ]
+    assert keys == [("a",), ("events", ARRAY_KEY, "k")]
+
+    # pruned subtrees are never interned
+    interned = {table.path(path_id) for path_id in range(len(table))}
+    assert ("payload", "meta", "b") not in interned
+    assert [k for k, _ in merge.extract_terminal_keys(d, matcher=matcher)] == keys
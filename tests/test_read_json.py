@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import pytest
+
+from spectron import read_json
+
+
+@pytest.mark.parametrize(
+    "s, lines, expected",
+    [
+        ('{"a": 1}', None, [{"a": 1}]),
+        ('{"a": 1}\n{"b": 2}\n', None, [{"a": 1}, {"b": 2}]),
+        ('\n{"a": 1}\n\n{"b": 2}', None, [{"a": 1}, {"b": 2}]),
+        ('{\n    "a": 1\n}\n', None, [{"a": 1}]),
+        ('[{"a": 1}, {"b": 2}]', None, [{"a": 1}, {"b": 2}]),
+        ('[\n    {"a": 1},\n    {"b": 2}\n]', None, [{"a": 1}, {"b": 2}]),
+        ('{"a": 1}\n{"b": 2}\n', True, [{"a": 1}, {"b": 2}]),
+        ('{\n    "a": 1\n}\n', False, [{"a": 1}]),
+    ],
+)
+def test__iter_documents(s, lines, expected):
+    assert list(read_json.iter_documents(io.StringIO(s), lines=lines)) == expected
+
+
+@pytest.mark.parametrize("s", ["1", '["a"]', '{"a": 1}\n2\n'])
+def test__iter_documents__unsupported(s):
+    with pytest.raises(ValueError):
+        list(read_json.iter_documents(io.StringIO(s)))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+@pytest.mark.parametrize(
+    "s, expected",
+    [
+        ("]", []),
+        (' {"a": 1} ]', [{"a": 1}]),
+        (
+            '{"a": 12345}, {"b": [1, 2.5e3, "]"]}]',
+            [{"a": 12345}, {"b": [1, 2500.0, "]"]}],
+        ),
+        (
+            '\n  {"a": "x,y"}\n  ,\n  {"b": {"c": null}}\n]\n',
+            [{"a": "x,y"}, {"b": {"c": None}}],
+        ),
+    ],
+)
+def test__iter_array(s, expected, chunk_size):
+    infile = io.StringIO(s)
+    assert list(read_json.iter_array(infile, chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64])
+def test__iter_array__loads(chunk_size):
+    s = '{"a": "}{"}, {"b": {"c": ["{", "}}"]}}, {"d": "\\"}"}]'
+    decoded = []
+
+    def loads(value):
+        doc = json.loads(value)
+        decoded.append(value)
+        return doc
+
+    infile = io.StringIO(s)
+    docs = list(read_json.iter_array(infile, chunk_size=chunk_size, loads=loads))
+    assert docs == [{"a": "}{"}, {"b": {"c": ["{", "}}"]}}, {"d": '"}'}]
+    assert decoded == ['{"a": "}{"}', '{"b": {"c": ["{", "}}"]}}', '{"d": "\\"}"}']
+
+
+@pytest.mark.parametrize(
+    "s", ['{"a": 1}', '{"a": 1},', '{"a": 1} {"b": 2}]', '{"a": 1}] {"b": 2}', "1]"]
+)
+def test__iter_array__malformed(s):
+    with pytest.raises(ValueError):
+        list(read_json.iter_array(io.StringIO(s), chunk_size=4))
+
+
+def test__iter_documents__single_parse():
+    """Top level array is decoded once, without reading the whole input."""
+
+    class Infile(io.StringIO):
+        def read(self, size=-1):
+            assert size is not None and size > 0
+            return super().read(size)
+
+    s = "[" + ", ".join('{"a": %d}' % i for i in range(1000)) + "]"
+    assert len(list(read_json.iter_documents(Infile(s)))) == 1000
+
+
+@pytest.fixture
+def ndjson_path(tmp_path):
+    path = tmp_path / "test.json"
+    lines = ['{"a": %d, "b": {"c": "%s"}}' % (i, "x" * (i % 7)) for i in range(100)]
+    path.write_text("\n".join(lines[:50]) + "\n\n" + "\r\n".join(lines[50:]) + "\n")
+    return path
+
+
+@pytest.mark.parametrize("num_ranges", [1, 2, 3, 10, 99, 1000])
+def test__split_ranges(ndjson_path, num_ranges):
+    ranges = read_json.split_ranges(ndjson_path, num_ranges)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == ndjson_path.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    data = ndjson_path.read_bytes()
+    assert all(data[end - 1 : end] == b"\n" for _, end in ranges[:-1])
+
+    docs = [d for r in ranges for d in read_json.iter_range(ndjson_path, *r)]
+    assert docs == list(read_json.iter_documents(io.StringIO(ndjson_path.read_text())))
+
+
+def test__is_json_lines(ndjson_path, tmp_path):
+    assert read_json.is_json_lines(ndjson_path)
+
+    path = tmp_path / "array.json"
+    path.write_text('[{"a": 1}]')
+    assert not read_json.is_json_lines(path)
+
+    path.write_text('{\n"a": 1\n}')
+    assert not read_json.is_json_lines(path)
+
+
+@pytest.mark.parametrize(
+    "s, lines, expected",
+    [
+        ('{"a": 1}\n{"b": 2}\n', None, [{"a": 1}, '{"b": 2}']),
+        ('{"a": 1}\n\n[{"b": 2}, {"c": 3}]\n', True, ['{"a": 1}', {"b": 2}, {"c": 3}]),
+        ('[{"a": 1}, {"b": 2}]', None, [{"a": 1}, {"b": 2}]),
+        ('{\n    "a": 1\n}\n', None, [{"a": 1}]),
+    ],
+)
+def test__iter_documents__raw(s, lines, expected):
+    docs = read_json.iter_documents(io.StringIO(s), lines=lines, raw=True)
+    assert list(docs) == expected
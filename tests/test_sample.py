@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import json
+import random
+import pytest
+
+from spectron import parsers, sample, scan
+from spectron.sample import Sample
+
+
+@pytest.fixture
+def infiles(tmp_path):
+    paths = []
+    for part in range(3):
+        for i in range(2):
+            path = tmp_path / f"part={part}" / f"{i}.json"
+            path.parent.mkdir(exist_ok=True)
+            docs = [{"part": part, "file": i, "n": n} for n in range(10)]
+            path.write_text("\n".join(map(json.dumps, docs)))
+            paths.append(str(path))
+    return paths
+
+
+def ids(docs):
+    return [(d["part"], d["file"], d["n"]) for d in docs]
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 10, 20])
+def test__reservoir(k):
+    items = list(range(10))
+    result = sample.reservoir(iter(items), k, random.Random(0))
+
+    assert len(result) == min(k, len(items))
+    assert result == sorted(set(result))
+    assert set(result) <= set(items)
+
+
+def test__reservoir__uniform():
+    counts = [0] * 10
+    rng = random.Random(0)
+    for _ in range(2000):
+        for item in sample.reservoir(range(10), 3, rng):
+            counts[item] += 1
+
+    # expected 600 per item
+    assert all(500 < count < 700 for count in counts)
+
+
+@pytest.mark.parametrize(
+    "mode, expected",
+    [
+        ("head", [(0, 0, 0), (0, 0, 1), (0, 1, 0), (0, 1, 1)]),
+        ("tail", [(0, 0, 8), (0, 0, 9), (0, 1, 8), (0, 1, 9)]),
+        ("head_tail", [(0, 0, 0), (0, 0, 1), (0, 0, 8), (0, 0, 9)]),
+    ],
+)
+def test__iter_sample__head_tail(infiles, mode, expected):
+    docs = ids(sample.iter_sample(infiles, Sample(mode, 2)))
+    assert len(docs) == len(infiles) * (4 if mode == "head_tail" else 2)
+    assert docs[:4] == expected
+
+
+@pytest.mark.parametrize(
+    "mode, size, num_docs, per_stratum",
+    [
+        ("reservoir", 7, 7, None),
+        ("file", 3, 18, lambda d: d[:2]),
+        ("dir", 4, 12, lambda d: d[0]),
+    ],
+)
+def test__iter_sample__random(infiles, mode, size, num_docs, per_stratum):
+    spec = Sample(mode, size, seed=1)
+    docs = ids(sample.iter_sample(infiles, spec))
+
+    assert len(docs) == len(set(docs)) == num_docs
+    assert docs == sorted(docs)
+    assert docs == ids(sample.iter_sample(infiles, spec))
+
+    if per_stratum:
+        counts = {}
+        for d in docs:
+            counts[per_stratum(d)] = counts.get(per_stratum(d), 0) + 1
+        assert set(counts.values()) == {size}
+
+
+def test__iter_sample__invalid(infiles):
+    with pytest.raises(ValueError, match="Unknown sample mode"):
+        list(sample.iter_sample(infiles, Sample("x", 1)))
+
+    with pytest.raises(ValueError, match="must be positive"):
+        list(sample.iter_sample(infiles, Sample("head", 0)))
+
+
+@pytest.mark.parametrize("mode", ["file", "reservoir"])
+def test__scan_files__sample(infiles, mode):
+    spec = Sample(mode, 3, seed=1)
+    md = scan.scan_files(infiles, sample=spec)
+
+    assert md.convergence["num_docs"] == len(list(sample.iter_sample(infiles, spec)))
+    assert scan.scan_files(infiles, jobs=2, sample=spec).hist == md.hist
+
+
+@pytest.mark.parametrize("mode", ["reservoir", "dir", "file", "tail"])
+def test__iter_sample__skipped_not_decoded(infiles, mode, monkeypatch):
+    decoded = []
+
+    def loads(s):
+        decoded.append(s)
+        return json.loads(s)
+
+    monkeypatch.setitem(parsers._backends, "json", parsers.Backend("json", loads))
+
+    docs = list(sample.iter_sample(infiles, Sample(mode, 1, seed=0), parser="json"))
+    assert docs
+    # first line of each file is decoded to detect newline delimited JSON, other
+    # lines only if accepted
+    assert len(decoded) < len(infiles) * 10 / 2
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+
+from spectron import ddl, scan
+from spectron.MaxDict import MaxDict
+
+docs = [
+    {"a": 1, "b": {"c": "x"}},
+    {"a": 2.5, "b": {"c": "xyz", "d": [1, 2]}},
+    {"a": -100, "e": [{"f": True}]},
+    {"a": 10 ** 10, "b": {"c": "", "d": []}, "e": [{"f": False, "g": "test"}]},
+]
+
+
+@pytest.fixture
+def infiles(tmp_path):
+    paths = []
+    for i in range(len(docs) * 3):
+        path = tmp_path / f"{i:02d}.json"
+        path.write_text(json.dumps(docs[i % len(docs)]))
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize(
+    "n, num_chunks, expected",
+    [
+        (0, 2, [[]]),
+        (1, 4, [[0]]),
+        (5, 2, [[0, 1, 2], [3, 4]]),
+        (4, 4, [[0], [1], [2], [3]]),
+    ],
+)
+def test__split_paths(n, num_chunks, expected):
+    assert scan.split_paths(list(range(n)), num_chunks) == expected
+
+
+def test__tree_merge():
+    partials = []
+    for d in docs:
+        md = MaxDict()
+        md.load_dict(d)
+        partials.append(md)
+
+    md = MaxDict()
+    md.batch_load_dicts(docs)
+    assert scan.tree_merge(partials).asdict() == md.asdict()
+
+
+@pytest.mark.parametrize("jobs", [1, 2, 3])
+def test__scan_files(infiles, jobs):
+    md = MaxDict()
+    md.batch_load_dicts(docs * 3)
+    assert scan.scan_files(infiles, jobs=jobs).asdict() == md.asdict()
+
+
+def test__from_files(infiles):
+    md = MaxDict()
+    md.batch_load_dicts(docs)
+    assert ddl.from_files(infiles, jobs=2) == ddl.from_dict(md.asdict())
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test__from_files__scan_options(infiles, tmp_path, monkeypatch, cache):
+    from spectron import incremental
+
+    scanned = []
+
+    def spy(func):
+        def wrapper(*args, **kwargs):
+            md = func(*args, **kwargs)
+            scanned.append(md)
+            return md
+
+        return wrapper
+
+    monkeypatch.setattr(scan, "scan_files", spy(scan.scan_files))
+    monkeypatch.setattr(
+        incremental, "scan_incremental", spy(incremental.scan_incremental)
+    )
+
+    kwargs = {"array_budget": (0, 0), "ignore_fields": ["b"], "infer_date": True}
+    result = ddl.from_files(
+        infiles, cache_dir=tmp_path / "cache" if cache else None, **kwargs
+    )
+
+    md = scanned[-1]
+    assert md.infer_date
+    assert md.hist == {("a",): 12}
+    assert md.skipped_elements == {("e", "[array]"): 6}
+    assert list(md.asdict()) == ["a"]
+    assert result == ddl.from_dict(md.asdict(), **kwargs)
+
+
+def test__scan_files__byte_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan, "MIN_SHARD_SIZE", 64)
+
+    path = tmp_path / "test.json"
+    path.write_text("\n".join(json.dumps(d) for d in docs * 10))
+    assert len(scan.shard_path(path, 8)) == 8
+
+    md = MaxDict()
+    md.batch_load_dicts(docs * 10)
+    assert scan.scan_files([path], jobs=2).asdict() == md.asdict()
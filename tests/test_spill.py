@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from spectron.Field import Field
+from spectron.spill import SpillStore
+
+
+def test__spill_store(tmp_path):
+    store = SpillStore(str(tmp_path))
+    assert os.path.dirname(store.path) == str(tmp_path)
+
+    store.put([(1, Field("a", 1)), (2, Field("b", "x")), (1, Field("a", 2.5))])
+    store.put([(3, Field("c", None))])
+    assert len(store) == 4
+    assert store.num_values() == {1: 2, 2: 1, 3: 0}
+
+    partials = store.get(1, ("a",))
+    assert [field.hist for field in partials] == [{"int": 1}, {"float": 1}]
+    assert partials[1].parent_key == ("a",)
+
+    store.move(1, 2)
+    assert store.get(1) == []
+    assert [field.hist for field in store.get(2)] == [
+        {"int": 1},
+        {"str": 1},
+        {"float": 1},
+    ]
+    assert [row[0] for row in store.rows()] == [2, 2, 2, 3]
+
+    store.close()
+    assert not os.path.exists(store.path)
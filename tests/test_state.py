@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import pickle
+import pytest
+import re
+
+from spectron import ddl, parse_date, state
+from spectron.MaxDict import MaxDict
+
+docs = [
+    {"a": 1, "b": {"c": "x", "d": []}, "Upper": True},
+    {"a": 2.5, "b": {"c": "xyz", "d": [1, -(2 ** 70)]}, "upper": None},
+    {"a": None, "b": {"c": "", "d": {}}, "e": [{"f": False, "g": "ünïcode"}]},
+    {"a": -(10**10), "b": {"c": {}, "d": [{"e": None}]}, "e": [{"f": 1.5}]},
+]
+
+
+def load_max_dict(docs, **kwargs):
+    md = MaxDict(**kwargs)
+    md.batch_load_dicts(docs)
+    return md
+
+
+def assert_fields_equal(md, expected):
+    assert md.case_insensitive == expected.case_insensitive
+    assert md.str_numeric_override == expected.str_numeric_override
+
+    items = dict(md.items())
+    expected_items = dict(expected.items())
+    assert items.keys() == expected_items.keys()
+
+    for key, field in expected_items.items():
+        for attr in field.__slots__:
+            assert getattr(items[key], attr) == getattr(field, attr), (key, attr)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"case_insensitive": True}, {"str_numeric_override": True}],
+)
+def test__dumps_loads(kwargs):
+    md = load_max_dict(docs, **kwargs)
+    md.add("other", [1, 2])
+
+    result = state.loads(state.dumps(md))
+    assert_fields_equal(result, md)
+    assert result.asdict() == md.asdict()
+
+
+def test__dumps_loads__map():
+    md = load_max_dict(
+        ({"a": {f"u{i}": {"b": i}}} for i in range(10)), map_threshold=4
+    )
+    md.load_dict({"c": 1})
+
+    result = state.loads(state.dumps(md))
+    assert result.paths.map_ids == md.paths.map_ids
+    assert_fields_equal(result, md)
+
+    result.load_dict({"a": {"u10": {"b": 10}}})
+    assert result.hist[("a", "[map]", "b")] == 11
+
+
+def test__dumps_loads__spilled():
+    md = load_max_dict(docs * 10, max_memory=2 * MaxDict.field_bytes)
+    assert len(md._spill)
+
+    result = state.loads(state.dumps(md))
+    assert_fields_equal(result, load_max_dict(docs * 10))
+
+
+def test__dumps_loads__str_format():
+    md = load_max_dict(
+        [{"a": "2020-05-01", "b": "2020-05-01T12:34:56Z"}, {"a": "x"}],
+        infer_date=True,
+    )
+    result = state.loads(state.dumps(md))
+
+    for key, field in md.items():
+        fmt = result.key_store[key].str_format
+        expected = field.str_format
+        assert (fmt.dtype, fmt.pattern) == (expected.dtype, expected.pattern)
+    assert result.asdict()["b"].dtype == "TIMESTAMP"
+
+
+def test__dumps_loads__str_format__merge():
+    docs = [{"ts": f"2020-05-{i + 1:02d}T12:34:56Z"} for i in range(10)]
+    md = load_max_dict(docs, infer_date=True)
+    data = state.dumps(md)
+
+    # layouts compiled in another process are distinct objects
+    parse_date.compile_layout.cache_clear()
+    re.purge()
+    result = state.loads(data)
+    assert result.key_store[("ts",)].str_format.pattern is not (
+        md.key_store[("ts",)].str_format.pattern
+    )
+
+    merged = result.merge(pickle.loads(pickle.dumps(md)))
+    assert merged.asdict()["ts"].dtype == "TIMESTAMP"
+
+
+def legacy_dumps(md, version):
+    """State without convergence and skipped elements, same as versions 1 and 2."""
+
+    data = state.dumps(md)
+    head, paths = bytearray(), bytearray()
+    state._write_uint(head, md.num_docs)
+    state._write_uint(head, md.last_change)
+    state._write_str(head, md.stop_reason or "")
+    state._write_paths(paths, md.paths)
+
+    assert not md.skipped_ids
+    pos = state.HEADER.size + len(head) + len(paths) + 1
+    return state.HEADER.pack(state.MAGIC, version, data[5]) + paths + data[pos:]
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test__loads__legacy_version(version):
+    md = state.loads(legacy_dumps(load_max_dict(docs), version))
+    assert md.asdict() == load_max_dict(docs).asdict()
+    assert md.convergence == {"num_docs": 0, "last_change": 0, "stop_reason": None}
+
+
+def test__dumps_loads__convergence():
+    md = load_max_dict(docs * 3, patience=4)
+    d = {"a": [{"b": i} for i in range(10)]}
+    skipped = load_max_dict([d, d], array_budget=(2, 1))
+
+    for expected in (md, skipped):
+        result = state.loads(state.dumps(expected))
+        assert result.convergence == expected.convergence
+        assert result.skipped_elements == expected.skipped_elements
+
+    assert md.convergence["stop_reason"] == "patience"
+    assert skipped.skipped_elements == {("a", "[array]"): 14}
+
+
+def test__merge_files__convergence(tmp_path):
+    d = {"a": [{"b": i} for i in range(10)]}
+    parts = [docs, [d], docs + [d, {"z": 1}]]
+
+    paths = []
+    for i, part in enumerate(parts):
+        path = tmp_path / f"{i}.state"
+        state.dump(load_max_dict(part, array_budget=(2, 1)), path)
+        paths.append(path)
+
+    md = state.merge_files(paths)
+    expected = load_max_dict(
+        [doc for part in parts for doc in part], array_budget=(2, 1)
+    )
+    assert md.convergence == expected.convergence
+    assert md.skipped_elements == expected.skipped_elements
+
+
+def test__loads__empty():
+    md = state.loads(state.dumps(MaxDict()))
+    assert md.asdict() == {}
+
+
+@pytest.mark.parametrize(
+    "data, msg",
+    [
+        (b"SP", "Truncated state"),
+        (b"JSON\x01\x00\x00\x00", "not a spectron state"),
+        (state.MAGIC + b"\x04\x00\x00\x00", "Unsupported state version"),
+        (state.MAGIC + b"\x01\x00\x01\x01", "Invalid parent"),
+        (state.MAGIC + b"\x01\x00\x00\x00\x00", "Extra data"),
+    ],
+)
+def test__loads__invalid(data, msg):
+    with pytest.raises(ValueError, match=msg):
+        state.loads(data)
+
+
+def test__loads__truncated():
+    data = state.dumps(load_max_dict(docs))
+    with pytest.raises(ValueError, match="Truncated state"):
+        state.loads(data[:-1])
+
+
+def test__merge_files(tmp_path):
+    paths = []
+    for i, doc in enumerate(docs):
+        path = tmp_path / f"{i}.state"
+        state.dump(load_max_dict([doc]), path)
+        paths.append(path)
+
+    # compressed states are detected
+    paths[-1].write_bytes(gzip.compress(paths[-1].read_bytes()))
+
+    md = state.merge_files(paths)
+    expected = load_max_dict(docs)
+    assert md.hist == expected.hist
+    assert md.asdict() == expected.asdict()
+
+    assert ddl.from_states(paths) == ddl.from_dict(expected.asdict())
+
+
+def test__merge_files__empty():
+    with pytest.raises(ValueError, match="No states"):
+        state.merge_files([])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import pytest
+
+from spectron import merge
+from spectron.MaxDict import MaxDict
+from spectron.paths import ARRAY_KEY, PathMatcher, PathTable, PrunedIds
+from spectron.traverse import walk, walk_keys
+
+docs = [
+    1,
+    {},
+    [],
+    {"a": None},
+    {"a": {}, "b": []},
+    {"a": {"b": [{"c": [{"d": []}]}]}},
+    {"a": [1, [2, []], {}, {"b": "x"}, [[{"c": 1}]]]},
+    [{"a": 1}, [{"b": 2}], 3],
+]
+
+
+def deep_doc(depth):
+    d = leaf = {}
+    for _ in range(depth):
+        leaf["next"] = [{}]
+        leaf = leaf["next"][0]
+    leaf["end"] = True
+    return d
+
+
+@pytest.mark.parametrize("d", docs)
+def test__walk(d):
+    table = PathTable()
+    result = []
+    walk(d, table, lambda path_id, value: result.append((table.path(path_id), value)))
+
+    expected = []
+    walk_keys(d, lambda key, value: expected.append((key or (), value)))
+    assert result == expected
+
+
+@pytest.mark.parametrize("parent", [None, ("p",)])
+def test__walk_keys(parent):
+    d = {"a": [{"b": 1}, 2], "c": {"d": []}, "e": {}}
+    result = []
+    walk_keys(d, lambda key, value: result.append((key, value)), parent=parent)
+
+    p = parent or ()
+    assert result == [
+        ((*p, "a", ARRAY_KEY, "b"), 1),
+        ((*p, "a", ARRAY_KEY), 2),
+        ((*p, "c", "d", ARRAY_KEY), None),
+        ((*p, "e"), {}),
+    ]
+
+
+def test__walk__budget_pruned():
+    d = {"a": [{"b": i, "c": i} for i in range(10)], "x": {"y": 1}}
+    matcher = PathMatcher(["c", "x"])
+
+    table = PathTable()
+    budget = merge.ArrayBudget(2, 1)
+    result = []
+    walk(
+        d,
+        table,
+        lambda path_id, value: result.append((table.path(path_id), value)),
+        budget=budget,
+        pruned=PrunedIds(table, matcher),
+    )
+
+    key_budget = merge.ArrayBudget(2, 1)
+    expected = merge.extract_terminal_keys(d, budget=key_budget, matcher=matcher)
+
+    assert result == expected
+    assert [v for _, v in result][:2] == [0, 1]
+    assert budget.skipped == {table.intern(("a", ARRAY_KEY)): 7}
+
+
+def test__walk__deep():
+    depth = sys.getrecursionlimit() * 2
+    d = deep_doc(depth)
+
+    result = []
+    walk_keys(d, lambda key, value: result.append((len(key), value)))
+    assert result == [(depth * 2 + 1, True)]
+
+    md = MaxDict()
+    md.load_dict(d)
+    md.load_dict(d)
+    [(key, field)] = md.items()
+    assert len(key) == depth * 2 + 1
+    assert field.num_values == 2